@@ -0,0 +1,288 @@
+"""
+This file defines micro-benchmarks for the core Karel primitives.
+
+Every benchmark is timed on a range of worlds, from the provided 1x1 world up to
+40x40 and larger synthetic worlds, using only the standard library. Each
+benchmark is called in a loop until the loop takes at least --min-time seconds,
+and the fastest of --repeat loops is reported, in nanoseconds per call.
+
+Results are written as JSON so that runs on different commits can be compared:
+
+    python -m benchmarks.core_benchmarks --output before.json
+    git checkout other-branch
+    python -m benchmarks.core_benchmarks --output after.json --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple
+
+from stanfordkarel.generate import save_generated_world
+from stanfordkarel.karel_program import KarelProgram
+from stanfordkarel.karel_world import INFINITY, KarelWorld
+from stanfordkarel.world_cache import CACHE_DIR_VARIABLE
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+WORLDS = ("1x1", "5x5", "8x8", "stone_mason_karel", "40x40")
+# Side lengths of the square synthetic worlds, written to a temporary directory
+SYNTHETIC_SIZES = (100, 500)
+PREDICATES = (
+    "front_is_clear",
+    "front_is_blocked",
+    "left_is_clear",
+    "left_is_blocked",
+    "right_is_clear",
+    "right_is_blocked",
+    "beepers_present",
+    "no_beepers_present",
+    "beepers_in_bag",
+    "no_beepers_in_bag",
+    "facing_north",
+    "not_facing_north",
+    "facing_east",
+    "not_facing_east",
+    "facing_west",
+    "not_facing_west",
+    "facing_south",
+    "not_facing_south",
+)
+MIN_TIME = 0.05
+REPEAT = 5
+# Seconds after which a benchmark is not repeated any more
+MAX_TIME = 2.0
+SEED = 1
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # Given a world file, returns the function to time, or None if the benchmark
+    # cannot run in that world
+    setup: Callable[[str], Callable[[], object] | None]
+
+
+def karel_in(world_file: str) -> KarelProgram:
+    karel = KarelProgram(world_file)
+    karel.num_beepers = INFINITY
+    return karel
+
+
+def setup_move(world_file: str) -> Callable[[], object] | None:
+    karel = karel_in(world_file)
+    if not karel.front_is_clear():
+        return None
+    avenue, street = karel.avenue, karel.street
+
+    def move() -> None:
+        karel.move()
+        karel.avenue, karel.street = avenue, street
+
+    return move
+
+
+def setup_turn_left(world_file: str) -> Callable[[], object]:
+    return karel_in(world_file).turn_left
+
+
+def setup_predicate(name: str) -> Callable[[str], Callable[[], object]]:
+    def setup(world_file: str) -> Callable[[], object]:
+        return getattr(karel_in(world_file), name)  # type: ignore[no-any-return]
+
+    return setup
+
+
+def setup_put_pick_beeper(world_file: str) -> Callable[[], object]:
+    karel = karel_in(world_file)
+
+    def put_pick_beeper() -> None:
+        karel.put_beeper()
+        karel.pick_beeper()
+
+    return put_pick_beeper
+
+
+def setup_paint_corner(world_file: str) -> Callable[[], object]:
+    karel = karel_in(world_file)
+
+    def paint_corner() -> None:
+        karel.paint_corner("Red")
+        karel.paint_corner("Blue")
+
+    return paint_corner
+
+
+def setup_load_world(world_file: str) -> Callable[[], object]:
+    return lambda: KarelWorld(world_file)
+
+
+def setup_parse_world(world_file: str) -> Callable[[], object]:
+    def parse_world() -> KarelWorld:
+        cache_dir = os.environ.get(CACHE_DIR_VARIABLE, "")
+        # An empty cache directory turns the world cache off
+        os.environ[CACHE_DIR_VARIABLE] = ""
+        try:
+            return KarelWorld(world_file)
+        finally:
+            os.environ[CACHE_DIR_VARIABLE] = cache_dir
+
+    return parse_world
+
+
+def setup_save_world(world_file: str) -> Callable[[], object]:
+    world = KarelWorld(world_file)
+    # Formatting the world is timed, and writing it to disk mostly is not
+    return lambda: world.save_to_file(Path(os.devnull))
+
+
+def setup_ascii(world_file: str) -> Callable[[], object]:
+    return karel_in(world_file).__repr__
+
+
+def setup_compare_equal(world_file: str) -> Callable[[], object]:
+    karel, other = karel_in(world_file), karel_in(world_file)
+    return lambda: karel.compare_with(other)
+
+
+def setup_compare_different(world_file: str) -> Callable[[], object]:
+    karel, other = karel_in(world_file), karel_in(world_file)
+    other.put_beeper()
+
+    def compare_different() -> bool:
+        # The differences are printed, which is part of what is being timed
+        with contextlib.redirect_stdout(io.StringIO()):
+            return karel.compare_with(other)
+
+    return compare_different
+
+
+BENCHMARKS = (
+    Benchmark("move", setup_move),
+    Benchmark("turn_left", setup_turn_left),
+    *(Benchmark(name, setup_predicate(name)) for name in PREDICATES),
+    Benchmark("put_beeper+pick_beeper", setup_put_pick_beeper),
+    Benchmark("paint_corner x2", setup_paint_corner),
+    Benchmark("KarelWorld (cached)", setup_load_world),
+    Benchmark("KarelWorld (parsed)", setup_parse_world),
+    Benchmark("save_to_file", setup_save_world),
+    Benchmark("AsciiKarelWorld", setup_ascii),
+    Benchmark("compare_with (equal)", setup_compare_equal),
+    Benchmark("compare_with (different)", setup_compare_different),
+)
+
+
+def time_call(function: Callable[[], object], min_time: float, repeat: int) -> float:
+    """
+    Returns the time of a call to function in nanoseconds, from the fastest of up
+    to repeat loops that each take at least min_time seconds.
+    """
+    number = 1
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    best = total = elapsed
+    for _ in range(repeat - 1):
+        # Very slow benchmarks are not repeated, to keep the whole run short
+        if total >= MAX_TIME:
+            break
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = perf_counter() - start
+        best, total = min(best, elapsed), total + elapsed
+    return best / number * 1e9
+
+
+def is_selected(world_name: str, selected: str) -> bool:
+    """Returns whether any benchmark in the world is selected with -k."""
+    return any(selected in f"{world_name}/{benchmark.name}" for benchmark in BENCHMARKS)
+
+
+def run_benchmarks(
+    worlds: dict[str, str], selected: str, min_time: float, repeat: int
+) -> dict[str, float]:
+    results = {}
+    for world_name, world_file in worlds.items():
+        for benchmark in BENCHMARKS:
+            key = f"{world_name}/{benchmark.name}"
+            if selected not in key:
+                continue
+            function = benchmark.setup(world_file)
+            if function is None:
+                continue
+            results[key] = time_call(function, min_time, repeat)
+            print(f"{key:<50} {results[key]:>14,.0f} ns")
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float]) -> None:
+    """Prints the change in every benchmark that is in both runs."""
+    print(f"\n{'benchmark':<50} {'before':>12} {'after':>12} {'change':>8}")
+    for key, after in results.items():
+        if key in baseline:
+            before = baseline[key]
+            print(f"{key:<50} {before:>12,.0f} {after:>12,.0f} {after / before:>7.2f}x")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--output", type=Path, help="JSON file to write results to")
+    parser.add_argument("--compare", type=Path, help="JSON results to compare with")
+    parser.add_argument(
+        "-k", dest="selected", default="", help="only run benchmarks matching this"
+    )
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+
+    # Worlds are cached in, and synthetic worlds written to, a temporary directory
+    cache_dir = os.environ.get(CACHE_DIR_VARIABLE)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.environ[CACHE_DIR_VARIABLE] = str(Path(temp_dir) / "cache")
+        try:
+            worlds = {name: name for name in WORLDS}
+            for size in SYNTHETIC_SIZES:
+                world_file = Path(temp_dir) / f"synthetic_{size}x{size}.w"
+                # Large worlds are slow to generate, so only the selected ones are
+                if not is_selected(world_file.stem, args.selected):
+                    continue
+                # Walls, beepers and colors on about 10% of corners
+                save_generated_world("random", size, size, world_file, SEED)
+                worlds[world_file.stem] = str(world_file)
+            results = run_benchmarks(worlds, args.selected, args.min_time, args.repeat)
+        finally:
+            if cache_dir is None:
+                del os.environ[CACHE_DIR_VARIABLE]
+            else:
+                os.environ[CACHE_DIR_VARIABLE] = cache_dir
+
+    if args.output:
+        report = {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "unit": "ns per call",
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
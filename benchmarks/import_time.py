@@ -0,0 +1,53 @@
+"""
+This file measures how long `import stanfordkarel` takes, which every student
+program pays before Karel starts. It is not part of the test suite, because wall
+clock times depend too much on the machine and on whatever else it is running.
+
+    python -m benchmarks.import_time --budget 25
+
+The fastest of --repeat imports is reported, each in a fresh interpreter, and the
+exit status is 1 if it took longer than --budget milliseconds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+# Milliseconds that `import stanfordkarel` may take. Currently about 3ms, with
+# plenty of headroom for slow machines.
+IMPORT_BUDGET_MS = 25.0
+REPEAT = 5
+
+
+def import_time_us() -> int:
+    """Returns the microseconds a fresh interpreter takes to import stanfordkarel."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import stanfordkarel"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        *_, cumulative, name = line.split("|")
+        if name.strip() == "stanfordkarel":
+            return int(cumulative)
+    raise RuntimeError(f"stanfordkarel not found in:\n{result.stderr}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+
+    # The fastest of a few runs is the least affected by other processes
+    best_ms = min(import_time_us() for _ in range(args.repeat)) / 1000
+    print(f"import stanfordkarel: {best_ms:.1f} ms (budget {args.budget:g} ms)")
+    return 0 if best_ms <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
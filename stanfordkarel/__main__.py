@@ -0,0 +1,226 @@
+"""
+Command line entry point for stanfordkarel.
+
+    python -m stanfordkarel run student.py --world triple1 --headless
+    python -m stanfordkarel replay student.ktrace --world triple1
+    python -m stanfordkarel grade submissions/ --workers 8
+    python -m stanfordkarel generate maze 100x100 --seed 3 --output worlds/maze.w
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def parse_size(size: str) -> tuple[int, int]:
+    avenues, _, streets = size.lower().partition("x")
+    try:
+        return int(avenues), int(streets or avenues)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid size {size!r}, expected AVENUESxSTREETS"
+        ) from None
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="stanfordkarel")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a Karel program.")
+    run_parser.add_argument("code_file", type=Path, help="Student Karel program.")
+    run_parser.add_argument(
+        "--world", default="", help="World name or path to a .w world file."
+    )
+    run_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Run without a GUI and print the final world state.",
+    )
+    run_parser.add_argument(
+        "--trace",
+        type=Path,
+        default=None,
+        help="Save the actions Karel performed to this file (headless only).",
+    )
+    run_parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        help="Stop Karel after this many actions and conditions (headless only).",
+    )
+    run_parser.add_argument(
+        "--repeat-limit",
+        type=int,
+        default=None,
+        help=(
+            "Stop Karel once it has been in the same state this many times "
+            "without changing the world (headless only)."
+        ),
+    )
+
+    replay_parser = subparsers.add_parser(
+        "replay", help="Replay a recorded action trace in the Karel GUI."
+    )
+    replay_parser.add_argument(
+        "trace_file", type=Path, help="Trace saved with `run --headless --trace`."
+    )
+    replay_parser.add_argument(
+        "--world", default="", help="World the trace was recorded in."
+    )
+
+    grade_parser = subparsers.add_parser(
+        "grade", help="Grade a directory of student submissions in parallel."
+    )
+    grade_parser.add_argument(
+        "submissions_dir",
+        type=Path,
+        help="Directory containing one folder of Karel programs per student.",
+    )
+    grade_parser.add_argument(
+        "--problems", nargs="+", default=None, help="Problem names to grade."
+    )
+    grade_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of processors).",
+    )
+    grade_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds each program may run for before it fails (default: 10).",
+    )
+    grade_parser.add_argument(
+        "--repeat-limit",
+        type=int,
+        default=None,
+        help=(
+            "Fail a program once Karel has been in the same state this many "
+            "times without changing the world (default: no limit)."
+        ),
+    )
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="Generate seeded synthetic worlds of any size."
+    )
+    generate_parser.add_argument(
+        "kind",
+        help=(
+            "Kind of world: beepers, walls, random, maze, rooms, checkerboard, "
+            "midpoint or collect_newspaper."
+        ),
+    )
+    generate_parser.add_argument(
+        "size", type=parse_size, help="World size as AVENUESxSTREETS, e.g. 50x50."
+    )
+    generate_parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the first world (default: 0)."
+    )
+    generate_parser.add_argument(
+        "--count",
+        type=int,
+        default=1,
+        help="Number of worlds to generate, with consecutive seeds.",
+    )
+    generate_parser.add_argument(
+        "--output",
+        type=Path,
+        required=True,
+        help=(
+            "World file to write, in the format given by its suffix. With --count, "
+            "the seed is appended to the name of each file."
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> int:
+    if not args.headless:
+        from .stanfordkarel import run_karel_program  # noqa: PLC0415
+
+        run_karel_program(args.world, code_file=str(args.code_file))
+        return 0
+
+    from .headless import run_headless  # noqa: PLC0415
+
+    result = run_headless(
+        args.code_file,
+        args.world,
+        record_trace=bool(args.trace),
+        max_steps=args.max_steps,
+        repeat_limit=args.repeat_limit,
+    )
+    print(result.summary())
+    if args.trace and result.karel.trace is not None:
+        result.karel.trace.save_to_file(args.trace)
+    return 1 if result.error is not None else 0
+
+
+def replay(args: argparse.Namespace) -> int:
+    from .stanfordkarel import run_karel_replay  # noqa: PLC0415
+
+    run_karel_replay(str(args.trace_file), args.world)
+    return 0
+
+
+def grade(args: argparse.Namespace) -> int:
+    from .grader import JOB_TIMEOUT, PROBLEMS, grade_cohort  # noqa: PLC0415
+
+    num_passed = num_failed = 0
+    for result in grade_cohort(
+        args.submissions_dir,
+        args.problems or PROBLEMS,
+        max_workers=args.workers,
+        timeout=args.timeout or JOB_TIMEOUT,
+        repeat_limit=args.repeat_limit,
+    ):
+        print(result)
+        if result.passed:
+            num_passed += 1
+        else:
+            num_failed += 1
+            print(result.output)
+    print(f"{num_passed} passed, {num_failed} failed")
+    return 1 if num_failed else 0
+
+
+def generate(args: argparse.Namespace) -> int:
+    from .generate import save_generated_world  # noqa: PLC0415
+    from .karel_world import WORLD_FILE_SUFFIXES  # noqa: PLC0415
+
+    avenues, streets = args.size
+    output = args.output
+    suffix = next(
+        (suffix for suffix in WORLD_FILE_SUFFIXES if output.name.endswith(suffix)), ""
+    )
+    stem = output.name[: len(output.name) - len(suffix)]
+    for seed in range(args.seed, args.seed + args.count):
+        if args.count > 1:
+            output = args.output.with_name(f"{stem}_{seed}{suffix}")
+        try:
+            save_generated_world(args.kind, avenues, streets, output, seed)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+        print(output)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    if args.command == "replay":
+        return replay(args)
+    if args.command == "grade":
+        return grade(args)
+    if args.command == "generate":
+        return generate(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
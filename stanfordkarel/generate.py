@@ -0,0 +1,257 @@
+"""
+This file defines generators of synthetic Karel worlds, for stress tests, fuzzing
+student solutions and building larger hidden test worlds.
+
+Every generator is seeded, so the same kind, size and seed always give the same
+world. The kinds of worlds are:
+- beepers: piles of beepers on a random subset of corners
+- walls: random walls between corners
+- random: random walls, beepers and painted corners together
+- maze: a perfect maze, with exactly one path between any two corners, and a
+  beeper at a random goal
+- rooms: a grid of rooms, with one doorway between each pair of adjacent rooms
+- checkerboard, midpoint: empty worlds like the checkerboard_karel and
+  midpoint_finding_karel problems
+- collect_newspaper: a house with a door on its east side and a newspaper
+  outside the door, like the collect_newspaper_karel problem
+
+Generated worlds can be used in memory with make_world(), or saved in any format
+the world serializer supports with save_generated_world(), e.g.
+
+    python -m stanfordkarel generate maze 100x100 --seed 3 --output worlds/maze.w
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .karel_world import KarelWorld
+from .world_parser import ParsedWorld
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+GENERATED_COLORS = ("Red", "Green", "Blue", "Yellow")
+
+
+def parsed_world(
+    avenues: int,
+    streets: int,
+    *,
+    walls: list[tuple[int, int, str]] | None = None,
+    beepers: dict[tuple[int, int], int] | None = None,
+    corner_colors: dict[tuple[int, int], str] | None = None,
+    karel_location: tuple[int, int] = (1, 1),
+    beeper_bag: int | None = None,
+) -> ParsedWorld:
+    """Returns a world with Karel facing east, by default with infinite beepers."""
+    if avenues < 1 or streets < 1:
+        raise ValueError(f"A world must be at least 1x1, not {avenues}x{streets}.")
+    return ParsedWorld(
+        avenues,
+        streets,
+        walls or [],
+        beepers or {},
+        corner_colors or {},
+        karel_location,
+        "east",
+        beeper_bag,
+        None,
+    )
+
+
+def random_world(
+    avenues: int,
+    streets: int,
+    rng: random.Random,
+    *,
+    wall_density: float = 0.04,
+    beeper_density: float = 0.04,
+    color_density: float = 0.02,
+    max_beepers: int = 9,
+) -> ParsedWorld:
+    """
+    Returns a world where each corner has a wall, a pile of beepers or a color
+    with the given probabilities, which must add up to at most 1.
+    """
+    walls = []
+    beepers = {}
+    corner_colors = {}
+    beeper_threshold = wall_density + beeper_density
+    color_threshold = beeper_threshold + color_density
+    for avenue in range(1, avenues + 1):
+        for street in range(1, streets + 1):
+            roll = rng.random()
+            if roll < wall_density:
+                # Walls on the edge of the world would have no effect
+                if avenue > 1 and (street == 1 or rng.random() < 0.5):
+                    walls.append((avenue, street, "west"))
+                elif street > 1:
+                    walls.append((avenue, street, "south"))
+            elif roll < beeper_threshold:
+                beepers[avenue, street] = rng.randint(1, max_beepers)
+            elif roll < color_threshold:
+                corner_colors[avenue, street] = rng.choice(GENERATED_COLORS)
+    return parsed_world(
+        avenues, streets, walls=walls, beepers=beepers, corner_colors=corner_colors
+    )
+
+
+def maze(avenues: int, streets: int, rng: random.Random) -> ParsedWorld:
+    """
+    Returns a perfect maze carved by a randomized depth-first search, with Karel
+    at (1, 1) and a beeper at a random corner.
+    """
+    num_corners = avenues * streets
+    visited = bytearray(num_corners)
+    # Whether the way west or south of each corner has been carved open
+    open_west = bytearray(num_corners)
+    open_south = bytearray(num_corners)
+
+    visited[0] = 1
+    stack = [0]
+    while stack:
+        index = stack[-1]
+        street, avenue = divmod(index, avenues)
+        neighbors = []
+        if avenue > 0 and not visited[index - 1]:
+            neighbors.append(index - 1)
+        if avenue < avenues - 1 and not visited[index + 1]:
+            neighbors.append(index + 1)
+        if street > 0 and not visited[index - avenues]:
+            neighbors.append(index - avenues)
+        if street < streets - 1 and not visited[index + avenues]:
+            neighbors.append(index + avenues)
+        if not neighbors:
+            stack.pop()
+            continue
+        neighbor = rng.choice(neighbors)
+        if abs(neighbor - index) == 1:
+            open_west[max(index, neighbor)] = 1
+        else:
+            open_south[max(index, neighbor)] = 1
+        visited[neighbor] = 1
+        stack.append(neighbor)
+
+    walls = []
+    for index in range(num_corners):
+        street, avenue = divmod(index, avenues)
+        if avenue > 0 and not open_west[index]:
+            walls.append((avenue + 1, street + 1, "west"))
+        if street > 0 and not open_south[index]:
+            walls.append((avenue + 1, street + 1, "south"))
+    goal = (rng.randint(1, avenues), rng.randint(1, streets))
+    return parsed_world(avenues, streets, walls=walls, beepers={goal: 1})
+
+
+def rooms(
+    avenues: int, streets: int, rng: random.Random, room_size: int = 5
+) -> ParsedWorld:
+    """
+    Returns a grid of rooms of room_size by room_size corners. Every wall between
+    two rooms has one doorway at a random position, so all rooms are connected.
+    """
+    walls: list[tuple[int, int, str]] = []
+    # Walls on the west side of the rooms that are not in the first column
+    for avenue in range(room_size + 1, avenues + 1, room_size):
+        for bottom in range(1, streets + 1, room_size):
+            top = min(bottom + room_size - 1, streets)
+            door = rng.randint(bottom, top)
+            walls.extend(
+                (avenue, street, "west")
+                for street in range(bottom, top + 1)
+                if street != door
+            )
+    # Walls on the south side of the rooms that are not in the first row
+    for street in range(room_size + 1, streets + 1, room_size):
+        for left in range(1, avenues + 1, room_size):
+            right = min(left + room_size - 1, avenues)
+            door = rng.randint(left, right)
+            walls.extend(
+                (avenue, street, "south")
+                for avenue in range(left, right + 1)
+                if avenue != door
+            )
+    return parsed_world(avenues, streets, walls=walls)
+
+
+def checkerboard(avenues: int, streets: int) -> ParsedWorld:
+    return parsed_world(avenues, streets)
+
+
+def midpoint(avenues: int, streets: int) -> ParsedWorld:
+    return parsed_world(avenues, streets)
+
+
+def collect_newspaper(avenues: int, streets: int, rng: random.Random) -> ParsedWorld:
+    """
+    Returns a house that fills the world except for a one-corner margin, with a
+    door at a random street on its east side and a newspaper just outside the
+    door. Karel starts at a random corner inside the house with no beepers.
+    """
+    if avenues < 4 or streets < 3:
+        raise ValueError("A collect_newspaper world must be at least 4x3.")
+    west, east = 2, avenues - 1
+    south, north = 2, streets - 1
+    door = rng.randint(south, north)
+    walls = []
+    for street in range(south, north + 1):
+        walls.append((west, street, "west"))
+        if street != door:
+            walls.append((east, street, "west"))
+    for avenue in range(west, east):
+        walls.extend(((avenue, south, "south"), (avenue, north + 1, "south")))
+    karel = (rng.randint(west, east - 1), rng.randint(south, north))
+    return parsed_world(
+        avenues,
+        streets,
+        walls=walls,
+        beepers={(east, door): 1},
+        karel_location=karel,
+        beeper_bag=0,
+    )
+
+
+GENERATORS: dict[str, Callable[[int, int, random.Random], ParsedWorld]] = {
+    "beepers": lambda avenues, streets, rng: random_world(
+        avenues, streets, rng, wall_density=0, beeper_density=0.2, color_density=0
+    ),
+    "walls": lambda avenues, streets, rng: random_world(
+        avenues, streets, rng, wall_density=0.2, beeper_density=0, color_density=0
+    ),
+    "random": random_world,
+    "maze": maze,
+    "rooms": rooms,
+    "checkerboard": lambda avenues, streets, _: checkerboard(avenues, streets),
+    "midpoint": lambda avenues, streets, _: midpoint(avenues, streets),
+    "collect_newspaper": collect_newspaper,
+}
+
+
+def generate(kind: str, avenues: int, streets: int, seed: int = 0) -> ParsedWorld:
+    """Returns the contents of a generated world of the given kind."""
+    if kind not in GENERATORS:
+        raise ValueError(
+            f"Unknown kind of world {kind!r}, expected one of: {', '.join(GENERATORS)}"
+        )
+    return GENERATORS[kind](avenues, streets, random.Random(seed))
+
+
+def make_world(kind: str, avenues: int, streets: int, seed: int = 0) -> KarelWorld:
+    """Returns a generated world in memory, named after its kind, size and seed."""
+    parsed = generate(kind, avenues, streets, seed)
+    return KarelWorld(f"{kind}_{avenues}x{streets}_{seed}", parsed=parsed)
+
+
+def save_generated_world(
+    kind: str, avenues: int, streets: int, filepath: Path | str, seed: int = 0
+) -> KarelWorld:
+    """
+    Generates a world and saves it in the format given by the suffix of filepath.
+    Returns the generated world.
+    """
+    world = make_world(kind, avenues, streets, seed)
+    world.save_to_file(Path(filepath))
+    return world
@@ -0,0 +1,204 @@
+"""
+This file defines a parallel autograder for a whole cohort of Karel submissions.
+
+A submissions directory contains one folder per student, each holding that
+student's Karel programs:
+
+- `submissions/`
+  - `student1/`
+    - `checkerboard_karel.py`
+    - `collect_newspaper_karel.py`
+  - `student2/`
+    - ...
+
+Every (submission, world) pair becomes one job. Jobs are spread over a process
+pool sized to the number of cores, and results are yielded as soon as they finish.
+A job that runs for longer than its time limit fails. The time limit uses SIGALRM,
+so it is not enforced on Windows, where only the step limits stop a program.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import io
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple
+
+from .karel_program import KarelProgram
+from .karel_world import KarelWorld
+from .student_code import StudentCode
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+    from pathlib import Path
+    from types import FrameType
+
+PROBLEMS = (
+    "checkerboard_karel",
+    "collect_newspaper_karel",
+    "midpoint_karel",
+    "triple_karel",
+    "stone_mason_karel",
+)
+
+# Infinite loops are stopped after this many steps
+MAX_STEPS = 1_000_000
+# Stopping Karel once it has been in the same state many times without changing
+# the world is opt-in: the check cannot see the program's own variables, so a
+# correct program such as `for _ in range(5000): turn_left()` would fail it
+REPEAT_LIMIT: int | None = None
+# Seconds a job may run for, to stop programs that loop without moving Karel
+JOB_TIMEOUT = 10.0
+
+
+class JobTimeout(BaseException):
+    """
+    Raised in a job that has run for too long. Student code catching Exception
+    does not catch it.
+    """
+
+
+class GradeJob(NamedTuple):
+    submission: Path
+    problem: str
+    world: str
+
+    @property
+    def code_file(self) -> Path:
+        return self.submission / f"{self.problem}.py"
+
+
+class GradeResult(NamedTuple):
+    job: GradeJob
+    passed: bool
+    output: str
+    elapsed: float
+
+    def __str__(self) -> str:
+        status = "PASS" if self.passed else "FAIL"
+        return (
+            f"{status} {self.job.submission.name}/{self.job.problem} "
+            f"[{self.job.world}] ({self.elapsed:.3f}s)"
+        )
+
+
+def find_jobs(
+    submissions_dir: Path,
+    problems: Iterable[str] = PROBLEMS,
+    worlds: Mapping[str, Sequence[str]] | None = None,
+) -> list[GradeJob]:
+    """
+    Creates one job for every submission folder and every world of every problem.
+    By default, each problem is graded on the world with the same name.
+    """
+    worlds = worlds or {}
+    return [
+        GradeJob(submission, problem, world)
+        for submission in sorted(submissions_dir.iterdir())
+        if submission.is_dir()
+        for problem in problems
+        for world in worlds.get(problem, (problem,))
+    ]
+
+
+@functools.cache
+def load_world(world_file: str) -> KarelWorld:
+    """
+    Loads each world once per worker process. Jobs run on forks of the loaded
+    world, so it never changes and can be shared by every job on that world.
+    """
+    return KarelWorld(world_file)
+
+
+@contextlib.contextmanager
+def time_limit(seconds: float) -> Iterator[None]:
+    """
+    Raises JobTimeout in the block once it has run for the given number of
+    seconds. Signals can only be handled on the main thread of platforms that
+    have SIGALRM, so elsewhere the block runs without a limit.
+    """
+    if (
+        not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def expire(_signum: int, _frame: FrameType | None) -> None:
+        raise JobTimeout
+
+    previous_handler = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def grade_job(
+    job: GradeJob,
+    timeout: float = JOB_TIMEOUT,
+    repeat_limit: int | None = REPEAT_LIMIT,
+) -> GradeResult:
+    """
+    Runs one student program on one world and compares the result with the
+    world's expected `_end` world. Everything printed while grading is captured
+    and returned with the result. This runs inside the pool's worker processes.
+    repeat_limit is passed to KarelProgram to stop Karel going round in circles.
+    """
+    output = io.StringIO()
+    passed = False
+    start = perf_counter()
+    with contextlib.redirect_stdout(output):
+        if not job.code_file.is_file():
+            print(f"{job.code_file} could not be found.")
+        else:
+            try:
+                with time_limit(timeout):
+                    karel = KarelProgram(
+                        max_steps=MAX_STEPS,
+                        repeat_limit=repeat_limit,
+                        world=load_world(job.world).fork(),
+                    )
+                    student_code = StudentCode(job.code_file)
+                    student_code.inject_namespace(karel)
+                    student_code.main()
+                    expected = KarelProgram(world=load_world(f"{job.world}_end").fork())
+                    passed = karel.compare_with(expected)
+            except JobTimeout:
+                print(f"Timed out after {timeout:g} seconds.")
+            # Student code can raise anything, including SystemExit from
+            # sys.exit(); one bad submission must not take down the worker
+            # process that is grading it.
+            except (Exception, SystemExit) as e:  # noqa: BLE001
+                print(f"{type(e).__name__}: {e}")
+    return GradeResult(job, passed, output.getvalue(), perf_counter() - start)
+
+
+def grade_cohort(
+    submissions_dir: Path,
+    problems: Iterable[str] = PROBLEMS,
+    worlds: Mapping[str, Sequence[str]] | None = None,
+    max_workers: int | None = None,
+    timeout: float = JOB_TIMEOUT,
+    *,
+    repeat_limit: int | None = REPEAT_LIMIT,
+) -> Iterator[GradeResult]:
+    """
+    Grades every submission in parallel, yielding results as they finish.
+    max_workers defaults to the number of processors on the machine, and each
+    job fails once it has run for timeout seconds, or once Karel has been in the
+    same state repeat_limit times without changing the world.
+    """
+    jobs = find_jobs(submissions_dir, problems, worlds)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(grade_job, job, timeout, repeat_limit) for job in jobs
+        ]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,99 @@
+"""
+This file defines a headless runner for Karel programs. Student code is executed
+directly against a KarelProgram, without sleeping, redrawing, or importing tkinter,
+so programs can be run and graded on machines that have no display.
+"""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .karel_program import KarelException, KarelProgram
+from .karel_world import INFINITY
+from .student_code import StudentCode, find_student_world
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+ACTIONS = ("move", "turn_left", "put_beeper", "pick_beeper", "paint_corner")
+
+
+class HeadlessResult(NamedTuple):
+    karel: KarelProgram
+    action_counts: dict[str, int]
+    elapsed: float
+    error: KarelException | NameError | None = None
+
+    @property
+    def total_actions(self) -> int:
+        return sum(self.action_counts.values())
+
+    def summary(self) -> str:
+        """Returns the final state of the run as a printable report."""
+        karel = self.karel
+        bag = "infinite" if karel.num_beepers == INFINITY else karel.num_beepers
+        lines = [
+            str(karel),
+            (
+                f"Karel ended on avenue {karel.avenue} and street {karel.street}, "
+                f"facing {karel.direction.value.capitalize()}, "
+                f"with {bag} beepers in its bag."
+            ),
+            "Actions: "
+            + ", ".join(f"{name}={count}" for name, count in self.action_counts.items())
+            + f" (total={self.total_actions})",
+            f"Wall time: {self.elapsed:.6f}s",
+        ]
+        if self.error is not None:
+            lines.append(f"Program crashed: {type(self.error).__name__}")
+        return "\n".join(lines)
+
+
+def count_action(
+    karel_fn: Callable[..., Any], name: str, action_counts: dict[str, int]
+) -> Callable[..., Any]:
+    def wrapper(*args: Any) -> Any:
+        result = karel_fn(*args)
+        action_counts[name] += 1
+        return result
+
+    return wrapper
+
+
+def run_headless(
+    code_file: Path,
+    world_file: str = "",
+    record_trace: bool = False,
+    max_steps: int | None = None,
+    repeat_limit: int | None = None,
+) -> HeadlessResult:
+    """
+    Loads the student's code, runs its main() function against a new KarelProgram,
+    and returns the final Karel state along with action counts and wall time.
+    Karel crashes and NameErrors are reported in the result instead of raised.
+    If record_trace is set, the actions performed are recorded in karel.trace.
+    max_steps and repeat_limit are passed to KarelProgram to stop infinite loops.
+    """
+    karel = KarelProgram(
+        find_student_world(code_file, world_file), max_steps, repeat_limit
+    )
+    if record_trace:
+        karel.start_trace()
+    student_code = StudentCode(code_file)
+    student_code.inject_namespace(karel)
+
+    action_counts = dict.fromkeys(ACTIONS, 0)
+    for mod in student_code.mods:
+        for name in ACTIONS:
+            setattr(mod, name, count_action(getattr(karel, name), name, action_counts))
+
+    error: KarelException | NameError | None = None
+    start = perf_counter()
+    try:
+        student_code.main()
+    except (KarelException, NameError) as e:
+        error = e
+    elapsed = perf_counter() - start
+    return HeadlessResult(karel, action_counts, elapsed, error)
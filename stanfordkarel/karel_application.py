@@ -12,165 +12,60 @@ Date of Creation: 10/1/2019
 from __future__ import annotations
 
 import contextlib
-import importlib.util
-import inspect
+import queue
+import threading
 import tkinter as tk
-import traceback as tb
 from pathlib import Path
-from time import sleep
+from time import perf_counter
 from tkinter.filedialog import askopenfilename
 from tkinter.messagebox import showwarning
-from types import FrameType, ModuleType
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, NamedTuple
 
-from .didyoumean import add_did_you_mean
 from .karel_canvas import DEFAULT_ICON, LIGHT_GREY, PAD_X, PAD_Y, KarelCanvas
 from .karel_program import KarelException, KarelProgram
+from .karel_trace import PAINT_CORNER, PICK_BEEPER, PUT_BEEPER, TracePlayer
+from .student_code import CONDITIONS, StudentCode
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
+    from .karel_trace import ActionTrace
 
-class StudentModule(ModuleType):
-    move: Any
-    turn_left: Any
-    put_beeper: Any
-    pick_beeper: Any
-    paint_corner: Any
+# Most frames drawn per second while a program or a replay runs
+FRAME_RATE = 60
+FRAME_INTERVAL = 1 / FRAME_RATE
+# Delay between replay frames, in milliseconds
+REPLAY_FRAME_MS = 1000 // FRAME_RATE
 
-    @staticmethod
-    def main() -> None:
-        raise NotImplementedError
 
-
-class StudentCode:
+class ProgramCancelled(BaseException):
     """
-    This process extracts a module from an arbitary file that contains student code.
-    https://stackoverflow.com/questions/67631/how-to-import-a-module-given-the-full-path
+    Raised inside a running program when it is stopped. It is not an Exception,
+    so that it is not caught by the program itself.
     """
 
-    def __init__(self, code_file: Path) -> None:
-        if not code_file.is_file():
-            raise FileNotFoundError(f"{code_file} could not be found.")
-
-        self.module_name = code_file.stem
-        spec = importlib.util.spec_from_file_location(
-            self.module_name, code_file.resolve()
-        )
-        assert spec is not None
-        try:
-            module_loader = spec.loader
-            assert module_loader is not None
-            mod = cast("StudentModule", importlib.util.module_from_spec(spec))
-            self.mods: list[StudentModule] = [mod]
-            module_loader.exec_module(mod)
-            # Go through attributes to find imported modules
-            for name in dir(mod):
-                module = cast("StudentModule", getattr(mod, name))
-                if isinstance(module, ModuleType):
-                    assert module.__file__ is not None
-                    code_file_path = Path(module.__file__)
-                    # Only execute modules outside of this directory
-                    if code_file_path.parent != Path(__file__).resolve().parent:
-                        self.mods.append(module)
-                        spec = importlib.util.spec_from_file_location(
-                            name, code_file_path.resolve()
-                        )
-                        module_loader.exec_module(module)
-        except SyntaxError as e:
-            # Since we don't start the GUI until after we parse the student's code,
-            # SyntaxErrors behave normally. However, if the syntax error is somehow
-            # not caught at parse time, we should forward the error message to console.
-            print(e)
-            raise
-
-        # Do not proceed if the student has not defined a main function.
-        if not hasattr(self.mods[0], "main"):
-            raise RuntimeError(
-                "Couldn't find the main() function. Are you sure you have one?"
-            )
 
-    def __repr__(self) -> str:
-        return "\n".join([inspect.getsource(mod) for mod in self.mods])
+class ActionRequest(NamedTuple):
+    """An action the program's thread asks the GUI thread to run."""
 
-    def inject_namespace(self, karel: KarelProgram) -> None:
-        """
-        This function is responsible for doing some Python hackery
-        that associates the generic commands the student wrote in their
-        file with specific commands relating to the Karel object that exists
-        in the world.
-        """
-        functions_to_override = [
-            "move",
-            "turn_left",
-            "pick_beeper",
-            "put_beeper",
-            "facing_north",
-            "facing_south",
-            "facing_east",
-            "facing_west",
-            "not_facing_north",
-            "not_facing_south",
-            "not_facing_east",
-            "not_facing_west",
-            "front_is_clear",
-            "beepers_present",
-            "no_beepers_present",
-            "beepers_in_bag",
-            "no_beepers_in_bag",
-            "front_is_blocked",
-            "left_is_blocked",
-            "left_is_clear",
-            "right_is_blocked",
-            "right_is_clear",
-            "paint_corner",
-            "corner_color_is",
-        ]
-        for mod in self.mods:
-            for func in functions_to_override:
-                setattr(mod, func, getattr(karel, func))
-
-    def main(self) -> None:
-        try:
-            self.mods[0].main()
-        except Exception as e:
-            if isinstance(e, KarelException | NameError | RuntimeError):
-                self.print_error_traceback(e)
-            raise
-
-    def print_error_traceback(
-        self, e: KarelException | NameError | RuntimeError
-    ) -> None:
-        """Handle runtime errors while executing student code."""
-        display_frames: list[tuple[FrameType, int]] = []
-        # Walk through all the frames in stack trace at time of failure
-        for frame, lineno in tb.walk_tb(e.__traceback__):
-            frame_info = inspect.getframeinfo(frame)
-            # Get the name of the file corresponding to the current frame
-            # Only display frames generated within the student's code
-            if Path(frame_info.filename).name == f"{self.module_name}.py":
-                display_frames.append((frame, lineno))
-
-        display_frames_generator = (frame for frame in display_frames)
-        trace = tb.format_list(tb.StackSummary.extract(display_frames_generator))
-        clean_traceback = "".join(trace).strip()
-        add_did_you_mean(e)
-        print(
-            f"Traceback (most recent call last):\n{clean_traceback}\n"
-            f"{type(e).__name__}: {e}"
-        )
+    karel_fn: Callable[..., None]
+    args: tuple[str, ...]
+    # Where to record the corner changed by the action, if it changes one
+    changed: set[tuple[int, int]] | None
 
 
 class KarelApplication(tk.Frame):
     def __init__(
         self,
         karel: KarelProgram,
-        code_file: Path,
+        code_file: Path | None,
         master: tk.Tk,
         window_width: int = 800,
         window_height: int = 600,
         canvas_width: int = 600,
         canvas_height: int = 400,
+        *,
+        trace: ActionTrace | None = None,
     ) -> None:
         # set window background to contrast white Karel canvas
         master.configure(background=LIGHT_GREY)
@@ -193,17 +88,37 @@ class KarelApplication(tk.Frame):
         self.karel = karel
         self.world = karel.world
         self.code_file = code_file
-        self.load_student_code()
-        master.title(self.student_code.module_name)
-        if not self.student_code.mods:
-            master.destroy()
-            return
+        if code_file is not None:
+            self.load_student_code()
+            master.title(self.student_code.module_name)
+            if not self.student_code.mods:
+                master.destroy()
+                return
+        else:
+            master.title("Karel Replay")
         self.icon = DEFAULT_ICON
         self.window_width = window_width
         self.window_height = window_height
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
         self.master = master
+        # Corners changed since the last frame was drawn
+        self.changed_beepers: set[tuple[int, int]] = set()
+        self.changed_corners: set[tuple[int, int]] = set()
+        # Seconds per action, and how many actions are due in the next frame
+        self.action_delay = 0.0
+        self.action_budget = 0.0
+        self.last_tick = 0.0
+        self.last_frame = 0.0
+        # The running program's thread sends actions to the GUI thread, which
+        # runs them at the speed set by the slider and sends back their errors
+        self.action_requests: queue.Queue[ActionRequest | None] = queue.Queue()
+        self.action_results: queue.Queue[BaseException | None] = queue.Queue()
+        self.program_error: BaseException | None = None
+        self.program_running = self.program_paused = self.program_cancelled = False
+        # Whether the program runs to the end without drawing its actions
+        self.program_turbo = False
+        self.steps_requested = 0
         self.set_dock_icon()
         self.grid(row=0, column=0)
         self.create_menubar()
@@ -211,8 +126,11 @@ class KarelApplication(tk.Frame):
         self.create_buttons()
         self.create_slider()
         self.create_status_label()
+        if trace is not None:
+            self.create_replay_controls(trace)
 
     def load_student_code(self) -> None:
+        assert self.code_file is not None
         self.student_code = StudentCode(self.code_file)
         self.student_code.inject_namespace(self.karel)
         self.inject_decorator_namespace()
@@ -277,7 +195,12 @@ class KarelApplication(tk.Frame):
             karel=self.karel,
         )
         self.canvas.grid(column=1, row=0, sticky="NESW")
-        self.canvas.bind("<Configure>", lambda _: self.canvas.redraw_all())
+        self.canvas.bind("<Configure>", lambda _: self.redraw_canvas())
+
+    def redraw_canvas(self) -> None:
+        # While jumping to the end, the world is being changed by the program
+        if not self.program_turbo:
+            self.canvas.redraw_all()
 
     def set_icon(self, icon: str) -> None:
         self.canvas.icon = icon
@@ -305,6 +228,32 @@ class KarelApplication(tk.Frame):
             column=0, row=2, padx=PAD_X, pady=PAD_Y, sticky="ew"
         )
 
+        self.jump_button = tk.Button(
+            self, highlightthickness=0, text="Jump to End", command=self.jump_to_end
+        )
+        self.jump_button.grid(column=0, row=1, padx=PAD_X, sticky="ew")
+
+        # Shown instead of the jump button while a program runs
+        self.run_controls = tk.Frame(self, bg=LIGHT_GREY)
+        self.step_button = tk.Button(
+            self.run_controls, highlightthickness=0, text="Step", command=self.step
+        )
+        self.step_button.pack(side="left", expand=True, fill="x")
+        self.stop_button = tk.Button(
+            self.run_controls,
+            highlightthickness=0,
+            text="Stop",
+            command=self.stop_program,
+        )
+        self.stop_button.pack(side="left", expand=True, fill="x")
+        self.end_button = tk.Button(
+            self.run_controls,
+            highlightthickness=0,
+            text="End",
+            command=self.jump_to_end,
+        )
+        self.end_button.pack(side="left", expand=True, fill="x")
+
     def create_status_label(self) -> None:
         """This function creates the status label at the bottom of the window."""
         self.status_label = tk.Label(
@@ -316,12 +265,8 @@ class KarelApplication(tk.Frame):
         self, karel_fn: Callable[..., None]
     ) -> Callable[..., None]:
         def wrapper() -> None:
-            # execute Karel function
-            karel_fn()
-            # redraw canvas with updated state of the world
-            self.canvas.redraw_karel()
-            # delay by specified amount
-            sleep(1 - self.speed.get() / 100)
+            # have the GUI thread execute the Karel function
+            self.request_action(ActionRequest(karel_fn, (), None))
 
         return wrapper
 
@@ -329,13 +274,8 @@ class KarelApplication(tk.Frame):
         self, karel_fn: Callable[..., None]
     ) -> Callable[..., None]:
         def wrapper() -> None:
-            # execute Karel function
-            karel_fn()
-            # redraw canvas with updated state of the world
-            self.canvas.redraw_beepers()
-            self.canvas.redraw_karel()
-            # delay by specified amount
-            sleep(1 - self.speed.get() / 100)
+            # the beepers on the corner Karel is on are redrawn in the next frame
+            self.request_action(ActionRequest(karel_fn, (), self.changed_beepers))
 
         return wrapper
 
@@ -343,17 +283,139 @@ class KarelApplication(tk.Frame):
         self, karel_fn: Callable[..., None]
     ) -> Callable[..., None]:
         def wrapper(color: str) -> None:
-            # execute Karel function
-            karel_fn(color)
-            # redraw canvas with updated state of the world
-            self.canvas.redraw_corners()
-            self.canvas.redraw_beepers()
-            self.canvas.redraw_karel()
-            # delay by specified amount
-            sleep(1 - self.speed.get() / 100)
+            # the corner Karel painted is redrawn in the next frame
+            self.request_action(ActionRequest(karel_fn, (color,), self.changed_corners))
+
+        return wrapper
+
+    def condition_decorator(self, karel_fn: Callable[..., bool]) -> Callable[..., bool]:
+        def wrapper(*args: str) -> bool:
+            # conditions run on the program's thread, so a loop that only checks
+            # conditions never reaches an action that would stop it
+            if self.program_cancelled:
+                raise ProgramCancelled
+            return karel_fn(*args)
 
         return wrapper
 
+    def request_action(self, request: ActionRequest) -> None:
+        """
+        Called on the program's thread to wait until the GUI thread has run an
+        action, and raises any error the action raised.
+        """
+        if self.program_turbo:
+            # Nothing is drawn until the program ends, so the action runs here
+            if self.program_cancelled:
+                raise ProgramCancelled
+            request.karel_fn(*request.args)
+            return
+        self.action_requests.put(request)
+        error = self.action_results.get()
+        if error is not None:
+            raise error
+
+    def run_student_code(self) -> None:
+        """Runs the student's program. Called on the program's own thread."""
+        self.program_error = None
+        try:
+            self.student_code.main()
+        except ProgramCancelled:
+            pass
+        except BaseException as e:  # noqa: BLE001
+            self.program_error = e
+        # Tells the GUI thread that the program has finished
+        self.action_requests.put(None)
+
+    def read_action_delay(self) -> None:
+        # The speed slider spans 1 action per second to as fast as possible
+        self.action_delay = 1 - self.speed.get() / 100
+
+    def program_tick(self) -> None:
+        """
+        Runs the actions due at the speed set by the slider until the next frame
+        is due, then draws it. Waiting for the program's next action never takes
+        longer than a frame, so the window stays responsive however long the
+        program runs.
+        """
+        now = perf_counter()
+        if self.action_delay > 0:
+            # Time the window was busy for is not made up for with a burst of
+            # actions afterwards
+            self.action_budget = min(
+                self.action_budget + (now - self.last_tick) / self.action_delay,
+                max(1.0, FRAME_INTERVAL / self.action_delay),
+            )
+        self.last_tick = now
+
+        frame_due = self.last_frame + FRAME_INTERVAL
+        finished = False
+        while not finished and self.action_is_due():
+            try:
+                request = self.action_requests.get(
+                    timeout=max(0.0, frame_due - perf_counter())
+                )
+            except queue.Empty:
+                break
+            if request is None:
+                finished = True
+            elif self.program_cancelled:
+                self.action_results.put(ProgramCancelled())
+            else:
+                self.run_action(request)
+
+        now = perf_counter()
+        if finished or now >= frame_due:
+            if not self.program_turbo:
+                self.draw_frame()
+            self.last_frame = now
+            frame_due = now + FRAME_INTERVAL
+        if finished:
+            self.finish_program()
+        elif self.action_is_due():
+            # Keep running actions as soon as pending events have been handled
+            self.after(1, self.program_tick)
+        else:
+            # Otherwise only wait out the rest of the frame
+            self.after(max(1, round((frame_due - now) * 1000)), self.program_tick)
+
+    def action_is_due(self) -> bool:
+        if self.program_cancelled or self.program_turbo:
+            # Every action is answered right away, to stop the program sooner or
+            # to start running the rest of it on its own thread
+            return True
+        if self.program_paused:
+            return self.steps_requested > 0
+        return self.action_delay <= 0 or self.action_budget >= 1
+
+    def run_action(self, request: ActionRequest) -> None:
+        karel_fn, args, changed = request
+        try:
+            karel_fn(*args)
+        except Exception as e:  # noqa: BLE001
+            # Raised on the program's thread, as if the action had run there
+            self.action_results.put(e)
+        else:
+            self.action_results.put(None)
+        if changed is not None:
+            changed.add((self.karel.avenue, self.karel.street))
+        if self.program_paused:
+            self.steps_requested -= 1
+        else:
+            self.action_budget -= 1
+
+    def draw_frame(self) -> None:
+        for avenue, street in self.changed_corners:
+            self.canvas.redraw_corner(avenue, street, update=False)
+        for avenue, street in self.changed_beepers:
+            self.canvas.redraw_beeper(avenue, street, update=False)
+        self.changed_corners.clear()
+        self.changed_beepers.clear()
+        # Drawn when the callback returns to mainloop: updating here would handle
+        # events, such as a resize redrawing the world, in the middle of a frame
+        self.canvas.redraw_karel(update=False)
+        # The slider is read once per frame, after the frame handled its events
+        self.read_action_delay()
+
     def inject_decorator_namespace(self) -> None:
         """
         This function is responsible for doing some Python hackery
@@ -367,6 +429,9 @@ class KarelApplication(tk.Frame):
             mod.pick_beeper = self.beeper_action_decorator(self.karel.pick_beeper)
             mod.put_beeper = self.beeper_action_decorator(self.karel.put_beeper)
             mod.paint_corner = self.corner_action_decorator(self.karel.paint_corner)
+            for condition in CONDITIONS:
+                karel_fn = getattr(self.karel, condition)
+                setattr(mod, condition, self.condition_decorator(karel_fn))
 
     def disable_buttons(self) -> None:
         self.program_control_button.configure(state="disabled")
@@ -376,18 +441,86 @@ class KarelApplication(tk.Frame):
         self.program_control_button.configure(state="normal")
         self.load_world_button.configure(state="normal")
 
-    def run_program(self) -> None:
+    def run_program(self, turbo: bool = False) -> None:
         # Error checking for existence of main function completed in prior file
 
         # reimport code in case it changed
         self.load_student_code()
-        try:
+        self.status_label.configure(text="Running...", fg="brown")
+        self.load_world_button.configure(state="disabled")
+        self.program_control_button["text"] = "Pause"
+        self.program_control_button["command"] = self.toggle_pause
+        self.jump_button.grid_remove()
+        self.run_controls.grid(column=0, row=1, padx=PAD_X, sticky="ew")
+
+        self.program_running = True
+        self.program_paused = self.program_cancelled = self.program_turbo = False
+        self.steps_requested = 0
+        self.action_budget = 0.0
+        self.last_tick = self.last_frame = perf_counter()
+        self.read_action_delay()
+        if turbo:
+            self.jump_to_end()
+        threading.Thread(target=self.run_student_code, daemon=True).start()
+        self.after(REPLAY_FRAME_MS, self.program_tick)
+
+    def toggle_pause(self) -> None:
+        self.program_paused = not self.program_paused
+        self.steps_requested = 0
+        if self.program_paused:
+            self.program_control_button["text"] = "Resume"
+            self.status_label.configure(text="Paused.", fg="brown")
+        else:
+            self.program_control_button["text"] = "Pause"
             self.status_label.configure(text="Running...", fg="brown")
-            self.disable_buttons()
-            self.student_code.main()
-            self.status_label.configure(text="Finished running.", fg="green")
 
-        except (KarelException, NameError):
+    def step(self) -> None:
+        """Pauses the running program, then lets it run one more action."""
+        if not self.program_paused:
+            self.toggle_pause()
+        self.steps_requested += 1
+
+    def jump_to_end(self) -> None:
+        """
+        Runs the program, or the rest of it, without drawing its actions, and only
+        draws the world once the program has ended.
+        """
+        if not self.program_running:
+            self.run_program(turbo=True)
+            return
+        self.program_turbo = True
+        self.program_paused = False
+        self.program_control_button.configure(state="disabled")
+        self.step_button.configure(state="disabled")
+        self.end_button.configure(state="disabled")
+        self.status_label.configure(text="Jumping to the end...", fg="brown")
+
+    def stop_program(self) -> None:
+        self.program_cancelled = True
+        self.status_label.configure(text="Stopping...", fg="brown")
+
+    def finish_program(self) -> None:
+        self.program_running = False
+        error = self.program_error
+        if self.program_turbo:
+            self.program_turbo = False
+            self.canvas.redraw_all()
+        if isinstance(error, KarelException):
+            self.canvas.show_crash(error.avenue, error.street)
+        self.run_controls.grid_remove()
+        for button in (self.step_button, self.end_button):
+            button.configure(state="normal")
+        # Update program control button to force user
+        # to reset world before running program again
+        self.program_control_button["text"] = "Reset World"
+        self.program_control_button["command"] = self.reset_world
+        self.enable_buttons()
+
+        if self.program_cancelled:
+            self.status_label.configure(text="Stopped running.", fg="black")
+        elif error is None:
+            self.status_label.configure(text="Finished running.", fg="green")
+        elif isinstance(error, KarelException | NameError):
             # Generate popup window to let the user know their program crashed
             self.status_label.configure(
                 text="Program crashed, check console for details.", fg="red"
@@ -396,23 +529,27 @@ class KarelApplication(tk.Frame):
             showwarning(
                 "Karel Error", "Karel Crashed!\nCheck the terminal for more details."
             )
-
-        finally:
-            # Update program control button to force user
-            # to reset world before running program again
-            self.program_control_button["text"] = "Reset World"
-            self.program_control_button["command"] = self.reset_world
-            self.enable_buttons()
+        else:
+            self.status_label.configure(
+                text="Program crashed, check console for details.", fg="red"
+            )
+            # Reported like any other error in a Tk callback
+            raise error
 
     def reset_world(self) -> None:
         self.karel.reset_state()
         self.world.reset_world()
+        self.canvas.crash_location = None
         self.canvas.redraw_all()
         self.status_label.configure(text="Reset to initial state.", fg="black")
         # Once world has been reset, program control button resets to "run" mode
+        self.show_run_buttons()
+        self.update()
+
+    def show_run_buttons(self) -> None:
         self.program_control_button["text"] = "Run Program"
         self.program_control_button["command"] = self.run_program
-        self.update()
+        self.jump_button.grid()
 
     def load_world(self) -> None:
         default_worlds_path = Path(__file__).absolute().parent / "worlds"
@@ -427,6 +564,8 @@ class KarelApplication(tk.Frame):
             return
         self.world.reload_world(filename=filename)
         self.karel.reset_state()
+        self.canvas.crash_location = None
+        self.canvas.reset_view()
         self.canvas.redraw_all()
         # Reset speed slider
         self.scale.set(self.world.init_speed)
@@ -435,5 +574,131 @@ class KarelApplication(tk.Frame):
         )
 
         # Make sure program control button is set to 'run' mode
-        self.program_control_button["text"] = "Run Program"
-        self.program_control_button["command"] = self.run_program
+        self.show_run_buttons()
+
+    def create_replay_controls(self, trace: ActionTrace) -> None:
+        """
+        This method switches the application into replay mode. The program
+        control button plays and pauses the recorded trace, the speed slider sets
+        how many actions are replayed per second, and the seek slider jumps
+        directly to any action in the trace.
+        """
+        self.replay_player = TracePlayer(self.karel, trace)
+        self.replay_running = False
+        self.replay_budget = 0.0
+        self.replay_last_tick = 0.0
+
+        self.seek_var = tk.IntVar()
+        self.seek_scale = tk.Scale(
+            self,
+            orient=tk.HORIZONTAL,
+            from_=0,
+            to=self.replay_player.length,
+            variable=self.seek_var,
+            label="Action",
+            bg=LIGHT_GREY,
+            highlightthickness=0,
+            command=lambda _: self.seek_replay(self.seek_var.get()),
+        )
+        self.seek_scale.grid(row=4, column=0, padx=PAD_X, pady=PAD_Y, sticky="ew")
+
+        self.program_control_button["text"] = "Play Replay"
+        self.program_control_button["command"] = self.toggle_replay
+        self.jump_button.grid_remove()
+        # The trace only makes sense in the world it was recorded in
+        self.load_world_button.configure(state="disabled")
+        self.status_label.configure(
+            text=f"Loaded a trace of {self.replay_player.length} actions.", fg="black"
+        )
+
+    def replay_actions_per_second(self) -> float:
+        # The speed slider spans 1 to 10,000 actions per second
+        return float(10 ** (self.speed.get() / 25))
+
+    def toggle_replay(self) -> None:
+        if self.replay_running:
+            self.replay_running = False
+            self.program_control_button["text"] = "Play Replay"
+            return
+
+        if self.replay_player.position == self.replay_player.length:
+            self.seek_replay(0)
+        self.replay_running = True
+        self.replay_budget = 0.0
+        self.replay_last_tick = perf_counter()
+        self.program_control_button["text"] = "Pause Replay"
+        self.after(REPLAY_FRAME_MS, self.replay_tick)
+
+    def replay_tick(self) -> None:
+        if not self.replay_running:
+            return
+
+        now = perf_counter()
+        self.replay_budget += (now - self.replay_last_tick) * (
+            self.replay_actions_per_second()
+        )
+        self.replay_last_tick = now
+
+        # Apply every action due since the last frame, then redraw once
+        finished = False
+        error: KarelException | None = None
+        try:
+            while self.replay_budget >= 1:
+                action = self.replay_player.step()
+                if action is None:
+                    finished = True
+                    break
+                self.replay_budget -= 1
+                if action in {PUT_BEEPER, PICK_BEEPER}:
+                    self.changed_beepers.add((self.karel.avenue, self.karel.street))
+                elif action == PAINT_CORNER:
+                    self.changed_corners.add((self.karel.avenue, self.karel.street))
+        except KarelException as e:
+            error = e
+
+        self.draw_frame()
+        self.update_replay_status()
+
+        if error is not None:
+            self.show_replay_error(error)
+        elif finished:
+            self.replay_running = False
+            self.program_control_button["text"] = "Play Replay"
+            self.status_label.configure(text="Finished replay.", fg="green")
+        else:
+            self.after(REPLAY_FRAME_MS, self.replay_tick)
+
+    def seek_replay(self, position: int) -> None:
+        # Ignore the callback caused by the replay itself moving the seek slider
+        if position == self.replay_player.position:
+            return
+        try:
+            self.replay_player.seek(position)
+        except KarelException as e:
+            self.canvas.redraw_all()
+            self.update_replay_status()
+            self.show_replay_error(e)
+            return
+        self.canvas.redraw_all()
+        self.update_replay_status()
+
+    def show_replay_error(self, error: KarelException) -> None:
+        """
+        Stops the replay at an action Karel could not perform, which happens when
+        the trace is replayed in a different world from the one it was recorded in.
+        """
+        self.replay_running = False
+        self.program_control_button["text"] = "Play Replay"
+        self.canvas.show_crash(error.avenue, error.street)
+        self.status_label.configure(
+            text=f"Replay stopped at action {self.replay_player.position + 1}: "
+            f"{error.message} Was the trace recorded in this world?",
+            fg="red",
+        )
+
+    def update_replay_status(self) -> None:
+        position, length = self.replay_player.position, self.replay_player.length
+        self.seek_var.set(position)
+        self.status_label.configure(
+            text=f"Replaying action {position} of {length}.", fg="brown"
+        )
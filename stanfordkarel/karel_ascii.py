@@ -21,6 +21,7 @@ CHAR_WIDTH = 5
 HORIZONTAL, VERTICAL = "─", "│"
 SPACING = 10
 BEEPER_COORDS = dict[tuple[int, int], int]
+COLOR_COORDS = dict[tuple[int, int], str]
 
 
 class Tile:
@@ -203,6 +204,13 @@ def compare_output(first: Any, second: Any) -> str:
                 extra_b[k] = b[k] - a[k]
         return extra_a, extra_b
 
+    def color_difference(
+        a: COLOR_COORDS, b: COLOR_COORDS
+    ) -> tuple[COLOR_COORDS, COLOR_COORDS]:
+        extra_a = {k: v for k, v in a.items() if b.get(k) != v}
+        extra_b = {k: v for k, v in b.items() if a.get(k) != v}
+        return extra_a, extra_b
+
     this, that = str(first).split("\n"), str(second).split("\n")
     world_width = len(this[0])
 
@@ -244,14 +252,14 @@ def compare_output(first: Any, second: Any) -> str:
         )
 
     if first.world.get_colors() != second.world.get_colors():
-        extra_a, extra_b = symmetric_difference(
+        extra_colors_a, extra_colors_b = color_difference(
             first.world.get_colors(), second.world.get_colors()
         )
         result += (
             "Colors do not match: "
             "(Only colors that appear in one world but not the other are listed)\n"
-            f"Student: {extra_a}\n"
-            f"Expected: {extra_b}\n\n"
+            f"Student: {extra_colors_a}\n"
+            f"Expected: {extra_colors_b}\n\n"
         )
 
     return result
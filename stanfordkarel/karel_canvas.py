@@ -18,11 +18,13 @@ from __future__ import annotations
 import cmath
 import math
 import tkinter as tk
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, NamedTuple
 
-from .karel_world import Direction, KarelWorld, Wall
+from .karel_world import DIRECTION_BITS, Direction, KarelWorld, Wall
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from .karel_program import KarelProgram
 
 DIRECTION_TO_RADIANS = {
@@ -44,6 +46,21 @@ LABEL_OFFSET = 7
 CORNER_SIZE = 2
 BEEPER_CELL_SIZE_FRAC = 0.4
 LINE_WIDTH = 2
+# Worlds whose cells would be smaller than this scroll instead of fitting the window
+MIN_CELL_SIZE = 8
+MAX_CELL_SIZE = 120
+ZOOM_STEP = 1.25
+# Cells scrolled by each turn of the mouse wheel
+SCROLL_CELLS = 3
+SHIFT_MASK = 0x1
+CONTROL_MASK = 0x4
+# Below these cell sizes, details too small to see are left out: corners are
+# only drawn when painted, beepers fill their corner and Karel is a triangle
+CORNER_MARKER_MIN_CELL_SIZE = 12
+DETAILED_BEEPER_MIN_CELL_SIZE = 16
+DETAILED_KAREL_MIN_CELL_SIZE = 16
+# Minimum distance between axis labels, in pixels
+LABEL_SPACING = 20
 # Drawing Constants for Karel Robot Icon (defined relative to a single cell)
 KAREL_VERTICAL_OFFSET = 0.05
 KAREL_LEFT_HORIZONTAL_PAD = 0.29
@@ -66,6 +83,15 @@ KAREL_LINE_WIDTH = 2
 # Drawing Constants for Simple Karel Icon (defined relative to a single cell)
 SIMPLE_KAREL_HEIGHT = 0.7
 SIMPLE_KAREL_WIDTH = 0.8
+# Drawing Constant for the Karel triangle drawn in small cells
+TRIANGLE_KAREL_SIZE = 0.8
+
+
+class KarelPolygon(NamedTuple):
+    # Points relative to the center of Karel's corner
+    points: list[float]
+    fill: str = "black"
+    outline: str = "black"
 
 
 class KarelCanvas(tk.Canvas):
@@ -82,8 +108,38 @@ class KarelCanvas(tk.Canvas):
         self.world = world
         self.karel = karel
         self.icon = DEFAULT_ICON
+        self.background = bg
+        self.cell_size = 0.0
+        # Cell size chosen by zooming, or None to fit the world to the window
+        self.zoom_cell_size: float | None = None
+        # Avenue and street shown in the middle of the window, or None for Karel's
+        self.view_center: tuple[float, float] | None = None
+        self.visible_avenues = range(0)
+        self.visible_streets = range(0)
+        self.drag_start = (0, 0)
+        # Corner outlined to show where Karel crashed, if it did
+        self.crash_location: tuple[int, int] | None = None
+        # Canvas items drawn on each corner, so that a single corner can be redrawn
+        self.corner_items: dict[tuple[int, int], list[int]] = {}
+        self.beeper_items: dict[tuple[int, int], list[int]] = {}
+        self.wall_items: dict[tuple[int, int], list[int]] = {}
+        # Hidden item just above each layer, which items redrawn later go below
+        self.layer_tops: dict[str, int] = {}
+        # Karel's polygons by icon, direction and cell size
+        self.karel_shapes: dict[tuple[str, Direction, float], list[KarelPolygon]] = {}
+        # Karel's canvas items, and the shape and center they were drawn with
+        self.karel_items: list[int] = []
+        self.karel_drawn: tuple[tuple[str, Direction, float], float, float] | None = (
+            None
+        )
         self.draw_world()
         self.draw_karel()
+        for button in ("<ButtonPress-2>", "<ButtonPress-3>"):
+            self.bind(button, self.start_drag)
+        for motion in ("<B2-Motion>", "<B3-Motion>"):
+            self.bind(motion, self.drag)
+        for wheel in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind(wheel, self.scroll_wheel)
 
     @staticmethod
     def rotate_points(
@@ -105,19 +161,28 @@ class KarelCanvas(tk.Canvas):
         fill: str = "black",
         outline: str = "black",
         tags: str = "karel",
-    ) -> None:
-        super().create_polygon(
+    ) -> int:
+        return super().create_polygon(
             *points, fill=fill, outline=outline, width=KAREL_LINE_WIDTH, tags=tags
         )
 
+    def end_layer(self, layer: str) -> None:
+        """Marks the top of a layer that has just been drawn."""
+        self.layer_tops[layer] = self.create_line(0, 0, 0, 0, state="hidden")
+
+    def lower_into_layer(self, tag_or_id: str | int, layer: str) -> None:
+        """Moves items drawn after their layer back down into it."""
+        self.tag_lower(tag_or_id, self.layer_tops[layer])
+
     def redraw_all(self) -> None:
         self.delete("all")
+        self.karel_items = []
+        self.karel_drawn = None
         self.draw_world()
         self.draw_karel()
         self.update()
 
     def redraw_karel(self, update: bool = True) -> None:
-        self.delete("karel")
         self.draw_karel()
         if update:
             self.update()
@@ -125,52 +190,287 @@ class KarelCanvas(tk.Canvas):
     def redraw_beepers(self, update: bool = True) -> None:
         self.delete("beeper")
         self.draw_all_beepers()
+        self.lower_into_layer("beeper", "beeper")
         if update:
             self.update()
 
     def redraw_corners(self, update: bool = True) -> None:
         self.delete("corner")
         self.draw_corners()
+        self.lower_into_layer("corner", "corner")
         if update:
             self.update()
 
     def redraw_walls(self, update: bool = True) -> None:
         self.delete("wall")
         self.draw_all_walls()
+        self.lower_into_layer("wall", "wall")
+        if update:
+            self.update()
+
+    def redraw_beeper(self, avenue: int, street: int, update: bool = True) -> None:
+        """Redraws only the beepers on one corner, e.g. after Karel puts a beeper."""
+        location = (avenue, street)
+        self.delete(*self.beeper_items.pop(location, ()))
+        if self.is_visible(avenue, street):
+            self.draw_beeper(location, self.world.beepers.get(location, 0))
+            for item in self.beeper_items.get(location, ()):
+                self.lower_into_layer(item, "beeper")
         if update:
             self.update()
 
+    def redraw_corner(self, avenue: int, street: int, update: bool = True) -> None:
+        """Redraws only the marker or color of one corner, e.g. after painting it."""
+        if not self.show_corner_markers() and self.is_visible(avenue, street):
+            # Painted corners are merged with their neighbors, so redraw the street
+            self.delete(
+                *{
+                    item
+                    for other in self.visible_avenues
+                    for item in self.corner_items.pop((other, street), ())
+                }
+            )
+            self.draw_painted_spans(street)
+            self.lower_into_layer("corner", "corner")
+            if update:
+                self.update()
+            return
+
+        self.delete(*self.corner_items.pop((avenue, street), ()))
+        if self.is_visible(avenue, street):
+            self.draw_corner(avenue, street)
+            for item in self.corner_items[avenue, street]:
+                self.lower_into_layer(item, "corner")
+        if update:
+            self.update()
+
+    def redraw_cell(self, avenue: int, street: int, update: bool = True) -> None:
+        self.redraw_corner(avenue, street, update=False)
+        self.redraw_beeper(avenue, street, update=update)
+
+    def reset_view(self) -> None:
+        """Fits the next world drawn to the window again, e.g. after loading it."""
+        self.zoom_cell_size = None
+        self.view_center = None
+
     def draw_world(self) -> None:
         self.init_geometry_values()
         self.draw_bounding_rectangle()
-        self.label_axes()
         self.draw_corners()
+        self.end_layer("corner")
         self.draw_all_beepers()
+        self.end_layer("beeper")
         self.draw_all_walls()
+        self.end_layer("wall")
+        self.draw_crash()
+        self.label_axes()
+        self.end_layer("label")
 
     def init_geometry_values(self) -> None:
         self.update()
+        self.view_width = self.winfo_width()
+        self.view_height = self.winfo_height()
 
         # Calculate the maximum possible cell size in both directions
-        # We will use the smaller of the two as the bounding cell size
+        # We will use the smaller of the two as the cell size that fits the world
         horizontal_cell_size = (
-            self.winfo_width() - 2 * BORDER_OFFSET
+            self.view_width - 2 * BORDER_OFFSET
         ) / self.world.num_avenues
         vertical_cell_size = (
-            self.winfo_height() - 2 * BORDER_OFFSET
+            self.view_height - 2 * BORDER_OFFSET
         ) / self.world.num_streets
+        self.fit_cell_size = min(horizontal_cell_size, vertical_cell_size)
 
-        # Save this as an instance variable for later use
-        self.cell_size = min(horizontal_cell_size, vertical_cell_size)
+        # Save this as an instance variable for later use. Worlds too large to
+        # fit with readable cells are scrolled instead.
+        cell_size = self.zoom_cell_size or max(self.fit_cell_size, MIN_CELL_SIZE)
+        if cell_size != self.cell_size:
+            self.karel_shapes.clear()
+        self.cell_size = cell_size
 
         self.boundary_height = self.cell_size * self.world.num_streets
         self.boundary_width = self.cell_size * self.world.num_avenues
+        self.scrolling = (
+            self.boundary_width > self.view_width - 2 * BORDER_OFFSET
+            or self.boundary_height > self.view_height - 2 * BORDER_OFFSET
+        )
+
+        avenue, street = self.view_center or (self.karel.avenue, self.karel.street)
+        self.set_origin(
+            *self.clamp_origin(
+                self.view_width / 2 - (avenue - 0.5) * self.cell_size,
+                self.view_height / 2
+                - (self.world.num_streets - street + 0.5) * self.cell_size,
+            )
+        )
+
+    def clamp_origin(self, left_x: float, top_y: float) -> tuple[float, float]:
+        """
+        Centers the world along each side of the window it fits in, and otherwise
+        keeps it covering the window.
+        """
+        if self.boundary_width <= self.view_width - 2 * BORDER_OFFSET:
+            left_x = self.view_width / 2 - self.boundary_width / 2
+        else:
+            left_x = min(
+                BORDER_OFFSET,
+                max(self.view_width - BORDER_OFFSET - self.boundary_width, left_x),
+            )
+        if self.boundary_height <= self.view_height - 2 * BORDER_OFFSET:
+            top_y = self.view_height / 2 - self.boundary_height / 2
+        else:
+            top_y = min(
+                BORDER_OFFSET,
+                max(self.view_height - BORDER_OFFSET - self.boundary_height, top_y),
+            )
+        return left_x, top_y
 
+    def set_origin(self, left_x: float, top_y: float) -> None:
+        """Places the top left of the world and finds the corners now in view."""
         # Save all these as instance variables as well
-        self.left_x = self.winfo_width() / 2 - self.boundary_width / 2
-        self.top_y = self.winfo_height() / 2 - self.boundary_height / 2
+        self.left_x = left_x
+        self.top_y = top_y
         self.right_x = self.left_x + self.boundary_width
         self.bottom_y = self.top_y + self.boundary_height
+        self.view_center = (
+            (self.view_width / 2 - self.left_x) / self.cell_size + 0.5,
+            self.world.num_streets
+            + 0.5
+            - (self.view_height / 2 - self.top_y) / self.cell_size,
+        )
+
+        # Corners partly inside the border are drawn too
+        num_streets = self.world.num_streets
+        first_row = math.floor((BORDER_OFFSET - self.top_y) / self.cell_size)
+        last_row = math.floor(
+            (self.view_height - BORDER_OFFSET - self.top_y) / self.cell_size
+        )
+        self.visible_avenues = range(
+            max(1, math.floor((BORDER_OFFSET - self.left_x) / self.cell_size) + 1),
+            min(
+                self.world.num_avenues,
+                math.floor(
+                    (self.view_width - BORDER_OFFSET - self.left_x) / self.cell_size
+                )
+                + 1,
+            )
+            + 1,
+        )
+        self.visible_streets = range(
+            max(1, num_streets - last_row),
+            min(num_streets, num_streets - first_row) + 1,
+        )
+
+    def is_visible(self, avenue: int, street: int) -> bool:
+        return avenue in self.visible_avenues and street in self.visible_streets
+
+    def visible_corners(self) -> Iterator[tuple[int, int]]:
+        for avenue in self.visible_avenues:
+            for street in self.visible_streets:
+                yield avenue, street
+
+    def pan(self, dx: float, dy: float) -> None:
+        """
+        Scrolls the world by the given number of pixels. Everything already drawn
+        is moved, the items of corners scrolled out of view are deleted or reused,
+        and only the corners scrolled into view are drawn.
+        """
+        left_x, top_y = self.clamp_origin(self.left_x + dx, self.top_y + dy)
+        dx, dy = left_x - self.left_x, top_y - self.top_y
+        if not dx and not dy:
+            return
+
+        self.move("all", dx, dy)
+        if self.karel_drawn is not None:
+            key, karel_x, karel_y = self.karel_drawn
+            self.karel_drawn = (key, karel_x + dx, karel_y + dy)
+        old_corners = set(self.visible_corners())
+        self.set_origin(left_x, top_y)
+
+        stale: list[int] = []
+        # Corner markers are reused for the corners scrolled into view
+        spare_markers: list[list[int]] = []
+        show_corner_markers = self.show_corner_markers()
+        for location in old_corners.difference(self.visible_corners()):
+            items = self.corner_items.pop(location, [])
+            if len(items) == 2:
+                spare_markers.append(items)
+            elif show_corner_markers:
+                stale += items
+            stale += self.beeper_items.pop(location, ())
+            stale += self.wall_items.pop(location, ())
+        for location in self.visible_corners():
+            if location not in old_corners:
+                if show_corner_markers:
+                    self.draw_corner(*location, spare_markers)
+                self.draw_beeper(location, self.world.beepers.get(location, 0))
+                self.draw_corner_walls(*location)
+        for items in spare_markers:
+            stale += items
+        self.delete(*stale)
+        if not show_corner_markers:
+            # Only painted corners are drawn, merged along each street
+            self.delete("corner")
+            self.draw_corners()
+        for layer in ("corner", "beeper", "wall"):
+            self.lower_into_layer(layer, layer)
+
+        self.delete("label")
+        self.label_axes()
+        self.lower_into_layer("label", "label")
+
+    def zoom(self, factor: float, x: float, y: float) -> None:
+        """Zooms in or out, keeping the point at the given position in place."""
+        cell_size = min(
+            max(self.cell_size * factor, self.fit_cell_size),
+            max(MAX_CELL_SIZE, self.fit_cell_size),
+        )
+        if cell_size == self.cell_size:
+            return
+        avenue = (x - self.left_x) / self.cell_size + 0.5
+        street = self.world.num_streets + 0.5 - (y - self.top_y) / self.cell_size
+        self.view_center = (
+            avenue - (x - self.view_width / 2) / cell_size,
+            street + (y - self.view_height / 2) / cell_size,
+        )
+        self.zoom_cell_size = cell_size
+        self.redraw_all()
+
+    def follow_karel(self) -> None:
+        """Scrolls Karel back to the middle of the window once it nears the edge."""
+        if not self.scrolling:
+            return
+        corner_x = self.calculate_corner_x(self.karel.avenue)
+        corner_y = self.calculate_corner_y(self.karel.street)
+        margin = BORDER_OFFSET + self.cell_size
+        if not (
+            margin <= corner_x <= self.view_width - margin
+            and margin <= corner_y <= self.view_height - margin
+        ):
+            self.pan(self.view_width / 2 - corner_x, self.view_height / 2 - corner_y)
+
+    def start_drag(self, event: tk.Event[Any]) -> None:
+        self.drag_start = (event.x, event.y)
+
+    def drag(self, event: tk.Event[Any]) -> None:
+        start_x, start_y = self.drag_start
+        self.drag_start = (event.x, event.y)
+        self.pan(event.x - start_x, event.y - start_y)
+
+    def scroll_wheel(self, event: tk.Event[Any]) -> None:
+        """
+        Scrolls up and down with the mouse wheel, left and right while Shift is
+        held, and zooms around the pointer while Control is held.
+        """
+        # X11 reports the wheel as buttons 4 and 5, other platforms as a delta
+        steps = 1 if event.num == 4 or event.delta > 0 else -1
+        state = int(event.state)
+        if state & CONTROL_MASK:
+            self.zoom(ZOOM_STEP**steps, event.x, event.y)
+        elif state & SHIFT_MASK:
+            self.pan(steps * SCROLL_CELLS * self.cell_size, 0)
+        else:
+            self.pan(0, steps * SCROLL_CELLS * self.cell_size)
 
     def draw_bounding_rectangle(self) -> None:
         # Draw the external bounding lines of Karel's world
@@ -188,54 +488,157 @@ class KarelCanvas(tk.Canvas):
         )
 
     def label_axes(self) -> None:
+        if self.scrolling:
+            # Hide the corners drawn under the border, where the labels go
+            for x0, y0, x1, y1 in (
+                (0, 0, self.view_width, BORDER_OFFSET),
+                (
+                    0,
+                    self.view_height - BORDER_OFFSET,
+                    self.view_width,
+                    self.view_height,
+                ),
+                (0, 0, BORDER_OFFSET, self.view_height),
+                (self.view_width - BORDER_OFFSET, 0, self.view_width, self.view_height),
+            ):
+                self.create_rectangle(
+                    x0, y0, x1, y1, fill=self.background, outline="", tags="label"
+                )
+
+        # Small cells only have every few avenues and streets labeled
+        step = self.label_step()
+
         # Label the avenue axes
-        for avenue in range(1, self.world.num_avenues + 1):
+        label_y = min(self.bottom_y, self.view_height - BORDER_OFFSET) + LABEL_OFFSET
+        for avenue in self.visible_avenues:
+            if avenue % step:
+                continue
             label_x = self.calculate_corner_x(avenue)
-            label_y = self.bottom_y + LABEL_OFFSET
-            self.create_text(label_x, label_y, text=str(avenue), font="Arial 10")
+            self.create_text(
+                label_x, label_y, text=str(avenue), font="Arial 10", tags="label"
+            )
 
         # Label the street axes
-        for street in range(1, self.world.num_streets + 1):
-            label_x = self.left_x - LABEL_OFFSET
+        label_x = max(self.left_x, BORDER_OFFSET) - LABEL_OFFSET
+        for street in self.visible_streets:
+            if street % step:
+                continue
             label_y = self.calculate_corner_y(street)
-            self.create_text(label_x, label_y, text=str(street), font="Arial 10")
+            self.create_text(
+                label_x, label_y, text=str(street), font="Arial 10", tags="label"
+            )
+
+    def label_step(self) -> int:
+        """Returns the smallest of 1, 2, 5, 10, 20, 50... that spaces labels apart."""
+        step = 1
+        while True:
+            for multiple in (1, 2, 5):
+                if step * multiple * self.cell_size >= LABEL_SPACING:
+                    return step * multiple
+            step *= 10
+
+    def show_corner_markers(self) -> bool:
+        return self.cell_size >= CORNER_MARKER_MIN_CELL_SIZE
 
     def draw_corners(self) -> None:
-        # Draw all corner markers in the world
-        for avenue in range(1, self.world.num_avenues + 1):
-            for street in range(1, self.world.num_streets + 1):
-                color = self.world.corner_color(avenue, street)
-                corner_x = self.calculate_corner_x(avenue)
+        # Draw the markers of all corners in view
+        self.corner_items.clear()
+        if not self.show_corner_markers():
+            for street in self.visible_streets:
+                self.draw_painted_spans(street)
+            return
+        for avenue, street in self.visible_corners():
+            self.draw_corner(avenue, street)
+
+    def draw_painted_spans(self, street: int) -> None:
+        """
+        Draws each run of neighboring corners in view along a street that are
+        painted the same color as a single rectangle, and nothing for the rest.
+        """
+        avenues = self.visible_avenues
+        start = avenues.start
+        color: str | None = self.world.corner_color(start, street)
+        for avenue in range(start + 1, avenues.stop + 1):
+            next_color = (
+                self.world.corner_color(avenue, street)
+                if avenue < avenues.stop
+                else None
+            )
+            if next_color == color:
+                continue
+            items = []
+            if color:
                 corner_y = self.calculate_corner_y(street)
-                if not color:
-                    self.create_line(
-                        corner_x,
-                        corner_y - CORNER_SIZE,
-                        corner_x,
-                        corner_y + CORNER_SIZE,
-                        tags="corner",
-                    )
-                    self.create_line(
-                        corner_x - CORNER_SIZE,
-                        corner_y,
-                        corner_x + CORNER_SIZE,
-                        corner_y,
-                        tags="corner",
-                    )
-                else:
+                items.append(
                     self.create_rectangle(
-                        corner_x - self.cell_size / 2,
+                        self.calculate_corner_x(start) - self.cell_size / 2,
                         corner_y - self.cell_size / 2,
-                        corner_x + self.cell_size / 2,
+                        self.calculate_corner_x(avenue - 1) + self.cell_size / 2,
                         corner_y + self.cell_size / 2,
                         fill=color,
                         tags="corner",
                         outline="",
                     )
+                )
+            for span_avenue in range(start, avenue):
+                self.corner_items[span_avenue, street] = items
+            start, color = avenue, next_color
+
+    def draw_corner(
+        self, avenue: int, street: int, spare_markers: list[list[int]] | None = None
+    ) -> None:
+        color = self.world.corner_color(avenue, street)
+        corner_x = self.calculate_corner_x(avenue)
+        corner_y = self.calculate_corner_y(street)
+        if not color:
+            vertical = (
+                corner_x,
+                corner_y - CORNER_SIZE,
+                corner_x,
+                corner_y + CORNER_SIZE,
+            )
+            horizontal = (
+                corner_x - CORNER_SIZE,
+                corner_y,
+                corner_x + CORNER_SIZE,
+                corner_y,
+            )
+            if spare_markers:
+                items = spare_markers.pop()
+                self.coords(items[0], *vertical)
+                self.coords(items[1], *horizontal)
+            else:
+                items = [
+                    self.create_line(*vertical, tags="corner"),
+                    self.create_line(*horizontal, tags="corner"),
+                ]
+        else:
+            items = [
+                self.create_rectangle(
+                    corner_x - self.cell_size / 2,
+                    corner_y - self.cell_size / 2,
+                    corner_x + self.cell_size / 2,
+                    corner_y + self.cell_size / 2,
+                    fill=color,
+                    tags="corner",
+                    outline="",
+                )
+            ]
+        self.corner_items[avenue, street] = items
 
     def draw_all_beepers(self) -> None:
-        for location, count in self.world.beepers.items():
-            self.draw_beeper(location, count)
+        self.beeper_items.clear()
+        beepers = self.world.beepers
+        # Look up whichever is fewer, the beepers or the corners in view. Only a
+        # dict knows its size: dense and forked storage would walk every corner
+        num_visible = len(self.visible_avenues) * len(self.visible_streets)
+        if isinstance(beepers, dict) and len(beepers) < num_visible:
+            for location, count in beepers.items():
+                if self.is_visible(*location):
+                    self.draw_beeper(location, count)
+        else:
+            for location in self.visible_corners():
+                self.draw_beeper(location, beepers.get(location, 0))
 
     def draw_beeper(self, location: tuple[int, int], count: int) -> None:
         # handle case where defaultdict returns 0 count by not drawing beepers
@@ -244,6 +647,21 @@ class KarelCanvas(tk.Canvas):
 
         corner_x = self.calculate_corner_x(location[0])
         corner_y = self.calculate_corner_y(location[1])
+        if self.cell_size < DETAILED_BEEPER_MIN_CELL_SIZE:
+            # The count would be unreadable, so just fill the corner
+            self.beeper_items[location] = [
+                self.create_rectangle(
+                    corner_x - self.cell_size / 2,
+                    corner_y - self.cell_size / 2,
+                    corner_x + self.cell_size / 2,
+                    corner_y + self.cell_size / 2,
+                    fill="grey",
+                    outline="",
+                    tags="beeper",
+                )
+            ]
+            return
+
         beeper_radius = self.cell_size * BEEPER_CELL_SIZE_FRAC
 
         points = [
@@ -256,90 +674,165 @@ class KarelCanvas(tk.Canvas):
             corner_x - beeper_radius,
             corner_y,
         ]
-        self.create_default_polygon(points, fill="light grey", tags="beeper")
+        items = [self.create_default_polygon(points, fill="light grey", tags="beeper")]
 
         if count > 1:
-            self.create_text(
-                corner_x, corner_y, text=str(count), font="Arial 12", tags="beeper"
+            items.append(
+                self.create_text(
+                    corner_x, corner_y, text=str(count), font="Arial 12", tags="beeper"
+                )
             )
+        self.beeper_items[location] = items
 
     def draw_all_walls(self) -> None:
-        for wall in self.world.walls:
-            self.draw_wall(wall)
+        self.wall_items.clear()
+        for avenue, street in self.visible_corners():
+            self.draw_corner_walls(avenue, street)
 
-    def draw_wall(self, wall: Wall) -> None:
+    def draw_corner_walls(self, avenue: int, street: int) -> None:
+        """
+        Draws the walls to the west and south of a corner. A wall between two
+        corners is marked on both, so the walls to the east and north are only
+        drawn on the edges of the world.
+        """
+        mask = self.world.wall_mask[self.world.corner_index(avenue, street)]
+        if not mask:
+            return
+        directions = [Direction.WEST, Direction.SOUTH]
+        if avenue == self.world.num_avenues:
+            directions.append(Direction.EAST)
+        if street == self.world.num_streets:
+            directions.append(Direction.NORTH)
+        self.wall_items[avenue, street] = [
+            self.draw_wall(Wall(avenue, street, direction))
+            for direction in directions
+            if mask & DIRECTION_BITS[direction]
+        ]
+
+    def draw_wall(self, wall: Wall) -> int:
         avenue, street, direction = wall.avenue, wall.street, wall.direction
         corner_x = self.calculate_corner_x(avenue)
         corner_y = self.calculate_corner_y(street)
+        half = self.cell_size / 2
 
         if direction == Direction.NORTH:
-            self.create_line(
-                corner_x - self.cell_size / 2,
-                corner_y - self.cell_size / 2,
-                corner_x + self.cell_size / 2,
-                corner_y - self.cell_size / 2,
-                width=LINE_WIDTH,
-                tags="wall",
+            points = (
+                corner_x - half,
+                corner_y - half,
+                corner_x + half,
+                corner_y - half,
             )
-        if direction == Direction.SOUTH:
-            self.create_line(
-                corner_x - self.cell_size / 2,
-                corner_y + self.cell_size / 2,
-                corner_x + self.cell_size / 2,
-                corner_y + self.cell_size / 2,
-                width=LINE_WIDTH,
-                tags="wall",
+        elif direction == Direction.SOUTH:
+            points = (
+                corner_x - half,
+                corner_y + half,
+                corner_x + half,
+                corner_y + half,
             )
-        if direction == Direction.EAST:
-            self.create_line(
-                corner_x + self.cell_size / 2,
-                corner_y - self.cell_size / 2,
-                corner_x + self.cell_size / 2,
-                corner_y + self.cell_size / 2,
-                width=LINE_WIDTH,
-                tags="wall",
+        elif direction == Direction.EAST:
+            points = (
+                corner_x + half,
+                corner_y - half,
+                corner_x + half,
+                corner_y + half,
             )
-        if direction == Direction.WEST:
-            self.create_line(
-                corner_x - self.cell_size / 2,
-                corner_y - self.cell_size / 2,
-                corner_x - self.cell_size / 2,
-                corner_y + self.cell_size / 2,
-                width=LINE_WIDTH,
-                tags="wall",
+        else:
+            points = (
+                corner_x - half,
+                corner_y - half,
+                corner_x - half,
+                corner_y + half,
             )
+        return self.create_line(*points, width=LINE_WIDTH, tags="wall")
+
+    def show_crash(self, avenue: int, street: int) -> None:
+        self.crash_location = (avenue, street)
+        self.delete("crash")
+        self.draw_crash()
+        self.lower_into_layer("crash", "label")
+
+    def draw_crash(self) -> None:
+        if self.crash_location is None:
+            return
+        corner_x = self.calculate_corner_x(self.crash_location[0])
+        corner_y = self.calculate_corner_y(self.crash_location[1])
+        self.create_rectangle(
+            corner_x - self.cell_size / 2,
+            corner_y - self.cell_size / 2,
+            corner_x + self.cell_size / 2,
+            corner_y + self.cell_size / 2,
+            outline="red",
+            width=2 * LINE_WIDTH,
+            tags="crash",
+        )
 
     def draw_karel(self) -> None:
+        """
+        Draws Karel, moving the canvas items already drawn instead of creating new
+        ones whenever possible: a move is a single translation of every item, and
+        a turn only changes the points of each item.
+        """
+        self.follow_karel()
         corner_x = self.calculate_corner_x(self.karel.avenue)
         corner_y = self.calculate_corner_y(self.karel.street)
-        center = (corner_x, corner_y)
+        icon = self.icon
+        if self.cell_size < DETAILED_KAREL_MIN_CELL_SIZE:
+            icon = "triangle"
+        key = (icon, self.karel.direction, self.cell_size)
+        shape = self.karel_shape(key)
+        drawn = self.karel_drawn
+        self.karel_drawn = (key, corner_x, corner_y)
+
+        if drawn is not None and drawn[0] == key:
+            _, drawn_x, drawn_y = drawn
+            if (corner_x, corner_y) != (drawn_x, drawn_y):
+                self.move("karel", corner_x - drawn_x, corner_y - drawn_y)
+            return
 
-        if self.icon == "karel":
-            karel_origin_x = (
-                corner_x
-                - self.cell_size / 2
-                + KAREL_LEFT_HORIZONTAL_PAD * self.cell_size
-            )
-            karel_origin_y = (
-                corner_y - self.cell_size / 2 + KAREL_VERTICAL_OFFSET * self.cell_size
-            )
+        if drawn is not None and drawn[0][0] == icon:
+            for item, polygon in zip(self.karel_items, shape, strict=True):
+                self.coords(item, self.translate(polygon.points, corner_x, corner_y))
+            return
 
-            self.draw_karel_body(
-                karel_origin_x,
-                karel_origin_y,
-                center,
-                DIRECTION_TO_RADIANS[self.karel.direction],
+        self.delete("karel")
+        self.karel_items = [
+            self.create_default_polygon(
+                self.translate(polygon.points, corner_x, corner_y),
+                fill=polygon.fill,
+                outline=polygon.outline,
             )
-            self.draw_karel_legs(
-                karel_origin_x,
-                karel_origin_y,
-                center,
-                DIRECTION_TO_RADIANS[self.karel.direction],
+            for polygon in shape
+        ]
+
+    @staticmethod
+    def translate(points: list[float], x: float, y: float) -> list[float]:
+        return [value + (y if i % 2 else x) for i, value in enumerate(points)]
+
+    def karel_shape(self, key: tuple[str, Direction, float]) -> list[KarelPolygon]:
+        """Returns Karel's polygons for the given icon, direction and cell size."""
+        if key in self.karel_shapes:
+            return self.karel_shapes[key]
+
+        icon, direction, _ = key
+        # Karel is drawn around the origin, then moved to its corner
+        center = (0.0, 0.0)
+        radians = DIRECTION_TO_RADIANS[direction]
+        shape = []
+        if icon == "karel":
+            karel_origin_x = (KAREL_LEFT_HORIZONTAL_PAD - 0.5) * self.cell_size
+            karel_origin_y = (KAREL_VERTICAL_OFFSET - 0.5) * self.cell_size
+            shape += self.karel_body_polygons(
+                karel_origin_x, karel_origin_y, center, radians
             )
-        elif self.icon == "simple":
-            self.draw_simple_karel_icon(
-                center, DIRECTION_TO_RADIANS[self.karel.direction]
+            shape += self.karel_leg_polygons(
+                karel_origin_x, karel_origin_y, center, radians
             )
+        elif icon == "simple":
+            shape += self.simple_karel_polygons(center, radians)
+        elif icon == "triangle":
+            shape += self.triangle_karel_polygons(center, radians)
+        self.karel_shapes[key] = shape
+        return shape
 
     def generate_external_karel_points(
         self, x: float, y: float, center: tuple[float, float], direction: float
@@ -400,9 +893,9 @@ class KarelCanvas(tk.Canvas):
 
         return inner_points
 
-    def draw_karel_body(
+    def karel_body_polygons(
         self, x: float, y: float, center: tuple[float, float], direction: float
-    ) -> None:
+    ) -> list[KarelPolygon]:
         outer_points = self.generate_external_karel_points(x, y, center, direction)
         inner_points = self.generate_internal_karel_points(x, y, center, direction)
 
@@ -411,11 +904,11 @@ class KarelCanvas(tk.Canvas):
         entire_body_points = outer_points + inner_points
 
         # First draw the filled non-convex polygon
-        self.create_default_polygon(entire_body_points, fill="white", outline="")
+        polygons = [KarelPolygon(entire_body_points, fill="white", outline="")]
 
         # Then draw the transparent exterior edges of Karel's body
-        self.create_default_polygon(outer_points, fill="")
-        self.create_default_polygon(inner_points, fill="")
+        polygons.append(KarelPolygon(outer_points, fill=""))
+        polygons.append(KarelPolygon(inner_points, fill=""))
 
         # Define dimensions and location of Karel's mouth
         # karel_height = self.cell_size * KAREL_HEIGHT
@@ -435,11 +928,12 @@ class KarelCanvas(tk.Canvas):
             mouth_y,
         ]
         self.rotate_points(center, mouth_points, direction)
-        self.create_default_polygon(mouth_points, fill="white")
+        polygons.append(KarelPolygon(mouth_points, fill="white"))
+        return polygons
 
-    def draw_karel_legs(
+    def karel_leg_polygons(
         self, x: float, y: float, center: tuple[float, float], direction: float
-    ) -> None:
+    ) -> list[KarelPolygon]:
         leg_length = self.cell_size * KAREL_LEG_LENGTH
         foot_length = self.cell_size * KAREL_FOOT_LENGTH
         leg_foot_width = self.cell_size * KAREL_LEG_FOOT_WIDTH
@@ -461,7 +955,7 @@ class KarelCanvas(tk.Canvas):
         points += [x, y + vertical_offset]
 
         self.rotate_points(center, points, direction)
-        self.create_default_polygon(points)
+        polygons = [KarelPolygon(points)]
 
         # Reset point of reference to be bottom left rather than top_left
         y += self.cell_size * KAREL_HEIGHT
@@ -480,11 +974,12 @@ class KarelCanvas(tk.Canvas):
         points += [x + horizontal_offset, y]
 
         self.rotate_points(center, points, direction)
-        self.create_default_polygon(points)
+        polygons.append(KarelPolygon(points))
+        return polygons
 
-    def draw_simple_karel_icon(
+    def simple_karel_polygons(
         self, center: tuple[float, float], direction: float
-    ) -> None:
+    ) -> list[KarelPolygon]:
         simple_karel_width = self.cell_size * SIMPLE_KAREL_WIDTH
         simple_karel_height = self.cell_size * SIMPLE_KAREL_HEIGHT
         center_x, center_y = center
@@ -505,7 +1000,23 @@ class KarelCanvas(tk.Canvas):
             center_y - simple_karel_height / 2,
         ]
         self.rotate_points(center, points, direction)
-        self.create_default_polygon(points, fill="white")
+        return [KarelPolygon(points, fill="white")]
+
+    def triangle_karel_polygons(
+        self, center: tuple[float, float], direction: float
+    ) -> list[KarelPolygon]:
+        half_size = self.cell_size * TRIANGLE_KAREL_SIZE / 2
+        center_x, center_y = center
+        points = [
+            center_x - half_size,
+            center_y - half_size,
+            center_x + half_size,
+            center_y,
+            center_x - half_size,
+            center_y + half_size,
+        ]
+        self.rotate_points(center, points, direction)
+        return [KarelPolygon(points)]
 
     def calculate_corner_x(self, avenue: float) -> float:
         return self.left_x + self.cell_size / 2 + (avenue - 1) * self.cell_size
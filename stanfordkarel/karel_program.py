@@ -20,7 +20,8 @@ Date of Creation: 10/1/2019
 from __future__ import annotations
 
 from .karel_ascii import AsciiKarelWorld, compare_output
-from .karel_world import COLOR_MAP, INFINITY, Direction, KarelWorld
+from .karel_trace import MOVE, PICK_BEEPER, PUT_BEEPER, TURN_LEFT, ActionTrace
+from .karel_world import COLOR_MAP, DIRECTION_BITS, INFINITY, Direction, KarelWorld
 
 NEXT_DIRECTION_MAP = {
     Direction.NORTH: Direction.WEST,
@@ -30,6 +31,13 @@ NEXT_DIRECTION_MAP = {
 }
 NEXT_DIRECTION_MAP_RIGHT = {v: k for k, v in NEXT_DIRECTION_MAP.items()}
 
+# These maps associate the direction Karel is facing with the bit of
+# KarelWorld.clearance that says whether Karel's left or right is clear
+LEFT_DIRECTION_BITS = {d: DIRECTION_BITS[NEXT_DIRECTION_MAP[d]] for d in Direction}
+RIGHT_DIRECTION_BITS = {
+    d: DIRECTION_BITS[NEXT_DIRECTION_MAP_RIGHT[d]] for d in Direction
+}
+
 # This map associates directions with the delta that Karel
 # undergoes if it were to move one step in that direction
 # delta is in terms of (avenue, street)
@@ -42,7 +50,13 @@ DIRECTION_DELTA_MAP = {
 
 
 class KarelProgram:
-    def __init__(self, world_file: str) -> None:
+    def __init__(
+        self,
+        world_file: str = "",
+        max_steps: int | None = None,
+        repeat_limit: int | None = None,
+        world: KarelWorld | None = None,
+    ) -> None:
         """
         This functions instantiates a new Karel instance and sets its
         location and current number of beepers to be the default starting
@@ -50,31 +64,59 @@ class KarelProgram:
 
         Parameters:
             world (KarelWorld) - The world that Karel should exists in
+            max_steps (int) - If set, the number of actions and conditions Karel
+                              may perform before it is stopped
+            repeat_limit (int) - If set, the number of times Karel may be in the
+                                 same state without changing the world before it
+                                 is stopped. Conditions count as visits and the
+                                 program's own variables are not part of the
+                                 state, so a limit too low stops correct programs
+            world (KarelWorld) - If set, Karel lives in this world instead of one
+                                 loaded from world_file, e.g. a KarelWorld.fork()
 
         Members:
             avenue (int) - The current avenue Karel is standing on.
             street (int) - The current street Karel is standing on.
             street (Direction[Enum]) - The current direction Karel is facing.
             num_beepers (int) - The current number of beepers Karel has.
+            steps (int) - The number of actions and conditions Karel has performed.
 
         Returns: None
         """
-        self.world = KarelWorld(world_file)
+        self.world = world if world is not None else KarelWorld(world_file)
         self.avenue, self.street = self.world.karel_start_location
         self.direction = self.world.karel_start_direction
         self.num_beepers = self.world.karel_start_beeper_count
 
+        # Records every state-changing action when set to an ActionTrace
+        self.trace: ActionTrace | None = None
+
+        # Infinite loop detection: a step budget, and the number of times Karel
+        # has been in each (avenue, street, direction) since the world last changed
+        self.max_steps = max_steps
+        self.repeat_limit = repeat_limit
+        self.steps = 0
+        self.state_visits: dict[tuple[int, int, Direction], int] = {}
+
     def __repr__(self) -> str:
         """Creates a Karel World in ASCII Art!"""
         return str(AsciiKarelWorld(self.world, self.street, self.avenue))
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, KarelProgram):
-            return self.__dict__ == other.__dict__
+            return (
+                self.avenue == other.avenue
+                and self.street == other.street
+                and self.direction == other.direction
+                and self.num_beepers == other.num_beepers
+                and self.world == other.world
+            )
         return NotImplemented
 
     def __hash__(self) -> int:
-        return 0
+        return hash(
+            (self.world, self.avenue, self.street, self.direction, self.num_beepers)
+        )
 
     def compare_with(self, other: KarelProgram, two_columns: bool = True) -> bool:
         """
@@ -102,6 +144,52 @@ class KarelProgram:
         self.avenue, self.street = self.world.karel_start_location
         self.direction = self.world.karel_start_direction
         self.num_beepers = self.world.karel_start_beeper_count
+        self.steps = 0
+        self.state_visits.clear()
+        if self.trace is not None:
+            self.trace.clear()
+
+    def start_trace(self) -> ActionTrace:
+        """
+        This function starts recording every action Karel performs from now on.
+
+        Parameters: None
+        Returns:
+            trace (ActionTrace) - The trace that actions are recorded into
+        """
+        self.trace = ActionTrace()
+        return self.trace
+
+    def count_step(self) -> None:
+        """
+        This function counts one action or condition performed by Karel, and raises
+        a KarelInfiniteLoopException if Karel has run out of steps or keeps
+        returning to the same state without changing the world.
+
+        Parameters: None
+        Returns: None
+        """
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise KarelInfiniteLoopException(
+                self.avenue,
+                self.street,
+                self.direction,
+                f"Karel used up its budget of {self.max_steps} steps.",
+                self.steps,
+            )
+        if self.repeat_limit is not None:
+            state = (self.avenue, self.street, self.direction)
+            visits = self.state_visits[state] = self.state_visits.get(state, 0) + 1
+            if visits > self.repeat_limit:
+                raise KarelInfiniteLoopException(
+                    self.avenue,
+                    self.street,
+                    self.direction,
+                    f"Karel was in the same state {visits} times "
+                    "without changing the world.",
+                    self.steps,
+                )
 
     def move(self) -> None:
         """
@@ -112,7 +200,8 @@ class KarelProgram:
         Parameters: None
         Returns: None
         """
-        if not self.front_is_clear():
+        self.count_step()
+        if self.corner_clearance() & DIRECTION_BITS[self.direction] == 0:
             raise KarelException(
                 self.avenue,
                 self.street,
@@ -123,6 +212,8 @@ class KarelProgram:
         delta_avenue, delta_street = DIRECTION_DELTA_MAP[self.direction]
         self.avenue += delta_avenue
         self.street += delta_street
+        if self.trace is not None:
+            self.trace.record(MOVE)
 
     def turn_left(self) -> None:
         """
@@ -131,7 +222,10 @@ class KarelProgram:
         Parameters: None
         Returns: None
         """
+        self.count_step()
         self.direction = NEXT_DIRECTION_MAP[self.direction]
+        if self.trace is not None:
+            self.trace.record(TURN_LEFT)
 
     def put_beeper(self) -> None:
         """
@@ -142,6 +236,7 @@ class KarelProgram:
         Parameters: None
         Returns: None
         """
+        self.count_step()
         if self.num_beepers == 0:
             raise KarelException(
                 self.avenue,
@@ -149,11 +244,21 @@ class KarelProgram:
                 self.direction,
                 "Karel attempted to put a beeper, but it had none left in its bag.",
             )
+        if not self.world.in_bounds(self.avenue, self.street):
+            raise KarelException(
+                self.avenue,
+                self.street,
+                self.direction,
+                "Karel attempted to put a beeper, but it was outside the world.",
+            )
 
         if self.num_beepers != INFINITY:
             self.num_beepers -= 1
 
         self.world.add_beeper(self.avenue, self.street)
+        self.state_visits.clear()
+        if self.trace is not None:
+            self.trace.record(PUT_BEEPER)
 
     def pick_beeper(self) -> None:
         """
@@ -164,7 +269,8 @@ class KarelProgram:
         Parameters: None
         Returns: None
         """
-        if not self.beepers_present():
+        self.count_step()
+        if self.world.beepers.get((self.avenue, self.street), 0) == 0:
             raise KarelException(
                 self.avenue,
                 self.street,
@@ -177,6 +283,9 @@ class KarelProgram:
             self.num_beepers += 1
 
         self.world.remove_beeper(self.avenue, self.street)
+        self.state_visits.clear()
+        if self.trace is not None:
+            self.trace.record(PICK_BEEPER)
 
     def front_is_clear(self) -> bool:
         """
@@ -188,7 +297,21 @@ class KarelProgram:
             is_clear (Bool) - True if there is no wall in front of Karel
                               False otherwise
         """
-        return self.direction_is_clear(self.direction)
+        self.count_step()
+        return self.corner_clearance() & DIRECTION_BITS[self.direction] != 0
+
+    def corner_clearance(self) -> int:
+        """
+        This is a helper function that returns the DIRECTION_BITS of every
+        direction Karel could move in from its current corner. Karel can't move
+        at all from outside the world, where a world file may have placed it.
+        """
+        world = self.world
+        avenue, street = self.avenue, self.street
+        if not (0 < avenue <= world.num_avenues and 0 < street <= world.num_streets):
+            return 0
+        table = world.clearance or world.clearance_table()
+        return table[(street - 1) * world.num_avenues + avenue - 1]
 
     def direction_is_clear(self, direction: Direction) -> bool:
         """
@@ -202,22 +325,9 @@ class KarelProgram:
             is_clear (Bool) - True if there is no barrier in the specified direction
                               False otherwise
         """
-        delta_avenue, delta_street = DIRECTION_DELTA_MAP[direction]
-        next_avenue = self.avenue + delta_avenue
-        next_street = self.street + delta_street
-
-        # front is not clear if we are about to go out of bounds
-        if not self.world.in_bounds(next_avenue, next_street):
-            return False
-
-        # front is not clear if wall exists in same direction we're currently facing
-        if self.world.wall_exists(self.avenue, self.street, direction):
-            return False
-
-        # must also check for alternate possible representation of wall
-        opposite_direction = NEXT_DIRECTION_MAP[NEXT_DIRECTION_MAP[direction]]
-        # If all previous conditions checked out, then the front is clear
-        return not self.world.wall_exists(next_avenue, next_street, opposite_direction)
+        # The clearance table folds the world boundary and both possible
+        # representations of a wall into one bit per direction.
+        return self.corner_clearance() & DIRECTION_BITS[direction] != 0
 
     def front_is_blocked(self) -> bool:
         """
@@ -229,7 +339,8 @@ class KarelProgram:
             is_blocked (Bool) - True if there is a wall in front of Karel
                                   False otherwise
         """
-        return not self.front_is_clear()
+        self.count_step()
+        return self.corner_clearance() & DIRECTION_BITS[self.direction] == 0
 
     def left_is_clear(self) -> bool:
         """
@@ -241,7 +352,8 @@ class KarelProgram:
             is_clear (Bool) - True if there is no wall to the left of Karel
                               False otherwise
         """
-        return self.direction_is_clear(NEXT_DIRECTION_MAP[self.direction])
+        self.count_step()
+        return self.corner_clearance() & LEFT_DIRECTION_BITS[self.direction] != 0
 
     def left_is_blocked(self) -> bool:
         """
@@ -253,7 +365,8 @@ class KarelProgram:
             is_blocked (Bool) - True if there is a wall to the left of Karel
                                   False otherwise
         """
-        return not self.left_is_clear()
+        self.count_step()
+        return self.corner_clearance() & LEFT_DIRECTION_BITS[self.direction] == 0
 
     def right_is_clear(self) -> bool:
         """
@@ -265,7 +378,8 @@ class KarelProgram:
             is_clear (Bool) - True if there is no wall to the right of Karel
                               False otherwise
         """
-        return self.direction_is_clear(NEXT_DIRECTION_MAP_RIGHT[self.direction])
+        self.count_step()
+        return self.corner_clearance() & RIGHT_DIRECTION_BITS[self.direction] != 0
 
     def right_is_blocked(self) -> bool:
         """
@@ -277,7 +391,8 @@ class KarelProgram:
             is_blocked (Bool) - True if there is a wall to the right of Karel
                                   False otherwise
         """
-        return not self.right_is_clear()
+        self.count_step()
+        return self.corner_clearance() & RIGHT_DIRECTION_BITS[self.direction] == 0
 
     def beepers_present(self) -> bool:
         """
@@ -289,9 +404,8 @@ class KarelProgram:
             beepers_on_corner (Bool) - True if there's at least one beeper
                                        on Karel's current corner, False otherwise
         """
-        if (self.avenue, self.street) in self.world.beepers:
-            return self.world.beepers[(self.avenue, self.street)] != 0
-        return False
+        self.count_step()
+        return self.world.beepers.get((self.avenue, self.street), 0) != 0
 
     def no_beepers_present(self) -> bool:
         return not self.beepers_present()
@@ -307,10 +421,12 @@ class KarelProgram:
                                     False otherwise
         """
         # Can't check > 0 because INFINITY beepers is -1
+        self.count_step()
         return self.num_beepers != 0
 
     def no_beepers_in_bag(self) -> bool:
         # Only 0 beepers in bag indicates empty bag – negative represents INFINITY
+        self.count_step()
         return self.num_beepers == 0
 
     def facing_north(self) -> bool:
@@ -323,6 +439,7 @@ class KarelProgram:
             facing_north (Bool) - True if Karel is currently facing North
                                   False otherwise
         """
+        self.count_step()
         return self.direction == Direction.NORTH
 
     def not_facing_north(self) -> bool:
@@ -338,6 +455,7 @@ class KarelProgram:
             facing_east (Bool) - True if Karel is currently facing East
                                  False otherwise
         """
+        self.count_step()
         return self.direction == Direction.EAST
 
     def not_facing_east(self) -> bool:
@@ -353,6 +471,7 @@ class KarelProgram:
             facing_west (Bool) - True if Karel is currently facing West
                                  False otherwise
         """
+        self.count_step()
         return self.direction == Direction.WEST
 
     def not_facing_west(self) -> bool:
@@ -368,6 +487,7 @@ class KarelProgram:
             facing_south (Bool) - True if Karel is currently facing South
                                   False otherwise
         """
+        self.count_step()
         return self.direction == Direction.SOUTH
 
     def not_facing_south(self) -> bool:
@@ -384,6 +504,7 @@ class KarelProgram:
             color (str) - The color string specifying which color to paint the corner
         Returns: None
         """
+        self.count_step()
         if color is not None and color not in COLOR_MAP:
             raise KarelException(
                 self.avenue,
@@ -392,7 +513,19 @@ class KarelProgram:
                 f"Karel attempted to paint the corner with color {color}, "
                 "which is not valid.",
             )
+        if not self.world.in_bounds(self.avenue, self.street):
+            raise KarelException(
+                self.avenue,
+                self.street,
+                self.direction,
+                "Karel attempted to paint the corner, but it was outside the world.",
+            )
+        # Repainting a corner with its own color does not change the world
+        if self.world.corner_color(self.avenue, self.street) != (color or ""):
+            self.state_visits.clear()
         self.world.paint_corner(self.avenue, self.street, color)
+        if self.trace is not None:
+            self.trace.record_paint(color)
 
     def corner_color_is(self, color: str) -> bool:
         """
@@ -406,6 +539,7 @@ class KarelProgram:
             is_color (Bool) - True if Karel's current corner is the specified color
                               False otherwise
         """
+        self.count_step()
         return self.world.corner_color(self.avenue, self.street) == color
 
 
@@ -426,3 +560,20 @@ class KarelException(Exception):  # noqa: N818
             f"Karel crashed while on avenue {self.avenue} and street {self.street}, "
             f"facing {self.direction}\nInvalid action: {self.message}"
         )
+
+
+class KarelInfiniteLoopException(KarelException):
+    """Raised when Karel is stopped by its step budget or repeat detection."""
+
+    def __init__(
+        self, avenue: int, street: int, direction: Direction, message: str, steps: int
+    ) -> None:
+        super().__init__(avenue, street, direction, message)
+        self.steps = steps
+
+    def __str__(self) -> str:
+        return (
+            f"Karel was stopped after {self.steps} steps while on avenue "
+            f"{self.avenue} and street {self.street}, facing {self.direction}\n"
+            f"Infinite loop: {self.message}"
+        )
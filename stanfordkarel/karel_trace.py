@@ -0,0 +1,307 @@
+"""
+This file defines a compact recording of the actions a Karel program performed.
+
+Every state-changing action is stored as a one-byte code. Consecutive repeats of
+the same code are folded into a single run, so a trace is two parallel arrays:
+`codes` (one byte per run) and `counts` (the length of each run). The color of a
+paint_corner action is stored in the high bits of its code as an index into the
+trace's own color table.
+
+Traces are saved in a streaming binary format:
+- the header MAGIC
+- one record per run: the code byte followed by the run length as a varint
+- a color is defined by a DEFINE_COLOR byte, a length byte and the UTF-8 name,
+  before the first paint_corner record that uses it
+"""
+
+from __future__ import annotations
+
+import copy
+from array import array
+from typing import IO, TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, MutableMapping
+    from pathlib import Path
+
+    from .karel_program import KarelProgram
+    from .karel_world import Direction
+
+MOVE = 0
+TURN_LEFT = 1
+PUT_BEEPER = 2
+PICK_BEEPER = 3
+PAINT_CORNER = 4
+ACTION_NAMES = ("move", "turn_left", "put_beeper", "pick_beeper", "paint_corner")
+
+# The low bits of a code hold the action, the high bits hold the color index
+ACTION_BITS = 3
+ACTION_MASK = (1 << ACTION_BITS) - 1
+MAX_COLORS = 255 >> ACTION_BITS
+MAX_RUN_LENGTH = 2**32 - 1
+
+MAGIC = b"KTRACE\x01\n"
+DEFINE_COLOR = 0xFF
+CHUNK_SIZE = 1 << 16
+
+# Number of actions between the snapshots a TracePlayer caches for seeking
+KEYFRAME_INTERVAL = 1000
+
+
+class ActionTrace:
+    def __init__(self) -> None:
+        # One byte-code and one repeat count per run of identical actions
+        self.codes = array("B")
+        self.counts = array("I")
+
+        # Colors used by paint_corner, indexed by the high bits of a code
+        self.colors: list[str] = []
+        self.color_indices: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of actions recorded, not the number of runs."""
+        return sum(self.counts)
+
+    def __iter__(self) -> Iterator[tuple[str, str | None]]:
+        """Yields (action name, color) for every recorded action."""
+        for code, color, count in self.runs():
+            action = ACTION_NAMES[code]
+            for _ in range(count):
+                yield action, color
+
+    def clear(self) -> None:
+        self.codes = array("B")
+        self.counts = array("I")
+        self.colors = []
+        self.color_indices = {}
+
+    def record(self, code: int) -> None:
+        codes, counts = self.codes, self.counts
+        if codes and codes[-1] == code and counts[-1] < MAX_RUN_LENGTH:
+            counts[-1] += 1
+        else:
+            codes.append(code)
+            counts.append(1)
+
+    def record_paint(self, color: str | None) -> None:
+        # Painting with None clears a corner, just like painting it blank
+        color = color or ""
+        color_index = self.color_indices.get(color)
+        if color_index is None:
+            if len(self.colors) > MAX_COLORS:
+                raise ValueError(f"A trace can use at most {MAX_COLORS + 1} colors.")
+            color_index = self.color_indices[color] = len(self.colors)
+            self.colors.append(color)
+        self.record(PAINT_CORNER | color_index << ACTION_BITS)
+
+    def runs(self) -> Iterator[tuple[int, str | None, int]]:
+        """Yields (action code, color, repeat count) for every run of actions."""
+        for code, count in zip(self.codes, self.counts, strict=True):
+            action = code & ACTION_MASK
+            if action != PAINT_CORNER:
+                yield action, None, count
+            else:
+                # Blank corners are painted with None, which paint_corner accepts
+                yield action, self.colors[code >> ACTION_BITS] or None, count
+
+    def dump(self, f: IO[bytes]) -> None:
+        """Streams the trace to a binary file in chunks."""
+        f.write(MAGIC)
+        defined_colors = 0
+        chunk = bytearray()
+        for code, count in zip(self.codes, self.counts, strict=True):
+            if code & ACTION_MASK == PAINT_CORNER:
+                color_index = code >> ACTION_BITS
+                while defined_colors <= color_index:
+                    name = self.colors[defined_colors].encode()
+                    chunk += bytes((DEFINE_COLOR, len(name))) + name
+                    defined_colors += 1
+            chunk.append(code)
+            write_varint(chunk, count)
+            if len(chunk) >= CHUNK_SIZE:
+                f.write(chunk)
+                chunk = bytearray()
+        f.write(chunk)
+
+    @classmethod
+    def load(cls, f: IO[bytes]) -> ActionTrace:
+        """Reads a trace that was written by dump()."""
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a Karel action trace.")
+        trace = cls()
+        reader = ByteReader(f)
+        while (code := reader.read_byte()) is not None:
+            if code == DEFINE_COLOR:
+                name = reader.read_bytes(reader.read_required_byte()).decode()
+                trace.color_indices[name] = len(trace.colors)
+                trace.colors.append(name)
+                continue
+            if code & ACTION_MASK >= len(ACTION_NAMES):
+                raise ValueError(f"Trace uses an unknown action code {code}.")
+            if code & ACTION_MASK == PAINT_CORNER and code >> ACTION_BITS >= len(
+                trace.colors
+            ):
+                raise ValueError("Trace uses a color that was never defined.")
+            trace.codes.append(code)
+            trace.counts.append(reader.read_varint())
+        return trace
+
+    def save_to_file(self, filepath: Path) -> None:
+        with filepath.open("wb") as f:
+            self.dump(f)
+
+    @classmethod
+    def load_from_file(cls, filepath: Path) -> ActionTrace:
+        with filepath.open("rb") as f:
+            return cls.load(f)
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Appends value as an unsigned LEB128 varint."""
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+class ByteReader:
+    """Reads a binary stream in chunks, one byte or varint at a time."""
+
+    def __init__(self, f: IO[bytes]) -> None:
+        self.f = f
+        self.buffer = b""
+        self.position = 0
+
+    def read_byte(self) -> int | None:
+        if self.position == len(self.buffer):
+            self.buffer = self.f.read(CHUNK_SIZE)
+            self.position = 0
+            if not self.buffer:
+                return None
+        value = self.buffer[self.position]
+        self.position += 1
+        return value
+
+    def read_required_byte(self) -> int:
+        value = self.read_byte()
+        if value is None:
+            raise ValueError("Trace ended in the middle of a record.")
+        return value
+
+    def read_bytes(self, size: int) -> bytes:
+        return bytes(self.read_required_byte() for _ in range(size))
+
+    def read_varint(self) -> int:
+        value = shift = 0
+        while True:
+            byte = self.read_required_byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+
+class Keyframe(NamedTuple):
+    """Karel's state and the trace cursor after a number of actions."""
+
+    run_index: int
+    run_offset: int
+    avenue: int
+    street: int
+    direction: Direction
+    num_beepers: int
+    beepers: MutableMapping[tuple[int, int], int]
+    corner_colors: MutableMapping[tuple[int, int], str]
+    fingerprint: int
+    dirty_corners: frozenset[tuple[int, int]]
+
+
+class TracePlayer:
+    """
+    Plays a recorded trace on a KarelProgram that starts in the trace's world.
+    Seeking restores the nearest cached keyframe at or before the target and
+    applies the remaining actions from there, so jumping anywhere in a long trace
+    costs at most KEYFRAME_INTERVAL actions once the keyframe has been cached.
+    """
+
+    def __init__(
+        self,
+        karel: KarelProgram,
+        trace: ActionTrace,
+        keyframe_interval: int = KEYFRAME_INTERVAL,
+    ) -> None:
+        # Actions played back must not be recorded again
+        karel.trace = None
+        self.karel = karel
+        self.trace = trace
+        self.length = len(trace)
+        self.keyframe_interval = keyframe_interval
+
+        # Number of actions applied so far, and where the next one is in the trace
+        self.position = 0
+        self.run_index = 0
+        self.run_offset = 0
+
+        self.keyframes = {0: self.snapshot()}
+
+    def snapshot(self) -> Keyframe:
+        karel, world = self.karel, self.karel.world
+        return Keyframe(
+            self.run_index,
+            self.run_offset,
+            karel.avenue,
+            karel.street,
+            karel.direction,
+            karel.num_beepers,
+            copy.copy(world.beepers),
+            copy.copy(world.corner_colors),
+            world.fingerprint,
+            frozenset(world.dirty_corners),
+        )
+
+    def restore(self, position: int) -> None:
+        keyframe = self.keyframes[position]
+        karel, world = self.karel, self.karel.world
+        self.position = position
+        self.run_index, self.run_offset = keyframe.run_index, keyframe.run_offset
+        karel.avenue, karel.street = keyframe.avenue, keyframe.street
+        karel.direction, karel.num_beepers = keyframe.direction, keyframe.num_beepers
+        world.beepers = copy.copy(keyframe.beepers)
+        world.corner_colors = copy.copy(keyframe.corner_colors)
+        world.fingerprint = keyframe.fingerprint
+        world.dirty_corners = set(keyframe.dirty_corners)
+
+    def step(self) -> int | None:
+        """Applies the next action and returns its code, or None at the end."""
+        if self.position >= self.length:
+            return None
+        code = self.trace.codes[self.run_index]
+        action = code & ACTION_MASK
+        karel_fn = getattr(self.karel, ACTION_NAMES[action])
+        if action == PAINT_CORNER:
+            karel_fn(self.trace.colors[code >> ACTION_BITS] or None)
+        else:
+            karel_fn()
+
+        self.position += 1
+        self.run_offset += 1
+        if self.run_offset == self.trace.counts[self.run_index]:
+            self.run_index += 1
+            self.run_offset = 0
+        if (
+            self.position % self.keyframe_interval == 0
+            and self.position not in self.keyframes
+        ):
+            self.keyframes[self.position] = self.snapshot()
+        return action
+
+    def seek(self, position: int) -> None:
+        """Moves Karel and the world to their state after the given action count."""
+        position = max(0, min(position, self.length))
+        nearest = position - position % self.keyframe_interval
+        while nearest not in self.keyframes:
+            nearest -= self.keyframe_interval
+        if position < self.position or nearest > self.position:
+            self.restore(nearest)
+        while self.position < position:
+            self.step()
@@ -30,6 +30,8 @@ World File Constraints:
     - West
     - North
     - South
+- World files are parsed by world_parser.py, which reports every invalid
+  entry with its line and column
 
 Original Author: Nicholas Bowman
 Credits: Kylie Jue, Tyler Yep
@@ -42,11 +44,20 @@ Date of Creation: 10/1/2019
 from __future__ import annotations
 
 import copy
-import re
 import sys
+import zlib
 from enum import Enum, unique
 from pathlib import Path
-from typing import Any, NamedTuple
+from typing import TYPE_CHECKING, NamedTuple
+
+from . import world_cache
+from .world_parser import ParsedWorld, parse_world_file
+from .world_registry import WorldRegistry
+from .world_storage import CornerOverlay, DenseBeepers, DenseCornerColors
+
+if TYPE_CHECKING:
+    import mmap
+    from collections.abc import MutableMapping
 
 INFINITY = -1
 COLOR_MAP = {
@@ -64,43 +75,85 @@ COLOR_MAP = {
     "Blue": "blue",
     "Yellow": "yellow",
 }
+# Colors stored by index in dense worlds. Index 0 is a blank corner.
+COLOR_PALETTE = ("", *COLOR_MAP)
 INIT_SPEED = 50
-VALID_WORLD_KEYWORDS = [
-    "dimension",
-    "wall",
-    "beeper",
-    "karel",
-    "speed",
-    "beeperbag",
-    "color",
-]
-KEYWORD_DELIM = ":"
-PARAM_DELIM = ";"
 DEFAULT_WORLD_FILE = "default_world.w"
+# Worlds saved with this suffix use the memory-mapped format in world_binary.py
+BINARY_WORLD_SUFFIX = ".kw"
+# Suffixes of the world formats that can be loaded, in order of preference when
+# a directory has the same world in several formats
+WORLD_FILE_SUFFIXES = (".w", ".w.gz", ".json", ".json.gz", BINARY_WORLD_SUFFIX)
+# Worlds are found by name in the worlds/ folder of the current directory, in any
+# directories registered with WORLD_REGISTRY, then in the provided worlds
+WORLDS_FOLDER = Path("worlds")
+DEFAULT_WORLDS_PATH = Path(__file__).absolute().parent / "worlds"
+WORLD_REGISTRY = WorldRegistry(
+    WORLD_FILE_SUFFIXES, [WORLDS_FOLDER], DEFAULT_WORLDS_PATH
+)
+# Worlds with more corners than this store beepers and colors in flat arrays
+DENSE_STORAGE_THRESHOLD = 10_000
 
 
 class KarelWorld:
-    def __init__(self, world_file: str) -> None:
+    # Can be changed to switch dense storage on for smaller or larger worlds
+    dense_storage_threshold = DENSE_STORAGE_THRESHOLD
+
+    def __init__(self, world_file: str, parsed: ParsedWorld | None = None) -> None:
         """
         Karel World constructor
         Parameters:
             world_file: filename containing the initial state of Karel's world
+            parsed: the contents of a world that is built in memory instead of
+                loaded, e.g. a generated world. world_file is then only its name.
         """
-        self.world_file = self.process_world(world_file)
+        self.world_file = (
+            Path(world_file) if parsed is not None else self.process_world(world_file)
+        )
 
         # Map of beeper locations to the count of beepers at that location
-        self.beepers: dict[tuple[int, int], int] = {}
+        self.beepers: MutableMapping[tuple[int, int], int] = {}
+        self.init_beepers: MutableMapping[tuple[int, int], int] = {}
 
         # Map of corner colors, defaults to ""
-        self.corner_colors: dict[tuple[int, int], str] = {}
+        self.corner_colors: MutableMapping[tuple[int, int], str] = {}
+        self.init_corner_colors: MutableMapping[tuple[int, int], str] = {}
+
+        # Corners whose beepers or color may differ from their initial state
+        self.dirty_corners: set[tuple[int, int]] = set()
 
-        # Set of Wall objects placed in the world
-        self.walls: set[Wall] = set()
+        # Set of Wall objects placed in the world, exposed as self.walls. None if
+        # the walls have not been derived from wall_mask yet, as in binary worlds.
+        self.wall_set: set[Wall] | None = set()
+
+        # Whether walls and wall_mask are shared with a fork, and must be copied
+        # before they are modified
+        self.shared_walls = False
 
         # Dimensions of the world
         self.num_streets = 1
         self.num_avenues = 1
 
+        # Bitmask of DIRECTION_BITS per corner, indexed by corner_index().
+        # Both representations of a wall are marked, so a wall between two corners
+        # appears on both of them. Kept in sync with self.walls. Binary worlds use
+        # a copy-on-write view of the world file instead of a bytearray.
+        self.wall_mask: bytearray | memoryview = bytearray(1)
+
+        # The memory maps of the file a binary world was loaded from, which are
+        # closed by release_binary_world() before the file is replaced
+        self.mapped_files: tuple[mmap.mmap, ...] = ()
+
+        # Bitmask of DIRECTION_BITS per corner marking the directions Karel can
+        # move in, with walls and the world boundary folded together. Built lazily
+        # by clearance_table() and discarded whenever the walls change.
+        self.clearance: bytearray | None = None
+
+        # Zobrist-style hash of the beepers, corner colors and walls in the world.
+        # Every non-empty corner and every wall contributes one key, XORed
+        # together, so each change updates it in constant time.
+        self.fingerprint = 0
+
         # Initial Karel state saved to enable world reset
         self.karel_start_location = (1, 1)
         self.karel_start_direction = Direction.EAST
@@ -110,41 +163,57 @@ class KarelWorld:
         self.init_speed = INIT_SPEED
 
         # If a world file has been specified, load world details from the file
-        if self.world_file:
+        if parsed is not None:
+            self.apply_parsed_world(parsed)
+            self.rebuild_wall_mask()
+            self.rebuild_fingerprint()
+        elif self.world_file:
             self.load_from_file()
-
-        # Save initial beeper state to enable world reset
-        self.init_beepers = copy.deepcopy(self.beepers)
+        self.update_storage()
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, KarelWorld):
+            # Worlds with different fingerprints can never be equal
             return (
-                self.num_streets == other.num_streets
+                self.fingerprint == other.fingerprint
+                and self.num_streets == other.num_streets
                 and self.num_avenues == other.num_avenues
-                and self.walls == other.walls
-                and self.beepers == other.beepers
-                and self.corner_colors == other.corner_colors
+                and self.get_walls() == other.get_walls()
+                and self.get_beepers() == other.get_beepers()
+                and self.get_colors() == other.get_colors()
             )
         return NotImplemented
 
     def __hash__(self) -> int:
-        return 0
+        return hash((self.num_avenues, self.num_streets, self.fingerprint))
+
+    @property
+    def walls(self) -> set[Wall]:
+        if self.wall_set is None:
+            from .world_binary import walls_from_mask  # noqa: PLC0415
+
+            self.wall_set = walls_from_mask(self)
+        return self.wall_set
+
+    @walls.setter
+    def walls(self, walls: set[Wall]) -> None:
+        self.wall_set = walls
 
     @staticmethod
     def process_world(world_file: str) -> Path:
         """
         If no world_file is provided, use default world.
-        Find world file that matches program name in the current worlds/ directory.
+        Find world file that matches program name in the current worlds/ directory,
+        then in any directories added with WORLD_REGISTRY.register().
         If not found, search the provided default worlds directory.
         """
-        default_worlds_path = Path(__file__).absolute().parent / "worlds"
         if not world_file:
-            default_world = default_worlds_path / DEFAULT_WORLD_FILE
+            default_world = DEFAULT_WORLDS_PATH / DEFAULT_WORLD_FILE
             if default_world.is_file():
                 print("Using default world...")
                 return default_world
             raise FileNotFoundError(
-                f"Default world cannot be found in: {default_worlds_path}\n"
+                f"Default world cannot be found in: {DEFAULT_WORLDS_PATH}\n"
                 "Please raise an issue on the stanfordkarel GitHub."
             )
 
@@ -152,19 +221,16 @@ class KarelWorld:
         if world_filepath.is_file():
             return world_filepath
 
-        worlds_folder = Path("worlds")
-        for worlds_path in (worlds_folder, default_worlds_path):
-            if worlds_path.is_dir():
-                full_world_path = worlds_path / f"{world_file}.w"
-                if full_world_path.is_file():
-                    return full_world_path
+        found = WORLD_REGISTRY.find(world_file)
+        if found is not None:
+            return found
 
-        if not worlds_folder.is_dir():
+        if not WORLDS_FOLDER.is_dir():
             print("Could not find worlds/ folder in current directory.\n")
 
         sys.tracebacklimit = 0
         available_worlds = "\n".join(
-            [f"  {world.stem}" for world in default_worlds_path.glob("*.w")]
+            [f"  {world}" for world in WORLD_REGISTRY.default_worlds()]
         )
         raise FileNotFoundError(
             "The specified file was not one of the provided worlds.\n"
@@ -186,109 +252,188 @@ class KarelWorld:
             return Wall(wall.avenue - 1, wall.street, Direction.EAST)
         raise ValueError
 
-    @staticmethod
-    def parse_parameters(keyword: str, param_str: str) -> dict[str, Any]:
-        params: dict[str, Any] = {}
-        for param_with_spaces in param_str.split(PARAM_DELIM):
-            param = param_with_spaces.strip()
-
-            # check to see if parameter encodes a location
-            coordinate = re.match(r"\((\d+),\s*(\d+)\)", param)
-            if coordinate:
-                # avenue, street
-                params["location"] = int(coordinate.group(1)), int(coordinate.group(2))
-                continue
-
-            # check to see if the parameter is a direction value
-            if param in (d.value for d in Direction):
-                params["direction"] = Direction(param)
-
-            # check to see if parameter encodes a numerical value or color string
-            elif keyword == "color":
-                if param.title() not in COLOR_MAP:
-                    raise ValueError(
-                        f"Error: {param} is invalid parameter for {keyword}."
-                    )
-                params["color"] = param.title()
-
-            # handle the edge case where Karel has infinite beepers
-            elif param in ("infinity", "infinite") and keyword == "beeperbag":
-                params["val"] = INFINITY
-
-            # float values are only valid for the speed parameter.
-            elif keyword == "speed":
-                try:
-                    params["val"] = int(100 * float(param))
-                except ValueError as e:
-                    raise ValueError(
-                        f"Error: {param} is an invalid parameter for {keyword}."
-                    ) from e
-
-            # must be a digit then
-            elif param.isdigit():
-                params["val"] = int(param)
-
-            else:
-                raise ValueError(f"Error: {param} is invalid parameter for {keyword}.")
-        return params
-
     def load_from_file(self) -> None:
-        with self.world_file.open(encoding="utf-8") as f:
-            for i, line_with_spaces in enumerate(f):
-                # Ignore blank lines and lines with no comma delineator
-                line = line_with_spaces.strip()
-                if not line:
-                    continue
-
-                if KEYWORD_DELIM not in line:
-                    print(f"Incorrectly formatted - ignoring line {i} of file: {line}")
-                    continue
-
-                keyword, param_str = line.lower().split(KEYWORD_DELIM)
-
-                # only accept valid keywords as defined in world file spec
-                # TODO: add error detection for keywords with insufficient parameters
-                params = self.parse_parameters(keyword, param_str)
-
-                # handle all different possible keyword cases
-                if keyword == "dimension":
-                    # set world dimensions based on location values
-                    self.num_avenues, self.num_streets = params["location"]
-
-                elif keyword == "wall":
-                    # build a wall at the specified location
-                    (avenue, street), direction = (
-                        params["location"],
-                        params["direction"],
-                    )
-                    self.walls.add(Wall(avenue, street, direction))
-
-                elif keyword == "beeper":
-                    # add the specified number of beepers to the world
-                    if params["location"] in self.beepers:
-                        self.beepers[params["location"]] += params["val"]
-                    else:
-                        self.beepers[params["location"]] = params["val"]
-
-                elif keyword == "karel":
-                    # Give Karel initial state values
-                    self.karel_start_location = params["location"]
-                    self.karel_start_direction = params["direction"]
-
-                elif keyword == "beeperbag":
-                    # Set Karel's initial beeper bag count
-                    self.karel_start_beeper_count = params["val"]
-
-                elif keyword == "speed":
-                    # Set delay speed of program execution
-                    self.init_speed = params["val"]
-
-                elif keyword == "color":
-                    # Set corner color to be specified color
-                    self.corner_colors[params["location"]] = params["color"]
+        """
+        Loads the world from the world cache, or parses and caches it. Binary
+        worlds are mapped directly and never cached.
+        """
+        if self.world_file.suffix == BINARY_WORLD_SUFFIX:
+            from .world_binary import load_binary_world  # noqa: PLC0415
+
+            load_binary_world(self, self.world_file)
+            return
+
+        data = world_cache.load(self.world_file)
+        if data is None:
+            parsed = parse_world_file(self.world_file, DIRECTION_VALUES, COLOR_MAP)
+            self.apply_parsed_world(parsed)
+            self.rebuild_wall_mask()
+            self.rebuild_fingerprint()
+            # The wall mask and fingerprint are cached so they don't need rebuilding
+            world_cache.store(
+                self.world_file,
+                (tuple(parsed), bytes(self.wall_mask), self.fingerprint),
+            )
+        else:
+            parsed_data, wall_mask, self.fingerprint = data
+            self.apply_parsed_world(ParsedWorld(*parsed_data))
+            self.wall_mask = bytearray(wall_mask)
+            self.clearance = None
+
+    def apply_parsed_world(self, parsed: ParsedWorld) -> None:
+        self.num_avenues, self.num_streets = parsed.num_avenues, parsed.num_streets
+        self.walls = {
+            Wall(avenue, street, DIRECTION_VALUES[direction])
+            for avenue, street, direction in parsed.walls
+        }
+        self.beepers = parsed.beepers
+        self.corner_colors = parsed.corner_colors
+        # Save initial beeper and color state to enable world reset
+        self.init_beepers = dict(parsed.beepers)
+        self.init_corner_colors = dict(parsed.corner_colors)
+        self.karel_start_location = parsed.karel_location
+        self.karel_start_direction = DIRECTION_VALUES[parsed.karel_direction]
+        self.karel_start_beeper_count = (
+            INFINITY if parsed.beeper_bag is None else parsed.beeper_bag
+        )
+        if parsed.speed is not None:
+            self.init_speed = parsed.speed
+
+    def set_dimensions(self, num_avenues: int, num_streets: int) -> None:
+        # Walls still in wall_mask must be read before the dimensions change
+        self.walls = self.walls
+        self.num_avenues = num_avenues
+        self.num_streets = num_streets
+        self.rebuild_wall_mask()
+        self.update_storage()
+
+    def update_storage(self) -> None:
+        """
+        Stores beepers and corner colors in dense arrays if the world has more than
+        dense_storage_threshold corners, and in dicts otherwise. Worlds with
+        beepers or colors outside of their bounds always use dicts.
+        """
+        if (
+            isinstance(self.beepers, DenseBeepers)
+            and self.beepers.num_avenues == self.num_avenues
+            and self.beepers.num_streets == self.num_streets
+        ):
+            return
+        locations = [
+            *self.beepers,
+            *self.init_beepers,
+            *self.corner_colors,
+            *self.init_corner_colors,
+        ]
+        dense = self.num_avenues * self.num_streets > self.dense_storage_threshold
+        if dense and all(self.in_bounds(*location) for location in locations):
+            self.beepers = DenseBeepers(
+                self.num_avenues, self.num_streets, self.beepers
+            )
+            self.corner_colors = DenseCornerColors(
+                self.num_avenues, self.num_streets, COLOR_PALETTE, self.corner_colors
+            )
+            self.init_beepers = DenseBeepers(
+                self.num_avenues, self.num_streets, self.init_beepers
+            )
+            self.init_corner_colors = DenseCornerColors(
+                self.num_avenues,
+                self.num_streets,
+                COLOR_PALETTE,
+                self.init_corner_colors,
+            )
+        elif not isinstance(self.beepers, dict):
+            self.beepers = dict(self.beepers)
+            self.corner_colors = dict(self.corner_colors)
+            self.init_beepers = dict(self.init_beepers)
+            self.init_corner_colors = dict(self.init_corner_colors)
 
+    def fork(self) -> KarelWorld:
+        """
+        Returns a copy of the world in its current state. The copy shares the
+        walls and initial beepers and colors of this world, and only stores the
+        corners that either world changes, so forking costs O(changed corners).
+        """
+        child = copy.copy(self)
+        self.shared_walls = child.shared_walls = True
+        child.dirty_corners = set(self.dirty_corners)
+        child.beepers = CornerOverlay(
+            self.init_beepers,
+            0,
+            {
+                location: self.beepers.get(location, 0)
+                for location in self.dirty_corners
+            },
+        )
+        child.corner_colors = CornerOverlay(
+            self.init_corner_colors,
+            "",
+            {
+                location: self.corner_colors.get(location, "")
+                for location in self.dirty_corners
+            },
+        )
+        return child
+
+    def own_walls(self) -> None:
+        """Copies the walls shared with a fork before they are modified."""
+        if self.shared_walls:
+            self.walls = set(self.walls)
+            self.wall_mask = bytearray(self.wall_mask)
+            self.shared_walls = False
+
+    def corner_index(self, avenue: int, street: int) -> int:
+        """Returns the position of an in-bounds corner in the per-corner arrays."""
+        return (street - 1) * self.num_avenues + avenue - 1
+
+    def rebuild_wall_mask(self) -> None:
+        self.clearance = None
+        self.wall_mask = bytearray(self.num_avenues * self.num_streets)
+        for wall in self.walls:
+            self.update_wall_mask(wall, present=True)
+
+    def clearance_table(self) -> bytearray:
+        if self.clearance is None:
+            num_avenues = self.num_avenues
+            # Every direction without a wall is clear...
+            table = bytearray(self.wall_mask).translate(INVERT_DIRECTION_BITS)
+            # ...except for the directions that leave the world.
+            table[:num_avenues] = table[:num_avenues].translate(
+                CLEAR_DIRECTION_BIT[Direction.SOUTH]
+            )
+            table[-num_avenues:] = table[-num_avenues:].translate(
+                CLEAR_DIRECTION_BIT[Direction.NORTH]
+            )
+            table[::num_avenues] = table[::num_avenues].translate(
+                CLEAR_DIRECTION_BIT[Direction.WEST]
+            )
+            table[num_avenues - 1 :: num_avenues] = table[
+                num_avenues - 1 :: num_avenues
+            ].translate(CLEAR_DIRECTION_BIT[Direction.EAST])
+            self.clearance = table
+        return self.clearance
+
+    def update_wall_mask(self, wall: Wall, present: bool) -> None:
+        """Marks or clears both representations of a wall in the wall mask."""
+        self.clearance = None
+        for side in (wall, self.get_alt_wall(wall)):
+            if self.in_bounds(side.avenue, side.street):
+                index = self.corner_index(side.avenue, side.street)
+                if present:
+                    self.wall_mask[index] |= DIRECTION_BITS[side.direction]
                 else:
-                    print(f"Invalid keyword - ignoring line {i} of world file: {line}")
+                    self.wall_mask[index] &= ~DIRECTION_BITS[side.direction]
+
+    def rebuild_fingerprint(self) -> None:
+        """Recomputes the fingerprint from scratch after a bulk change."""
+        fingerprint = 0
+        for (avenue, street), count in self.beepers.items():
+            fingerprint ^= beeper_key(avenue, street, count)
+        for (avenue, street), color in self.corner_colors.items():
+            fingerprint ^= color_key(avenue, street, color)
+        for wall in self.get_walls():
+            fingerprint ^= wall_key(wall)
+        self.fingerprint = fingerprint
 
     def set_karel_start_location(self, avenue: int, street: int) -> None:
         self.karel_start_location = (avenue, street)
@@ -300,45 +445,110 @@ class KarelWorld:
         self.karel_start_beeper_count = beeper_count
 
     def add_beeper(self, avenue: int, street: int) -> None:
-        self.beepers[(avenue, street)] = self.beepers.get((avenue, street), 0) + 1
+        count = self.beepers.get((avenue, street), 0)
+        self.beepers[(avenue, street)] = count + 1
+        self.dirty_corners.add((avenue, street))
+        self.fingerprint ^= beeper_key(avenue, street, count) ^ beeper_key(
+            avenue, street, count + 1
+        )
 
     def remove_beeper(self, avenue: int, street: int) -> None:
-        if self.beepers[(avenue, street)] > 0:
-            self.beepers[(avenue, street)] -= 1
+        count = self.beepers.get((avenue, street), 0)
+        if count > 0:
+            self.beepers[(avenue, street)] = count - 1
+            self.dirty_corners.add((avenue, street))
+            self.fingerprint ^= beeper_key(avenue, street, count) ^ beeper_key(
+                avenue, street, count - 1
+            )
 
     def add_wall(self, wall: Wall) -> None:
+        self.own_walls()
         alt_wall = self.get_alt_wall(wall)
         if wall not in self.walls and alt_wall not in self.walls:
             self.walls.add(wall)
+            self.update_wall_mask(wall, present=True)
+            self.fingerprint ^= wall_key(wall)
 
     def remove_wall(self, wall: Wall) -> None:
+        self.own_walls()
         alt_wall = self.get_alt_wall(wall)
+        if wall in self.walls or alt_wall in self.walls:
+            self.fingerprint ^= wall_key(wall)
         self.walls.discard(wall)
         self.walls.discard(alt_wall)
+        self.update_wall_mask(wall, present=False)
 
     def paint_corner(self, avenue: int, street: int, color: str) -> None:
+        self.fingerprint ^= color_key(
+            avenue, street, self.corner_colors.get((avenue, street), "")
+        ) ^ color_key(avenue, street, color)
         self.corner_colors[(avenue, street)] = color
+        self.dirty_corners.add((avenue, street))
 
     def corner_color(self, avenue: int, street: int) -> str:
-        if (avenue, street) in self.corner_colors:
-            return self.corner_colors[(avenue, street)]
-        return ""
+        return self.corner_colors.get((avenue, street), "")
+
+    def get_beepers(self) -> dict[tuple[int, int], int]:
+        """Returns the count of beepers on every corner that has at least one."""
+        return {location: count for location, count in self.beepers.items() if count}
+
+    def get_walls(self) -> set[Wall]:
+        """Returns every wall in the world, using only its South or West form."""
+        return {canonical_wall(wall) for wall in self.walls}
+
+    def get_colors(self) -> dict[tuple[int, int], str]:
+        """Returns the color of every corner that has been painted."""
+        return {
+            location: color for location, color in self.corner_colors.items() if color
+        }
 
     def reset_corner(self, avenue: int, street: int) -> None:
+        self.fingerprint ^= beeper_key(
+            avenue, street, self.beepers.get((avenue, street), 0)
+        ) ^ color_key(avenue, street, self.corner_colors.get((avenue, street), ""))
         self.beepers[(avenue, street)] = 0
         self.corner_colors[(avenue, street)] = ""
+        self.dirty_corners.add((avenue, street))
 
     def wall_exists(self, avenue: int, street: int, direction: Direction) -> bool:
         wall = Wall(avenue, street, direction)
         return wall in self.walls
 
+    def wall_blocks(self, avenue: int, street: int, direction: Direction) -> bool:
+        """
+        Returns whether a wall in either representation blocks the given
+        in-bounds corner in the specified direction.
+        """
+        index = (street - 1) * self.num_avenues + avenue - 1
+        return bool(self.wall_mask[index] & DIRECTION_BITS[direction])
+
     def in_bounds(self, avenue: int, street: int) -> bool:
         return 0 < avenue <= self.num_avenues and 0 < street <= self.num_streets
 
     def reset_world(self) -> None:
-        """Reset initial state of beepers in the world"""
-        self.beepers = copy.deepcopy(self.init_beepers)
-        self.corner_colors = {}
+        """
+        Reset initial state of beepers and colors in the world. Only the corners
+        that changed since the last reset are restored.
+        """
+        for location in self.dirty_corners:
+            avenue, street = location
+            count = self.init_beepers.get(location, 0)
+            color = self.init_corner_colors.get(location, "")
+            self.fingerprint ^= (
+                beeper_key(avenue, street, self.beepers.get(location, 0))
+                ^ beeper_key(avenue, street, count)
+                ^ color_key(avenue, street, self.corner_colors.get(location, ""))
+                ^ color_key(avenue, street, color)
+            )
+            if count:
+                self.beepers[location] = count
+            else:
+                self.beepers.pop(location, None)
+            if color:
+                self.corner_colors[location] = color
+            else:
+                self.corner_colors.pop(location, None)
+        self.dirty_corners.clear()
 
     def reload_world(self, filename: str | None = None) -> None:
         """Reloads world using constructor."""
@@ -347,37 +557,10 @@ class KarelWorld:
         self.__init__(filename)  # type: ignore[misc]
 
     def save_to_file(self, filepath: Path) -> None:
-        # First, output dimensions of world
-        output = f"Dimension: ({self.num_avenues}, {self.num_streets})\n"
-
-        # Next, output all walls
-        for wall in sorted(self.walls):
-            output += f"Wall: ({wall.avenue}, {wall.street}); {wall.direction.value}\n"
-
-        # Next, output all beepers
-        for (x, y), count in sorted(self.beepers.items()):
-            output += f"Beeper: ({x}, {y}); {count}\n"
-
-        # Next, output all color information
-        for (x, y), color in sorted(self.corner_colors.items()):
-            if color:
-                output += f"Color: ({x}, {y}); {color}\n"
+        """Saves the world in the format given by the suffix of filepath."""
+        from .world_serializer import save_world  # noqa: PLC0415
 
-        # Next, output Karel information
-        output += (
-            f"Karel: {self.karel_start_location}; {self.karel_start_direction.value}\n"
-        )
-
-        # Finally, output beeperbag info
-        beeper_output = (
-            self.karel_start_beeper_count
-            if self.karel_start_beeper_count >= 0
-            else "INFINITY"
-        )
-        output += f"BeeperBag: {beeper_output}\n"
-
-        with filepath.open("w", encoding="utf-8") as f:
-            f.write(output)
+        save_world(self, filepath)
 
 
 @unique
@@ -403,3 +586,66 @@ class Wall(NamedTuple):
     avenue: int
     street: int
     direction: Direction
+
+
+# Directions by the name used in world files
+DIRECTION_VALUES = {direction.value: direction for direction in Direction}
+
+# Bit used to mark a wall in each direction in KarelWorld.wall_mask
+DIRECTION_BITS = {
+    Direction.EAST: 1,
+    Direction.SOUTH: 2,
+    Direction.WEST: 4,
+    Direction.NORTH: 8,
+}
+# Byte translation tables used to build KarelWorld.clearance from the wall mask
+INVERT_DIRECTION_BITS = bytes(~mask & 0xF for mask in range(256))
+CLEAR_DIRECTION_BIT = {
+    direction: bytes(mask & ~bit for mask in range(256))
+    for direction, bit in DIRECTION_BITS.items()
+}
+
+
+def canonical_wall(wall: Wall) -> Wall:
+    """Returns the South or West form of a wall."""
+    if wall.direction in {Direction.NORTH, Direction.EAST}:
+        return KarelWorld.get_alt_wall(wall)
+    return wall
+
+
+# Kinds of fingerprint keys, mixed into every key so they never collide
+BEEPER_KEY = 0
+COLOR_KEY = 1
+WALL_KEY = 2
+MASK_64 = (1 << 64) - 1
+
+
+def mix_64(value: int) -> int:
+    """The splitmix64 finalizer, which spreads any int over 64 bits."""
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ value >> 30) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ value >> 27) * 0x94D049BB133111EB) & MASK_64
+    return value ^ value >> 31
+
+
+def corner_key(kind: int, avenue: int, street: int, value: int) -> int:
+    return mix_64(mix_64(avenue << 32 ^ street) ^ value << 2 ^ kind)
+
+
+def beeper_key(avenue: int, street: int, count: int) -> int:
+    # Empty corners contribute nothing, however they are stored
+    return corner_key(BEEPER_KEY, avenue, street, count) if count else 0
+
+
+def color_key(avenue: int, street: int, color: str | None) -> int:
+    # crc32 is used instead of hash() so fingerprints match across processes
+    if not color:
+        return 0
+    return corner_key(COLOR_KEY, avenue, street, zlib.crc32(color.encode()))
+
+
+def wall_key(wall: Wall) -> int:
+    wall = canonical_wall(wall)
+    return corner_key(
+        WALL_KEY, wall.avenue, wall.street, DIRECTION_BITS[wall.direction]
+    )
@@ -14,11 +14,11 @@ Date of Creation: 10/1/2019
 """
 
 import sys
-import tkinter as tk
-from pathlib import Path
 
-from .karel_application import KarelApplication
-from .karel_program import KarelProgram
+# Everything else is imported inside run_karel_program() and run_karel_replay(),
+# so that `from stanfordkarel import *` only defines the stubs below. Importing
+# the package must never need tkinter, which tests/headless_test.py checks, and
+# must stay fast, which benchmarks/import_time.py measures.
 
 # The following function definitions are defined as stubs so that IDEs can recognize
 # the function definitions in student code. These names are re-bound upon program
@@ -140,27 +140,45 @@ YELLOW = "Yellow"
 BLANK = ""
 
 
-def run_karel_program(world_file: str = "") -> None:
+def run_karel_program(world_file: str = "", code_file: str = "") -> None:
+    from pathlib import Path  # noqa: PLC0415
+
+    from .karel_program import KarelProgram  # noqa: PLC0415
+    from .student_code import find_student_world  # noqa: PLC0415
+
     # Extract the name of the file the student is executing
-    student_code_file = Path(sys.argv[0])
-
-    # Special case - if filename matches a specified world name,
-    # Set the default world to the world with that name.
-    # I personally recommend removing this functionality completely.
-    if (
-        not world_file
-        and (
-            Path(__file__).absolute().parent
-            / "worlds"
-            / student_code_file.with_suffix(".w").name
-        ).is_file()
-    ):
-        world_file = student_code_file.stem
+    student_code_file = Path(code_file or sys.argv[0])
+    world_file = find_student_world(student_code_file, world_file)
 
     # Create Karel and assign it to live in the newly created world
     karel = KarelProgram(world_file)
 
+    # The GUI is imported here so that headless users of this package
+    # never need tkinter to be installed.
+    import tkinter as tk  # noqa: PLC0415
+
+    from .karel_application import KarelApplication  # noqa: PLC0415
+
     # Initialize root Tk Window and spawn Karel application
     root = tk.Tk()
     app = KarelApplication(karel, student_code_file, master=root)
     app.mainloop()
+
+
+def run_karel_replay(trace_file: str, world_file: str = "") -> None:
+    from pathlib import Path  # noqa: PLC0415
+
+    from .karel_program import KarelProgram  # noqa: PLC0415
+    from .karel_trace import ActionTrace  # noqa: PLC0415
+
+    # Karel must start in the world the trace was recorded in
+    karel = KarelProgram(world_file)
+    trace = ActionTrace.load_from_file(Path(trace_file))
+
+    import tkinter as tk  # noqa: PLC0415
+
+    from .karel_application import KarelApplication  # noqa: PLC0415
+
+    root = tk.Tk()
+    app = KarelApplication(karel, None, master=root, trace=trace)
+    app.mainloop()
@@ -0,0 +1,166 @@
+"""
+This file defines the logic for loading student code from a file and
+binding the Karel commands it uses to a particular KarelProgram. It does
+not depend on tkinter, so it can be used by headless runners and graders.
+
+Original Author: Nicholas Bowman
+Credits: Kylie Jue, Tyler Yep
+License: MIT
+Version: 1.0.0
+Email: nbowman@stanford.edu
+Date of Creation: 10/1/2019
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import inspect
+import traceback as tb
+from pathlib import Path
+from types import FrameType, ModuleType
+from typing import Any, cast
+
+from .karel_program import KarelException, KarelProgram
+from .karel_world import DEFAULT_WORLDS_PATH, WORLD_REGISTRY
+
+# The Karel commands bound in the student's modules
+ACTIONS = ("move", "turn_left", "pick_beeper", "put_beeper", "paint_corner")
+CONDITIONS = (
+    "facing_north",
+    "facing_south",
+    "facing_east",
+    "facing_west",
+    "not_facing_north",
+    "not_facing_south",
+    "not_facing_east",
+    "not_facing_west",
+    "front_is_clear",
+    "beepers_present",
+    "no_beepers_present",
+    "beepers_in_bag",
+    "no_beepers_in_bag",
+    "front_is_blocked",
+    "left_is_blocked",
+    "left_is_clear",
+    "right_is_blocked",
+    "right_is_clear",
+    "corner_color_is",
+)
+
+
+def find_student_world(code_file: Path, world_file: str = "") -> str:
+    """
+    Special case - if no world is given and the student's filename matches one of
+    the provided world names, use the world with that name.
+    I personally recommend removing this functionality completely.
+    """
+    if not world_file and code_file.stem in WORLD_REGISTRY.index(DEFAULT_WORLDS_PATH):
+        return code_file.stem
+    return world_file
+
+
+class StudentModule(ModuleType):
+    move: Any
+    turn_left: Any
+    put_beeper: Any
+    pick_beeper: Any
+    paint_corner: Any
+
+    @staticmethod
+    def main() -> None:
+        raise NotImplementedError
+
+
+class StudentCode:
+    """
+    This process extracts a module from an arbitary file that contains student code.
+    https://stackoverflow.com/questions/67631/how-to-import-a-module-given-the-full-path
+    """
+
+    def __init__(self, code_file: Path) -> None:
+        if not code_file.is_file():
+            raise FileNotFoundError(f"{code_file} could not be found.")
+
+        self.module_name = code_file.stem
+        spec = importlib.util.spec_from_file_location(
+            self.module_name, code_file.resolve()
+        )
+        assert spec is not None
+        try:
+            module_loader = spec.loader
+            assert module_loader is not None
+            mod = cast("StudentModule", importlib.util.module_from_spec(spec))
+            self.mods: list[StudentModule] = [mod]
+            module_loader.exec_module(mod)
+            # Go through attributes to find imported modules
+            for name in dir(mod):
+                module = cast("StudentModule", getattr(mod, name))
+                if isinstance(module, ModuleType):
+                    assert module.__file__ is not None
+                    code_file_path = Path(module.__file__)
+                    # Only execute modules outside of this directory
+                    if code_file_path.parent != Path(__file__).resolve().parent:
+                        self.mods.append(module)
+                        spec = importlib.util.spec_from_file_location(
+                            name, code_file_path.resolve()
+                        )
+                        module_loader.exec_module(module)
+        except SyntaxError as e:
+            # Since we don't start the GUI until after we parse the student's code,
+            # SyntaxErrors behave normally. However, if the syntax error is somehow
+            # not caught at parse time, we should forward the error message to console.
+            print(e)
+            raise
+
+        # Do not proceed if the student has not defined a main function.
+        if not hasattr(self.mods[0], "main"):
+            raise RuntimeError(
+                "Couldn't find the main() function. Are you sure you have one?"
+            )
+
+    def __repr__(self) -> str:
+        return "\n".join([inspect.getsource(mod) for mod in self.mods])
+
+    def inject_namespace(self, karel: KarelProgram) -> None:
+        """
+        This function is responsible for doing some Python hackery
+        that associates the generic commands the student wrote in their
+        file with specific commands relating to the Karel object that exists
+        in the world.
+        """
+        for mod in self.mods:
+            for func in (*ACTIONS, *CONDITIONS):
+                setattr(mod, func, getattr(karel, func))
+
+    def main(self) -> None:
+        try:
+            self.mods[0].main()
+        except Exception as e:
+            if isinstance(e, KarelException | NameError | RuntimeError):
+                self.print_error_traceback(e)
+            raise
+
+    def print_error_traceback(
+        self, e: KarelException | NameError | RuntimeError
+    ) -> None:
+        """Handle runtime errors while executing student code."""
+        display_frames: list[tuple[FrameType, int]] = []
+        # Walk through all the frames in stack trace at time of failure
+        for frame, lineno in tb.walk_tb(e.__traceback__):
+            frame_info = inspect.getframeinfo(frame)
+            # Get the name of the file corresponding to the current frame
+            # Only display frames generated within the student's code
+            if Path(frame_info.filename).name == f"{self.module_name}.py":
+                display_frames.append((frame, lineno))
+
+        display_frames_generator = (frame for frame in display_frames)
+        trace = tb.format_list(tb.StackSummary.extract(display_frames_generator))
+        clean_traceback = "".join(trace).strip()
+        # Only needed once a student's program has crashed
+        from .didyoumean import add_did_you_mean  # noqa: PLC0415
+
+        add_did_you_mean(e)
+        print(
+            f"Traceback (most recent call last):\n{clean_traceback}\n"
+            f"{type(e).__name__}: {e}"
+        )
@@ -16,7 +16,7 @@ from typing import Any
 
 import stanfordkarel
 
-from .karel_application import StudentCode
+from .student_code import StudentCode
 
 
 def style_test(func: Callable[..., bool]) -> Callable[..., bool]:
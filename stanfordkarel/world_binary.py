@@ -0,0 +1,260 @@
+"""
+This file defines a binary format for very large Karel worlds.
+
+Binary worlds are opened with mmap, so a world with millions of corners opens
+without reading its contents: only the pages of the file that Karel visits are
+loaded from disk. The world's current state uses a copy-on-write mapping of the
+file, and its initial state uses a read-only mapping of the same file, so
+running Karel never modifies the file.
+
+All numbers are little-endian. A binary world file contains, in order:
+- HEADER: magic, format version, dimensions, Karel's start location, direction
+  and beeper bag, the initial speed, the world's fingerprint, and the number of
+  colors in the palette
+- the palette: each color name as a length byte followed by UTF-8. Index 0 is
+  the blank color.
+- padding to a multiple of 4 bytes
+- the wall plane: one byte of DIRECTION_BITS per corner, marking both sides of
+  every wall, as in KarelWorld.wall_mask
+- the color plane: one palette index per corner
+- padding to a multiple of 4 bytes
+- the beeper plane: one signed 32-bit beeper count per corner
+
+Planes are in row-major order, as indexed by KarelWorld.corner_index().
+Beepers, colors and walls must be inside the world to be stored.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .karel_world import (
+    COLOR_PALETTE,
+    DIRECTION_BITS,
+    INFINITY,
+    Direction,
+    Wall,
+)
+from .world_storage import DenseBeepers, DenseCornerColors
+
+if TYPE_CHECKING:
+    from .karel_world import KarelWorld
+
+MAGIC = b"KWORLD\x00\n"
+VERSION = 1
+# magic, version, num_avenues, num_streets, Karel's avenue and street, Karel's
+# direction bit, beeper bag (INFINITY is -1), speed, fingerprint, palette size
+HEADER = struct.Struct("<8sHIIIIBiiQB")
+MAX_COLORS = 255
+DIRECTIONS_BY_BIT = {bit: direction for direction, bit in DIRECTION_BITS.items()}
+
+
+def align(offset: int) -> int:
+    return (offset + 3) & ~3
+
+
+def plane_offsets(palette_size: int, num_corners: int) -> tuple[int, int, int, int]:
+    """Returns the offsets of the wall, color and beeper planes, and the file size."""
+    walls = align(palette_size)
+    colors = walls + num_corners
+    beepers = align(colors + num_corners)
+    return walls, colors, beepers, beepers + 4 * num_corners
+
+
+def encode_palette(palette: list[str]) -> bytes:
+    encoded = bytearray()
+    for color in palette:
+        name = color.encode()
+        encoded += bytes((len(name),)) + name
+    return bytes(encoded)
+
+
+def save_binary_world(world: KarelWorld, filepath: Path) -> None:
+    """Writes the initial Karel state and the current contents of a world."""
+    num_corners = world.num_avenues * world.num_streets
+
+    for location in (*world.get_beepers(), *world.get_colors()):
+        if not world.in_bounds(*location):
+            raise ValueError(f"Corner {location} is outside of the world.")
+    for wall in world.walls:
+        alt_wall = world.get_alt_wall(wall)
+        if not (
+            world.in_bounds(wall.avenue, wall.street)
+            or world.in_bounds(alt_wall.avenue, alt_wall.street)
+        ):
+            raise ValueError(f"{wall} is outside of the world.")
+
+    beepers = array("i", bytes(4 * num_corners))
+    for (avenue, street), count in world.get_beepers().items():
+        beepers[world.corner_index(avenue, street)] = count
+    if sys.byteorder == "big":
+        beepers.byteswap()
+
+    palette = list(COLOR_PALETTE)
+    palette_index = {color: i for i, color in enumerate(palette)}
+    colors = bytearray(num_corners)
+    for (avenue, street), color in world.get_colors().items():
+        if color not in palette_index:
+            palette_index[color] = len(palette)
+            palette.append(color)
+        colors[world.corner_index(avenue, street)] = palette_index[color]
+    if len(palette) > MAX_COLORS:
+        raise ValueError(f"A binary world can use at most {MAX_COLORS} colors.")
+
+    avenue, street = world.karel_start_location
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        world.num_avenues,
+        world.num_streets,
+        avenue,
+        street,
+        DIRECTION_BITS[world.karel_start_direction],
+        world.karel_start_beeper_count,
+        world.init_speed,
+        world.fingerprint,
+        len(palette),
+    ) + encode_palette(palette)
+    walls_offset, _, beepers_offset, _ = plane_offsets(len(header), num_corners)
+
+    # The world may be mapped from filepath itself, so write to a temporary file
+    # and replace filepath with it instead of truncating a file that is in use
+    fd, temp_name = tempfile.mkstemp(dir=filepath.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header.ljust(walls_offset, b"\0"))
+            f.write(world.wall_mask)
+            f.write(colors)
+            f.write(bytes(beepers_offset - walls_offset - 2 * num_corners))
+            f.write(beepers)
+        # Windows cannot replace a file that is still mapped
+        if world.mapped_files and world.world_file.resolve() == filepath.resolve():
+            release_binary_world(world)
+        Path(temp_name).replace(filepath)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def load_binary_world(world: KarelWorld, filepath: Path) -> None:
+    """Maps a binary world file into a KarelWorld without reading its planes."""
+    with filepath.open("rb") as f:
+        try:
+            initial = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            current = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except ValueError as e:
+            raise ValueError(f"{filepath} is not a binary Karel world.") from e
+    world.mapped_files = (initial, current)
+
+    if len(initial) < HEADER.size or initial[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{filepath} is not a binary Karel world.")
+    (
+        _,
+        version,
+        num_avenues,
+        num_streets,
+        avenue,
+        street,
+        direction_bit,
+        beeper_bag,
+        speed,
+        fingerprint,
+        palette_size,
+    ) = HEADER.unpack_from(initial)
+    if version != VERSION:
+        raise ValueError(f"{filepath} uses unsupported binary world version {version}.")
+
+    palette = []
+    offset = HEADER.size
+    for _ in range(palette_size):
+        length = initial[offset]
+        palette.append(initial[offset + 1 : offset + 1 + length].decode())
+        offset += 1 + length
+    num_corners = num_avenues * num_streets
+    walls, colors, beepers, size = plane_offsets(offset, num_corners)
+    if len(initial) != size:
+        raise ValueError(f"{filepath} is truncated or has trailing data.")
+
+    world.num_avenues, world.num_streets = num_avenues, num_streets
+    world.karel_start_location = (avenue, street)
+    world.karel_start_direction = DIRECTIONS_BY_BIT[direction_bit]
+    world.karel_start_beeper_count = beeper_bag if beeper_bag >= 0 else INFINITY
+    world.init_speed = speed
+    world.fingerprint = fingerprint
+
+    # Walls are rebuilt from the wall plane the first time they are needed
+    world.wall_mask = memoryview(current)[walls:colors]
+    world.wall_set = None
+    world.clearance = None
+
+    for mapping, attribute in ((initial, "init_"), (current, "")):
+        view = memoryview(mapping)
+        counts = view[beepers:size].cast("i")
+        if sys.byteorder == "big":
+            swapped = array("i", counts.tobytes())
+            swapped.byteswap()
+            counts = memoryview(swapped)
+        setattr(
+            world,
+            f"{attribute}beepers",
+            DenseBeepers.from_buffer(num_avenues, num_streets, counts),
+        )
+        setattr(
+            world,
+            f"{attribute}corner_colors",
+            DenseCornerColors.from_buffer(
+                num_avenues, num_streets, palette, view[colors : colors + num_corners]
+            ),
+        )
+
+
+def release_binary_world(world: KarelWorld) -> None:
+    """
+    Copies the contents of a binary world into memory and closes the maps of
+    its file. Forks of the world still use the maps, which then stay open
+    until the forks are gone.
+    """
+    world.wall_mask = bytearray(world.wall_mask)
+    world.beepers = copy.copy(world.beepers)
+    world.corner_colors = copy.copy(world.corner_colors)
+    world.init_beepers = copy.copy(world.init_beepers)
+    world.init_corner_colors = copy.copy(world.init_corner_colors)
+    for mapped_file in world.mapped_files:
+        with contextlib.suppress(BufferError):
+            mapped_file.close()
+    world.mapped_files = ()
+
+
+def walls_from_mask(world: KarelWorld) -> set[Wall]:
+    """
+    Returns the walls marked in a world's wall mask. Walls between two corners
+    are returned in their South or West form, and walls on the edge of the world
+    in the form that is inside the world.
+    """
+    walls = set()
+    num_avenues, num_streets = world.num_avenues, world.num_streets
+    south, west = DIRECTION_BITS[Direction.SOUTH], DIRECTION_BITS[Direction.WEST]
+    north, east = DIRECTION_BITS[Direction.NORTH], DIRECTION_BITS[Direction.EAST]
+    for index, mask in enumerate(world.wall_mask):
+        if not mask:
+            continue
+        street, avenue = divmod(index, num_avenues)
+        avenue, street = avenue + 1, street + 1
+        if mask & south:
+            walls.add(Wall(avenue, street, Direction.SOUTH))
+        if mask & west:
+            walls.add(Wall(avenue, street, Direction.WEST))
+        if mask & north and street == num_streets:
+            walls.add(Wall(avenue, street, Direction.NORTH))
+        if mask & east and avenue == num_avenues:
+            walls.add(Wall(avenue, street, Direction.EAST))
+    return walls
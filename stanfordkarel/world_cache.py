@@ -0,0 +1,102 @@
+"""
+This file defines an on-disk cache of parsed Karel worlds.
+
+Parsing a world file means splitting and matching every line of text. The result
+of a parse is a small tuple of ints and strings, which is saved with marshal in a
+user cache directory, so later loads of the same world skip parsing entirely.
+
+A cache entry is found by the absolute path of its world file and stores the
+file's modification time, size and SHA-256 digest. An entry is used if the
+modification time and size are unchanged, or if the contents still hash to the
+same digest. Otherwise the world is parsed again and the entry is replaced.
+
+The cache directory can be set with the STANFORDKAREL_CACHE_DIR environment
+variable. Setting it to an empty string disables the cache.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+CACHE_DIR_VARIABLE = "STANFORDKAREL_CACHE_DIR"
+# Bump when the layout of cached worlds changes. marshal's format can change
+# between Python versions, so entries are also specific to the interpreter.
+CACHE_VERSION = 2
+CACHE_KEY = (CACHE_VERSION, *sys.version_info[:2])
+
+
+def cache_dir() -> Path | None:
+    """Returns the directory to store parsed worlds in, or None if disabled."""
+    configured = os.environ.get(CACHE_DIR_VARIABLE)
+    if configured is not None:
+        return Path(configured) if configured else None
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData/Local"))
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library/Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return base / "stanfordkarel"
+
+
+def cache_path(world_file: Path) -> Path | None:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    key = hashlib.sha256(str(world_file.resolve()).encode()).hexdigest()
+    return directory / f"{key[:32]}.world"
+
+
+def file_digest(world_file: Path) -> bytes:
+    return hashlib.sha256(world_file.read_bytes()).digest()
+
+
+def load(world_file: Path) -> Any:
+    """Returns the cached parse of world_file, or None if it must be parsed."""
+    path = cache_path(world_file)
+    if path is None:
+        return None
+    try:
+        stat = world_file.stat()
+        # Entries are only written by store(), in the user's own cache directory
+        key, mtime_ns, size, digest, data = marshal.loads(path.read_bytes())  # noqa: S302
+        if key != CACHE_KEY:
+            return None
+        if (mtime_ns, size) == (stat.st_mtime_ns, stat.st_size):
+            return data
+        # The file was touched, but its contents may not have changed
+        if size == stat.st_size and file_digest(world_file) == digest:
+            store(world_file, data, digest)
+            return data
+    # A missing, unreadable or corrupt entry is the same as no entry
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return None
+
+
+def store(world_file: Path, data: Any, digest: bytes | None = None) -> None:
+    """Saves the parse of world_file. Failing to write the cache is not an error."""
+    path = cache_path(world_file)
+    if path is None:
+        return
+    with contextlib.suppress(OSError):
+        stat = world_file.stat()
+        digest = digest or file_digest(world_file)
+        entry = marshal.dumps((CACHE_KEY, stat.st_mtime_ns, stat.st_size, digest, data))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so other processes never see half an entry
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(entry)
+            Path(temp_name).replace(path)
+        except OSError:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
@@ -134,9 +134,9 @@ class WorldBuilderApplication(tk.Frame):
             self.world.reload_world()
             self.karel.reset_state()
 
-        self.world.num_avenues = num_avenues
-        self.world.num_streets = num_streets
+        self.world.set_dimensions(num_avenues, num_streets)
         if not init:
+            self.canvas.reset_view()
             self.canvas.redraw_all()
 
     def load_world(self, init: bool = False) -> None:
@@ -159,6 +159,7 @@ class WorldBuilderApplication(tk.Frame):
         else:
             self.world.reload_world(filename)
             self.karel.reset_state()
+            self.canvas.reset_view()
             self.canvas.redraw_all()
             self.reset_direction_radio_buttons()
             self.reset_beeper_bag_radio_buttons()
@@ -382,18 +383,15 @@ class WorldBuilderApplication(tk.Frame):
             ):
                 self.last_action_event_loc = (avenue, street)
                 fn(avenue, street, *args)
-                self.canvas.redraw_corners(update=False)
-                self.canvas.redraw_beepers(update=False)
-                self.canvas.redraw_walls(update=False)
-                self.canvas.redraw_karel()
+                self.canvas.redraw_cell(avenue, street)
 
         event_type = event.type
         # only handle click events that happen in the world
         if not self.canvas.click_in_world(event.x, event.y):
             return
 
-        avenue, street = self.canvas.calculate_location(event.x, event.y)
-        avenue, street = int(avenue), int(street)
+        x, y = self.canvas.calculate_location(event.x, event.y)
+        avenue, street = int(x), int(y)
         action = self.action_var.get()
         if action == "move_karel":
             if avenue != self.karel.avenue or street != self.karel.street:
@@ -0,0 +1,381 @@
+"""
+This file defines the parser for Karel world files.
+
+A world file has one entry per line, in the format KEYWORD: PARAMETERS, with
+parameters separated by semicolons. The keywords are described in karel_world.py.
+
+Every line is read exactly once. The common `Keyword: (avenue, street); value` form
+is matched by a single compiled pattern, and any other line is tokenized one
+parameter at a time. Problems do not stop the parser: each one is recorded with
+its line and column, and all of them are raised together in a WorldFileError
+once the whole file has been read.
+
+Worlds can be parsed from any stream of lines, e.g. an open file, a string, or a
+gzip-compressed `.w.gz` file. Worlds saved in the JSON schema written by
+world_serializer.py (`.json` or `.json.gz`) are parsed into the same ParsedWorld.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import re
+from typing import IO, TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Mapping
+    from pathlib import Path
+
+# Fast path for the most common lines, e.g. "Beeper: (3, 4); 1" or "Wall: (2, 2); west"
+ENTRY_PATTERN = re.compile(
+    r"\s*([A-Za-z]+)\s*:\s*\(\s*(\d+)\s*,\s*(\d+)\s*\)\s*;\s*([A-Za-z]+|\d+)\s*$"
+)
+KEYWORD_PATTERN = re.compile(r"\s*([A-Za-z]*)\s*:")
+PARAMETER_PATTERN = re.compile(
+    r"""\s*(?P<parameter>
+        \(\s*(?P<avenue>\d+)\s*,\s*(?P<street>\d+)\s*\)
+        | (?P<number>\d+(?:\.\d*)?|\.\d+)
+        | (?P<word>[A-Za-z][A-Za-z0-9]*(?:[ \t]+[A-Za-z][A-Za-z0-9]*)*)
+    )\s*(?:;|$)""",
+    re.VERBOSE,
+)
+INFINITE_WORDS = frozenset(("infinity", "infinite"))
+
+# Identifies worlds saved in the JSON schema, and the schema version they use
+JSON_FORMAT = "stanfordkarel-world"
+JSON_VERSION = 1
+JSON_SUFFIXES = (".json", ".json.gz")
+
+# The parameters each keyword must have, and how to describe a missing one
+REQUIRED_PARAMETERS = {
+    "dimension": ("location",),
+    "wall": ("location", "direction"),
+    "beeper": ("location", "count"),
+    "karel": ("location", "direction"),
+    "beeperbag": ("count",),
+    "speed": ("count",),
+    "color": ("location", "color"),
+}
+PARAMETER_DESCRIPTIONS = {
+    "location": "an (avenue, street) location",
+    "direction": "a direction",
+    "count": "a number",
+    "color": "a color",
+}
+
+
+class ParseError(NamedTuple):
+    line: int
+    column: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"line {self.line}, column {self.column}: {self.message}"
+
+
+class WorldFileError(ValueError):
+    """Raised with every error found in a world file."""
+
+    def __init__(self, source: str, errors: list[ParseError]) -> None:
+        super().__init__(source, errors)
+        self.source = source
+        self.errors = errors
+
+    def __str__(self) -> str:
+        return "\n".join(
+            [
+                f"Found {len(self.errors)} error(s) in world file {self.source}:",
+                *(f"  {error}" for error in self.errors),
+            ]
+        )
+
+
+class ParsedWorld(NamedTuple):
+    """
+    The contents of a world file, with the file format's defaults for anything
+    the file leaves out. Directions are lowercase direction names, and a beeper
+    bag of None is infinite. Only plain values are used, so that a ParsedWorld
+    can be stored in the world cache.
+    """
+
+    num_avenues: int
+    num_streets: int
+    walls: list[tuple[int, int, str]]
+    beepers: dict[tuple[int, int], int]
+    corner_colors: dict[tuple[int, int], str]
+    karel_location: tuple[int, int]
+    karel_direction: str
+    beeper_bag: int | None
+    speed: int | None
+
+
+def parse_world(
+    lines: Iterable[str],
+    directions: Collection[str],
+    colors: Mapping[str, str],
+    source: str = "<world>",
+) -> ParsedWorld:
+    """
+    Parses the lines of a world file. directions are the valid direction names,
+    and colors maps valid color names to their Tk colors; either is accepted in
+    a world file. Lines that are not entries are reported and skipped.
+    Raises a WorldFileError listing every invalid entry.
+    """
+    color_names = color_lookup(colors)
+    num_avenues = num_streets = 1
+    walls: list[tuple[int, int, str]] = []
+    beepers: dict[tuple[int, int], int] = {}
+    corner_colors: dict[tuple[int, int], str] = {}
+    karel_location, karel_direction = (1, 1), "east"
+    beeper_bag: int | None = 0
+    speed: int | None = None
+    errors: list[ParseError] = []
+
+    for line_number, raw_line in enumerate(lines, start=1):
+        # Fast path: wall and beeper entries make up almost all of a large world
+        entry = ENTRY_PATTERN.match(raw_line)
+        if entry is not None:
+            keyword, avenue, street, value = entry.groups()
+            keyword = keyword.lower()
+            if keyword == "beeper" and value.isdigit():
+                location = (int(avenue), int(street))
+                beepers[location] = beepers.get(location, 0) + int(value)
+                continue
+            value = value.lower()
+            if keyword == "wall" and value in directions:
+                walls.append((int(avenue), int(street), value))
+                continue
+
+        line = raw_line.rstrip()
+
+        match = KEYWORD_PATTERN.match(line)
+        if match is None:
+            if line:
+                print(f"Incorrectly formatted - ignoring line {line_number}: {line}")
+            continue
+        keyword = match[1].lower()
+        if keyword not in REQUIRED_PARAMETERS:
+            print(f"Invalid keyword - ignoring line {line_number}: {line}")
+            continue
+
+        # The parameters found on this line, and their values
+        found: set[str] = set()
+        location, direction, color, count, infinite = (0, 0), "", "", 0, False
+        location_column = 0
+        position = match.end()
+        while position < len(line):
+            token = PARAMETER_PATTERN.match(line, position)
+            if token is None:
+                bad_text = line[position:].split(";", 1)[0].strip()
+                column = line.index(bad_text, position) + 1 if bad_text else position
+                errors.append(
+                    ParseError(line_number, column, f"invalid parameter {bad_text!r}")
+                )
+                break
+
+            column = token.start("parameter") + 1
+            position = token.end()
+            if token["avenue"] is not None:
+                location = (int(token["avenue"]), int(token["street"]))
+                location_column = column
+                found.add("location")
+            elif token["number"] is not None:
+                number = token["number"]
+                if keyword == "speed":
+                    count = int(100 * float(number))
+                elif number.isdigit():
+                    count = int(number)
+                else:
+                    message = f"{number} is not a whole number"
+                    errors.append(ParseError(line_number, column, message))
+                    continue
+                found.add("count")
+            else:
+                word = token["word"].lower()
+                if word in directions:
+                    direction = word
+                    found.add("direction")
+                elif keyword == "color" and word in color_names:
+                    color = color_names[word]
+                    found.add("color")
+                elif keyword == "beeperbag" and word in INFINITE_WORDS:
+                    infinite = True
+                    found.add("count")
+                else:
+                    message = f"{token['word']!r} is not a valid {keyword} parameter"
+                    errors.append(ParseError(line_number, column, message))
+
+        missing = [
+            PARAMETER_DESCRIPTIONS[name]
+            for name in REQUIRED_PARAMETERS[keyword]
+            if name not in found
+        ]
+        if missing:
+            message = f"{keyword} entry is missing {' and '.join(missing)}"
+            errors.append(ParseError(line_number, len(line) + 1, message))
+        elif keyword == "dimension":
+            if min(location) < 1:
+                message = f"dimension {location} must be at least (1, 1)"
+                errors.append(ParseError(line_number, location_column, message))
+            else:
+                num_avenues, num_streets = location
+        elif keyword == "wall":
+            walls.append((*location, direction))
+        elif keyword == "beeper":
+            beepers[location] = beepers.get(location, 0) + count
+        elif keyword == "karel":
+            karel_location, karel_direction = location, direction
+        elif keyword == "beeperbag":
+            beeper_bag = None if infinite else count
+        elif keyword == "speed":
+            speed = count
+        elif keyword == "color":
+            corner_colors[location] = color
+
+    if errors:
+        raise WorldFileError(source, errors)
+    return ParsedWorld(
+        num_avenues,
+        num_streets,
+        walls,
+        beepers,
+        corner_colors,
+        karel_location,
+        karel_direction,
+        beeper_bag,
+        speed,
+    )
+
+
+def color_lookup(colors: Mapping[str, str]) -> dict[str, str]:
+    """Maps lowercase color names, and the Tk colors they draw, to color names."""
+    # Tk color names such as "gray80" are accepted as the color they draw
+    color_names = {name.lower(): name for name in colors}
+    color_names.update((tk_color, name) for name, tk_color in colors.items())
+    return color_names
+
+
+def parse_world_json(
+    f: IO[str],
+    directions: Collection[str],
+    colors: Mapping[str, str],
+    source: str = "<world>",
+) -> ParsedWorld:
+    """
+    Parses a world saved in the JSON schema. Raises a WorldFileError if the file
+    is not valid JSON, and a ValueError listing every entry that does not match
+    the schema.
+    """
+    try:
+        data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise WorldFileError(source, [ParseError(e.lineno, e.colno, e.msg)]) from e
+    if not isinstance(data, dict) or data.get("format") != JSON_FORMAT:
+        raise ValueError(f"{source} is not a Karel world in the JSON schema.")
+    if data.get("version") != JSON_VERSION:
+        raise ValueError(f"{source} uses unsupported version {data.get('version')}.")
+
+    color_names = color_lookup(colors)
+    errors: list[str] = []
+
+    def is_count(value: Any) -> bool:
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+    def location(name: str, value: Any) -> tuple[int, int]:
+        if (
+            isinstance(value, list)
+            and len(value) == 2
+            and all(is_count(part) for part in value)
+        ):
+            return value[0], value[1]
+        errors.append(f"{name} must be an [avenue, street] location")
+        return 1, 1
+
+    def records(name: str) -> list[tuple[tuple[int, int], Any]]:
+        entries = data.get(name, [])
+        if not isinstance(entries, list):
+            errors.append(f"{name} must be a list")
+            return []
+        valid = []
+        for i, entry in enumerate(entries):
+            if isinstance(entry, list) and len(entry) == 3:
+                valid.append((location(f"{name}[{i}]", entry[:2]), entry[2]))
+            else:
+                errors.append(f"{name}[{i}] must be [avenue, street, value]")
+        return valid
+
+    num_avenues, num_streets = location("dimensions", data.get("dimensions"))
+    if min(num_avenues, num_streets) < 1:
+        errors.append(f"dimensions must be at least [1, 1]: {data['dimensions']!r}")
+    walls = []
+    for i, ((avenue, street), direction) in enumerate(records("walls")):
+        if isinstance(direction, str) and direction in directions:
+            walls.append((avenue, street, direction))
+        else:
+            errors.append(f"walls[{i}] has invalid direction {direction!r}")
+    beepers: dict[tuple[int, int], int] = {}
+    for i, (corner, count) in enumerate(records("beepers")):
+        if is_count(count):
+            beepers[corner] = beepers.get(corner, 0) + count
+        else:
+            errors.append(f"beepers[{i}] has invalid count {count!r}")
+    corner_colors = {}
+    for i, (corner, color) in enumerate(records("colors")):
+        if isinstance(color, str) and color.lower() in color_names:
+            corner_colors[corner] = color_names[color.lower()]
+        else:
+            errors.append(f"colors[{i}] has invalid color {color!r}")
+
+    karel = data.get("karel", {})
+    if not isinstance(karel, dict):
+        errors.append("karel must be an object")
+        karel = {}
+    karel_location = location("karel.location", karel.get("location", [1, 1]))
+    karel_direction = karel.get("direction", "east")
+    if not isinstance(karel_direction, str) or karel_direction not in directions:
+        errors.append(f"karel.direction is invalid: {karel_direction!r}")
+    beeper_bag = karel.get("beeper_bag", 0)
+    if beeper_bag is not None and not is_count(beeper_bag):
+        errors.append(f"karel.beeper_bag is invalid: {beeper_bag!r}")
+    speed = data.get("speed")
+    if speed is not None and not is_count(speed):
+        errors.append(f"speed is invalid: {speed!r}")
+
+    if errors:
+        raise ValueError(
+            "\n".join([f"Invalid world file {source}:", *(f"  {e}" for e in errors)])
+        )
+    return ParsedWorld(
+        num_avenues,
+        num_streets,
+        walls,
+        beepers,
+        corner_colors,
+        karel_location,
+        karel_direction,
+        beeper_bag,
+        speed,
+    )
+
+
+def open_world_file(path: Path) -> IO[str]:
+    """Opens a world file as text, decompressing it if it ends in .gz."""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    return path.open(encoding="utf-8")
+
+
+def parse_world_file(
+    path: Path, directions: Collection[str], colors: Mapping[str, str]
+) -> ParsedWorld:
+    with open_world_file(path) as f:
+        if path.name.endswith(JSON_SUFFIXES):
+            return parse_world_json(f, directions, colors, str(path))
+        return parse_world(f, directions, colors, str(path))
+
+
+def parse_world_string(
+    text: str, directions: Collection[str], colors: Mapping[str, str]
+) -> ParsedWorld:
+    return parse_world(io.StringIO(text), directions, colors, "<string>")
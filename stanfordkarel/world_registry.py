@@ -0,0 +1,101 @@
+"""
+This file defines the index used to find Karel worlds by name.
+
+A world's name is its file name without the suffix, e.g. `worlds/maze.w` is the
+world "maze". Instead of probing the filesystem for every possible file name
+whenever a world is loaded, a WorldRegistry lists each of its directories once
+and keeps a name to path index in memory. Adding, removing or renaming a file
+changes the modification time of its directory, so a directory is only listed
+again when its modification time changes, and a lookup costs one stat() per
+directory searched.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+
+class DirectoryIndex(NamedTuple):
+    mtime_ns: int
+    worlds: dict[str, Path]
+
+
+class WorldRegistry:
+    """
+    Finds worlds by name in a list of directories, which are searched in order,
+    followed by the default directory. Relative directories are relative to the
+    current working directory at the time of each lookup.
+    """
+
+    def __init__(
+        self,
+        suffixes: Sequence[str],
+        directories: Iterable[Path],
+        default_directory: Path,
+    ) -> None:
+        # World file suffixes, in order of preference when names collide
+        self.suffixes = tuple(suffixes)
+        self.directories = list(directories)
+        self.default_directory = default_directory
+        self.indexes: dict[str, DirectoryIndex] = {}
+
+    def register(self, directory: Path | str) -> None:
+        """Searches directory for worlds after the directories already registered."""
+        directory = Path(directory)
+        if directory not in self.directories:
+            self.directories.append(directory)
+
+    def index(self, directory: Path) -> dict[str, Path]:
+        """Returns the worlds in directory by name, listing it again if it changed."""
+        # Paths are slow to build, so indexes are keyed by plain strings
+        key = os.path.join(os.getcwd(), directory)  # noqa: PTH109, PTH118
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns  # noqa: PTH116
+        except OSError:
+            self.indexes.pop(key, None)
+            return {}
+        cached = self.indexes.get(key)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached.worlds
+
+        worlds: dict[str, Path] = {}
+        preference: dict[str, int] = {}
+        with os.scandir(key) as entries:
+            for entry in entries:
+                for rank, suffix in enumerate(self.suffixes):
+                    if entry.name.endswith(suffix) and entry.is_file():
+                        name = entry.name[: -len(suffix)]
+                        if rank < preference.get(name, len(self.suffixes)):
+                            preference[name] = rank
+                            worlds[name] = directory / entry.name
+                        break
+        self.indexes[key] = DirectoryIndex(mtime_ns, worlds)
+        return worlds
+
+    def find(self, name: str) -> Path | None:
+        """Returns the file of the first world called name, or None if there is none."""
+        for directory in (*self.directories, self.default_directory):
+            path = self.index(directory).get(name)
+            if path is not None:
+                return path
+        return None
+
+    def default_worlds(self) -> list[str]:
+        """Returns the names of the worlds in the default directory, sorted."""
+        return sorted(self.index(self.default_directory))
+
+    def available_worlds(self) -> list[str]:
+        """Returns the names of every world that find() can return, sorted."""
+        names: set[str] = set()
+        for directory in (*self.directories, self.default_directory):
+            names.update(self.index(directory))
+        return sorted(names)
+
+    def clear(self) -> None:
+        """Forgets every index, so each directory is listed again on its next use."""
+        self.indexes.clear()
@@ -0,0 +1,148 @@
+"""
+This file defines how Karel worlds are written to disk.
+
+Every format is streamed to a buffered file in batches of records, so saving a
+world never builds its whole output as one string. The format is chosen by the
+file name:
+- `.w`: the text world file format described in karel_world.py
+- `.json`: the JSON schema read by world_parser.parse_world_json()
+- `.w.gz`, `.json.gz`: either of the above, gzip-compressed
+- `.kw`: the memory-mapped binary format defined in world_binary.py
+
+The JSON schema is an object with the keys format (always
+"stanfordkarel-world"), version, dimensions ([avenues, streets]), karel
+(location, direction and beeper_bag, where a null beeper_bag is infinite), speed,
+and walls, beepers and colors, which are lists of [avenue, street, value]
+records.
+
+Compressed files are written without a timestamp, so saving the same world
+twice produces identical files.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+from typing import IO, TYPE_CHECKING
+
+from .karel_world import BINARY_WORLD_SUFFIX, INFINITY
+from .world_binary import save_binary_world
+from .world_parser import JSON_FORMAT, JSON_SUFFIXES, JSON_VERSION
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
+    from pathlib import Path
+
+    from .karel_world import KarelWorld
+
+# Records are formatted and written in batches of this many
+BATCH_SIZE = 4096
+# zlib's default level, which is several times faster than gzip's default of 9
+COMPRESS_LEVEL = 6
+
+
+def sorted_walls(world: KarelWorld) -> list[tuple[int, int, str]]:
+    # Sorting plain tuples is much faster than sorting Walls, whose Directions are
+    # compared in Python, and gives the same order
+    return sorted(
+        (avenue, street, direction.value) for avenue, street, direction in world.walls
+    )
+
+
+def sorted_corners(
+    corners: Mapping[tuple[int, int], object],
+) -> list[tuple[int, int, object]]:
+    """Returns (avenue, street, value) for every non-empty corner, in order."""
+    return sorted(
+        (avenue, street, value) for (avenue, street), value in corners.items() if value
+    )
+
+
+def write_records(
+    f: IO[str],
+    template: str,
+    records: Sequence[tuple[object, ...]],
+    separator: str = "",
+) -> None:
+    """Writes each record formatted with template, joined by separator, in batches."""
+    for start in range(0, len(records), BATCH_SIZE):
+        if start:
+            f.write(separator)
+        f.write(
+            separator.join(
+                [
+                    template.format(*record)
+                    for record in records[start : start + BATCH_SIZE]
+                ]
+            )
+        )
+
+
+def write_world(world: KarelWorld, f: IO[str]) -> None:
+    """
+    Writes a world in the text world file format. Corners without beepers are
+    left out, even where a corner was reset, which older versions wrote as a
+    count of 0. Both load as the same world.
+    """
+    f.write(f"Dimension: ({world.num_avenues}, {world.num_streets})\n")
+    write_records(f, "Wall: ({}, {}); {}\n", sorted_walls(world))
+    write_records(f, "Beeper: ({}, {}); {}\n", sorted_corners(world.beepers))
+    write_records(f, "Color: ({}, {}); {}\n", sorted_corners(world.corner_colors))
+    f.write(
+        f"Karel: {world.karel_start_location}; {world.karel_start_direction.value}\n"
+    )
+    beeper_bag = world.karel_start_beeper_count
+    f.write(f"BeeperBag: {beeper_bag if beeper_bag >= 0 else 'INFINITY'}\n")
+
+
+def write_world_json(world: KarelWorld, f: IO[str]) -> None:
+    """Writes a world in the JSON schema, with one wall, beeper or color per line."""
+    beeper_bag = world.karel_start_beeper_count
+    karel = {
+        "location": list(world.karel_start_location),
+        "direction": world.karel_start_direction.value,
+        "beeper_bag": None if beeper_bag == INFINITY else beeper_bag,
+    }
+    f.write(
+        "{\n"
+        f'  "format": "{JSON_FORMAT}",\n'
+        f'  "version": {JSON_VERSION},\n'
+        f'  "dimensions": [{world.num_avenues}, {world.num_streets}],\n'
+        f'  "karel": {json.dumps(karel)},\n'
+        f'  "speed": {world.init_speed},\n'
+        '  "walls": [\n'
+    )
+    write_records(f, '    [{}, {}, "{}"]', sorted_walls(world), ",\n")
+    f.write('\n  ],\n  "beepers": [\n')
+    write_records(f, "    [{}, {}, {}]", sorted_corners(world.beepers), ",\n")
+    f.write('\n  ],\n  "colors": [\n')
+    colors = [
+        (avenue, street, json.dumps(color))
+        for avenue, street, color in sorted_corners(world.corner_colors)
+    ]
+    write_records(f, "    [{}, {}, {}]", colors, ",\n")
+    f.write("\n  ]\n}\n")
+
+
+def open_output(filepath: Path) -> IO[str]:
+    """Opens a file to write a world to as text, compressing it if it ends in .gz."""
+    if filepath.suffix == ".gz":
+        compressed = gzip.GzipFile(
+            filepath, "wb", compresslevel=COMPRESS_LEVEL, mtime=0
+        )
+        return io.TextIOWrapper(compressed, encoding="utf-8")
+    return filepath.open("w", encoding="utf-8")
+
+
+def save_world(world: KarelWorld, filepath: Path) -> None:
+    """Saves a world in the format given by the suffix of filepath."""
+    if filepath.suffix == BINARY_WORLD_SUFFIX:
+        save_binary_world(world, filepath)
+        return
+
+    with open_output(filepath) as f:
+        if filepath.name.endswith(JSON_SUFFIXES):
+            write_world_json(world, f)
+        else:
+            write_world(world, f)
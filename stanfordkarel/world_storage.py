@@ -0,0 +1,256 @@
+"""
+This file defines dense storage for the beepers and corner colors of large
+Karel worlds. Instead of a dict entry with a tuple key for every corner that has
+ever been touched, each corner gets one slot in a flat array:
+
+- DenseBeepers stores beeper counts in an array('i'), 4 bytes per corner.
+- DenseCornerColors stores indices into a color palette in an array('B'),
+  1 byte per corner. Index 0 is always the blank color.
+
+Both behave like the dicts they replace: the keys are (avenue, street) tuples of
+corners with a non-zero beeper count or a non-blank color, and storing 0 or ""
+clears a corner. Either can also be built on top of an existing buffer, such as a
+memory-mapped binary world file, with from_buffer().
+
+This file also defines CornerOverlay, the copy-on-write storage of forked worlds.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Mapping, MutableMapping
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+V = TypeVar("V", int, str)
+
+
+class DenseGrid:
+    """Maps (avenue, street) locations to positions in a flat row-major array."""
+
+    def __init__(self, num_avenues: int, num_streets: int) -> None:
+        self.num_avenues = num_avenues
+        self.num_streets = num_streets
+        self.num_corners = num_avenues * num_streets
+
+    def index(self, location: tuple[int, int]) -> int:
+        avenue, street = location
+        if not (0 < avenue <= self.num_avenues and 0 < street <= self.num_streets):
+            raise KeyError(location)
+        return (street - 1) * self.num_avenues + avenue - 1
+
+    def location(self, index: int) -> tuple[int, int]:
+        street, avenue = divmod(index, self.num_avenues)
+        return avenue + 1, street + 1
+
+
+class DenseBeepers(DenseGrid, MutableMapping[tuple[int, int], int]):
+    def __init__(
+        self,
+        num_avenues: int,
+        num_streets: int,
+        beepers: Mapping[tuple[int, int], int] | None = None,
+    ) -> None:
+        super().__init__(num_avenues, num_streets)
+        self.counts: array[int] | memoryview = array("i", bytes(4 * self.num_corners))
+        for location, count in (beepers or {}).items():
+            self[location] = count
+
+    @classmethod
+    def from_buffer(
+        cls, num_avenues: int, num_streets: int, counts: memoryview
+    ) -> DenseBeepers:
+        """Uses a buffer of one int per corner, without copying it."""
+        beepers = cls(0, 0)
+        DenseGrid.__init__(beepers, num_avenues, num_streets)
+        beepers.counts = counts
+        return beepers
+
+    def __getitem__(self, location: tuple[int, int]) -> int:
+        count = self.counts[self.index(location)]
+        if count == 0:
+            raise KeyError(location)
+        return count
+
+    def get(self, location: tuple[int, int], default: int = 0) -> int:  # type: ignore[override]
+        avenue, street = location
+        if 0 < avenue <= self.num_avenues and 0 < street <= self.num_streets:
+            return self.counts[(street - 1) * self.num_avenues + avenue - 1] or default
+        return default
+
+    def __setitem__(self, location: tuple[int, int], count: int) -> None:
+        self.counts[self.index(location)] = count
+
+    def __delitem__(self, location: tuple[int, int]) -> None:
+        index = self.index(location)
+        if self.counts[index] == 0:
+            raise KeyError(location)
+        self.counts[index] = 0
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for index, count in enumerate(self.counts):
+            if count:
+                yield self.location(index)
+
+    def items(self) -> Iterator[tuple[tuple[int, int], int]]:  # type: ignore[override]
+        for index, count in enumerate(self.counts):
+            if count:
+                yield self.location(index), count
+
+    def __len__(self) -> int:
+        return self.num_corners - self.counts.tolist().count(0)
+
+    def clear(self) -> None:
+        self.counts = array("i", bytes(4 * self.num_corners))
+
+    def __copy__(self) -> DenseBeepers:
+        clone = object.__new__(DenseBeepers)
+        clone.__dict__.update(self.__dict__)
+        # Slicing a buffer would share it, so the counts are always copied
+        clone.counts = array("i", bytes(self.counts))
+        return clone
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())})"
+
+
+class DenseCornerColors(DenseGrid, MutableMapping[tuple[int, int], str]):
+    def __init__(
+        self,
+        num_avenues: int,
+        num_streets: int,
+        palette: Sequence[str],
+        corner_colors: Mapping[tuple[int, int], str] | None = None,
+    ) -> None:
+        super().__init__(num_avenues, num_streets)
+        self.palette = palette
+        self.palette_index = {color: i for i, color in enumerate(palette)}
+        self.colors: array[int] | memoryview = array("B", bytes(self.num_corners))
+        for location, color in (corner_colors or {}).items():
+            self[location] = color
+
+    @classmethod
+    def from_buffer(
+        cls,
+        num_avenues: int,
+        num_streets: int,
+        palette: Sequence[str],
+        colors: memoryview,
+    ) -> DenseCornerColors:
+        """Uses a buffer of one palette index per corner, without copying it."""
+        corner_colors = cls(0, 0, palette)
+        DenseGrid.__init__(corner_colors, num_avenues, num_streets)
+        corner_colors.colors = colors
+        return corner_colors
+
+    def __getitem__(self, location: tuple[int, int]) -> str:
+        color_index = self.colors[self.index(location)]
+        if color_index == 0:
+            raise KeyError(location)
+        return self.palette[color_index]
+
+    def get(self, location: tuple[int, int], default: str = "") -> str:  # type: ignore[override]
+        avenue, street = location
+        if 0 < avenue <= self.num_avenues and 0 < street <= self.num_streets:
+            color_index = self.colors[(street - 1) * self.num_avenues + avenue - 1]
+            return self.palette[color_index] if color_index else default
+        return default
+
+    def __setitem__(self, location: tuple[int, int], color: str | None) -> None:
+        # Blank and None both clear the corner
+        self.colors[self.index(location)] = self.palette_index[color] if color else 0
+
+    def __delitem__(self, location: tuple[int, int]) -> None:
+        index = self.index(location)
+        if self.colors[index] == 0:
+            raise KeyError(location)
+        self.colors[index] = 0
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for index, color_index in enumerate(self.colors):
+            if color_index:
+                yield self.location(index)
+
+    def items(self) -> Iterator[tuple[tuple[int, int], str]]:  # type: ignore[override]
+        palette = self.palette
+        for index, color_index in enumerate(self.colors):
+            if color_index:
+                yield self.location(index), palette[color_index]
+
+    def __len__(self) -> int:
+        return self.num_corners - bytes(self.colors).count(0)
+
+    def clear(self) -> None:
+        self.colors = array("B", bytes(self.num_corners))
+
+    def __copy__(self) -> DenseCornerColors:
+        clone = object.__new__(DenseCornerColors)
+        clone.__dict__.update(self.__dict__)
+        clone.colors = array("B", bytes(self.colors))
+        return clone
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())})"
+
+
+class CornerOverlay(MutableMapping[tuple[int, int], V]):
+    """
+    A copy-on-write view of a base mapping that is shared with other worlds.
+    Reads fall through to the base, and writes are kept in a dict of changes, so
+    the base is never modified. Storing the empty value (0 or "") clears a corner.
+    """
+
+    def __init__(
+        self,
+        base: Mapping[tuple[int, int], V],
+        empty: V,
+        changes: dict[tuple[int, int], V] | None = None,
+    ) -> None:
+        self.base: Mapping[tuple[int, int], V] = base
+        self.empty: V = empty
+        self.changes: dict[tuple[int, int], V] = changes or {}
+
+    def __getitem__(self, location: tuple[int, int]) -> V:
+        if location not in self.changes:
+            return self.base[location]
+        value = self.changes[location]
+        if value == self.empty:
+            raise KeyError(location)
+        return value
+
+    def get(self, location: tuple[int, int], default: V | None = None) -> V | None:  # type: ignore[override]
+        changes = self.changes
+        if location in changes:
+            return changes[location] or default
+        return self.base.get(location, default)
+
+    def __setitem__(self, location: tuple[int, int], value: V) -> None:
+        self.changes[location] = value
+
+    def __delitem__(self, location: tuple[int, int]) -> None:
+        if location not in self:
+            raise KeyError(location)
+        self.changes[location] = self.empty
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        changes = self.changes
+        for location, value in changes.items():
+            if value != self.empty:
+                yield location
+        for location in self.base:
+            if location not in changes:
+                yield location
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def clear(self) -> None:
+        self.changes = dict.fromkeys(self.base, self.empty)
+
+    def __copy__(self) -> CornerOverlay[V]:
+        return CornerOverlay(self.base, self.empty, dict(self.changes))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())})"
@@ -0,0 +1,19 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks.core_benchmarks import main
+
+
+def test_benchmarks(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    output = tmp_path / "results.json"
+    args = ["-k", "8x8/", "--min-time", "0", "--repeat", "1", "--output", str(output)]
+    main(args)
+    results = json.loads(output.read_text())["results"]
+    assert "8x8/move" in results
+    assert "8x8/compare_with (different)" in results
+    assert all(time > 0 for time in results.values())
+
+    main([*args, "--compare", str(output)])
+    assert "8x8/turn_left" in capsys.readouterr().out
@@ -5,25 +5,32 @@ This also contains helper methods for running tests or autograders.
 
 from pathlib import Path
 
-from stanfordkarel.karel_application import StudentCode
+import pytest
+
+from stanfordkarel.grader import MAX_STEPS, PROBLEMS, REPEAT_LIMIT
 from stanfordkarel.karel_program import KarelException, KarelProgram
+from stanfordkarel.student_code import StudentCode
+from stanfordkarel.world_cache import CACHE_DIR_VARIABLE
 
-PROBLEMS = (
-    "checkerboard_karel",
-    "collect_newspaper_karel",
-    "midpoint_karel",
-    "triple_karel",
-    "stone_mason_karel",
-)
 STUDENT_CODE_DIR = Path("solutions")
 TIMEOUT = 10
 
 
+@pytest.fixture(autouse=True)
+def world_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Path:
+    """Keeps parsed worlds out of the user's cache, sharing one cache per session."""
+    cache_dir = tmp_path_factory.getbasetemp() / "world_cache"
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(cache_dir))
+    return cache_dir
+
+
 def execute_karel_code(
     code_file: Path, world_name: str = "", expected_error: str = ""
 ) -> None:
     world_name = world_name or code_file.stem
-    karel = KarelProgram(world_name)
+    karel = KarelProgram(world_name, MAX_STEPS, REPEAT_LIMIT)
     try:
         student_code = StudentCode(code_file)
     except (SyntaxError, RuntimeError) as e:
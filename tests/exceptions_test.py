@@ -21,6 +21,13 @@ TEST_CASES = (
         "missing_main.txt",
         "Couldn't find the main() function. Are you sure you have one?",
     ),
+    (
+        "infinite_loop.txt",
+        (
+            "Karel was stopped after 1000001 steps while on avenue 3 and street 4, "
+            "facing East\nInfinite loop: Karel used up its budget of 1000000 steps."
+        ),
+    ),
 )
 
 
@@ -2,7 +2,8 @@ import warnings
 
 import pytest
 
-from tests.conftest import PROBLEMS, STUDENT_CODE_DIR, TIMEOUT, execute_karel_code
+from stanfordkarel.grader import PROBLEMS
+from tests.conftest import STUDENT_CODE_DIR, TIMEOUT, execute_karel_code
 
 
 @pytest.mark.timeout(TIMEOUT)
@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from stanfordkarel.__main__ import main
+from stanfordkarel.generate import GENERATORS, generate, make_world
+from stanfordkarel.karel_world import Direction, KarelWorld
+
+
+def reachable_corners(world: KarelWorld) -> set[tuple[int, int]]:
+    start = world.karel_start_location
+    reached = {start}
+    stack = [start]
+    while stack:
+        avenue, street = stack.pop()
+        for direction, (dx, dy) in (
+            (Direction.EAST, (1, 0)),
+            (Direction.WEST, (-1, 0)),
+            (Direction.NORTH, (0, 1)),
+            (Direction.SOUTH, (0, -1)),
+        ):
+            corner = (avenue + dx, street + dy)
+            if (
+                corner not in reached
+                and world.in_bounds(*corner)
+                and not world.wall_blocks(avenue, street, direction)
+            ):
+                reached.add(corner)
+                stack.append(corner)
+    return reached
+
+
+@pytest.mark.parametrize("kind", GENERATORS)
+def test_generate(kind: str) -> None:
+    assert generate(kind, 12, 9, seed=3) == generate(kind, 12, 9, seed=3)
+    world = make_world(kind, 12, 9, seed=3)
+    assert world.num_avenues == 12
+    assert world.num_streets == 9
+    assert world.world_file.name == f"{kind}_12x9_3"
+    assert all(world.in_bounds(avenue, street) for avenue, street in world.beepers)
+    assert all(world.in_bounds(wall.avenue, wall.street) for wall in world.walls)
+
+
+def test_maze() -> None:
+    assert generate("maze", 20, 20, seed=1) != generate("maze", 20, 20, seed=2)
+    world = make_world("maze", 30, 20, seed=1)
+    # A perfect maze is a spanning tree of the corners, so it has one fewer
+    # passage than corners, and every other wall between corners is present
+    passages = 30 * 20 - 1
+    assert len(world.walls) == 2 * 30 * 20 - 30 - 20 - passages
+    assert len(reachable_corners(world)) == 30 * 20
+
+
+def test_rooms_and_newspaper() -> None:
+    world = make_world("rooms", 23, 17, seed=5)
+    assert len(reachable_corners(world)) == 23 * 17
+
+    world = make_world("collect_newspaper", 9, 6, seed=2)
+    ((newspaper, count),) = world.beepers.items()
+    assert count == 1
+    assert newspaper in reachable_corners(world)
+    assert world.karel_start_beeper_count == 0
+    with pytest.raises(ValueError, match="at least"):
+        generate("collect_newspaper", 3, 3)
+    with pytest.raises(ValueError, match="Unknown kind"):
+        generate("labyrinth", 3, 3)
+
+
+@pytest.mark.parametrize("suffix", [".w", ".json.gz", ".kw"])
+def test_generate_command(
+    suffix: str, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    output = tmp_path / f"maze{suffix}"
+    args = ["generate", "maze", "15x10", "--seed", "4", "--count", "2"]
+    assert main([*args, "--output", str(output)]) == 0
+    assert capsys.readouterr().out.split() == [
+        str(tmp_path / f"maze_4{suffix}"),
+        str(tmp_path / f"maze_5{suffix}"),
+    ]
+    loaded = KarelWorld(str(tmp_path / f"maze_5{suffix}"))
+    assert loaded == make_world("maze", 15, 10, seed=5)
+
+    assert main(["generate", "labyrinth", "5", "--output", str(output)]) == 2
+    assert "Unknown kind" in capsys.readouterr().err
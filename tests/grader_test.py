@@ -0,0 +1,102 @@
+import shutil
+from pathlib import Path
+
+from stanfordkarel.grader import GradeJob, find_jobs, grade_cohort, grade_job
+
+PROBLEM = "collect_newspaper_karel"
+
+
+def make_submissions(tmp_path: Path) -> Path:
+    submissions = tmp_path / "submissions"
+    for student, program in (
+        ("alice", "collect_newspaper.txt"),
+        ("bob", "empty_beeper.txt"),
+    ):
+        (submissions / student).mkdir(parents=True)
+        shutil.copy(
+            f"tests/programs/{program}", submissions / student / f"{PROBLEM}.py"
+        )
+    (submissions / "carol").mkdir()
+    return submissions
+
+
+def test_find_jobs(tmp_path: Path) -> None:
+    submissions = make_submissions(tmp_path)
+
+    jobs = find_jobs(submissions, (PROBLEM,), {PROBLEM: (PROBLEM, "1x1")})
+
+    assert [(job.submission.name, job.world) for job in jobs] == [
+        ("alice", PROBLEM),
+        ("alice", "1x1"),
+        ("bob", PROBLEM),
+        ("bob", "1x1"),
+        ("carol", PROBLEM),
+        ("carol", "1x1"),
+    ]
+
+
+def test_grade_job(tmp_path: Path) -> None:
+    submissions = make_submissions(tmp_path)
+
+    passed = grade_job(GradeJob(submissions / "alice", PROBLEM, PROBLEM))
+    failed = grade_job(GradeJob(submissions / "bob", PROBLEM, PROBLEM))
+    missing = grade_job(GradeJob(submissions / "carol", PROBLEM, PROBLEM))
+
+    assert passed.passed
+    assert not failed.passed
+    assert "Beepers do not match" in failed.output
+    assert not missing.passed
+    assert "could not be found" in missing.output
+
+
+def test_grade_cohort(tmp_path: Path) -> None:
+    submissions = make_submissions(tmp_path)
+
+    results = list(grade_cohort(submissions, (PROBLEM,), max_workers=2))
+
+    assert {(r.job.submission.name, r.passed) for r in results} == {
+        ("alice", True),
+        ("bob", False),
+        ("carol", False),
+    }
+
+
+def test_grade_misbehaving_submissions(tmp_path: Path) -> None:
+    submissions = tmp_path / "submissions"
+    for student, body in (
+        ("dave", "while True:\n        pass"),
+        ("erin", "import sys\n    sys.exit()"),
+    ):
+        (submissions / student).mkdir(parents=True)
+        (submissions / student / f"{PROBLEM}.py").write_text(
+            f"from stanfordkarel import *\n\n\ndef main():\n    {body}\n"
+        )
+
+    results = {
+        r.job.submission.name: r
+        for r in grade_cohort(submissions, (PROBLEM,), max_workers=2, timeout=0.5)
+    }
+
+    assert not results["dave"].passed
+    assert "Timed out after 0.5 seconds" in results["dave"].output
+    assert not results["erin"].passed
+    assert "SystemExit" in results["erin"].output
+
+
+def test_grade_job_repeat_limit(tmp_path: Path) -> None:
+    # Turning left 5000 times leaves Karel as it was, so the program is correct
+    solution = Path("tests/programs/collect_newspaper.txt").read_text()
+    code_file = tmp_path / "frank" / f"{PROBLEM}.py"
+    code_file.parent.mkdir()
+    code_file.write_text(
+        solution.replace(
+            "def main():\n",
+            "def main():\n    for _ in range(5000):\n        turn_left()\n",
+        )
+    )
+    job = GradeJob(code_file.parent, PROBLEM, PROBLEM)
+
+    assert grade_job(job).passed
+    limited = grade_job(job, repeat_limit=1000)
+    assert not limited.passed
+    assert "without changing the world" in limited.output
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from stanfordkarel.headless import run_headless
+from stanfordkarel.karel_program import KarelException, KarelProgram
+
+# Modules that must only be imported once a Karel program is run
+DEFERRED_MODULES = {
+    "tkinter",
+    "stanfordkarel.didyoumean",
+    "stanfordkarel.karel_application",
+    "stanfordkarel.karel_program",
+    "stanfordkarel.karel_world",
+    "stanfordkarel.student_code",
+}
+
+
+def write_program(tmp_path: Path, code_file: str, name: str) -> Path:
+    txt_file_contents = Path(code_file).read_text(encoding="utf-8")
+    py_path = tmp_path / f"{name}.py"
+    py_path.write_text(txt_file_contents)
+    return py_path
+
+
+def test_run_headless(tmp_path: Path) -> None:
+    py_path = write_program(
+        tmp_path, "tests/programs/collect_newspaper.txt", "collect_newspaper_karel"
+    )
+
+    result = run_headless(py_path)
+
+    assert result.error is None
+    assert result.karel == KarelProgram("collect_newspaper_karel_end")
+    assert result.action_counts == {
+        "move": 8,
+        "turn_left": 12,
+        "put_beeper": 0,
+        "pick_beeper": 1,
+        "paint_corner": 0,
+    }
+    assert result.total_actions == 21
+
+
+def test_run_headless_crash(tmp_path: Path) -> None:
+    py_path = write_program(
+        tmp_path, "tests/programs/collect_newspaper.txt", "collect_newspaper"
+    )
+
+    result = run_headless(py_path, "1x1")
+
+    assert isinstance(result.error, KarelException)
+    assert result.action_counts["move"] == 0
+
+
+def test_cli_headless_does_not_import_tkinter(tmp_path: Path) -> None:
+    py_path = write_program(
+        tmp_path, "tests/programs/collect_newspaper.txt", "collect_newspaper_karel"
+    )
+    check_tkinter = (
+        "import sys; from stanfordkarel.__main__ import main; "
+        f"code = main(['run', {str(py_path)!r}, '--headless']); "
+        "assert 'tkinter' not in sys.modules; sys.exit(code)"
+    )
+
+    subprocess.run([sys.executable, "-c", check_tkinter], check=True)  # noqa: S603
+
+
+def test_student_api_imports_nothing_else() -> None:
+    list_modules = "import sys; from stanfordkarel import *; print(*sys.modules)"
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", list_modules], capture_output=True, text=True, check=True
+    )
+    assert not DEFERRED_MODULES & set(result.stdout.split())
@@ -0,0 +1,41 @@
+import queue
+import threading
+from pathlib import Path
+
+from stanfordkarel.karel_application import KarelApplication
+from stanfordkarel.karel_program import KarelProgram
+from stanfordkarel.student_code import StudentCode
+
+SPINNING_PROGRAM = """\
+from stanfordkarel import *
+
+
+def main():
+    while not facing_north():
+        pass
+"""
+
+
+def test_stop_cancels_program_checking_only_conditions(tmp_path: Path) -> None:
+    code_file = tmp_path / "spinning_karel.py"
+    code_file.write_text(SPINNING_PROGRAM)
+
+    # Only the state used by the program's thread, so no window is needed
+    app = KarelApplication.__new__(KarelApplication)
+    app.karel = KarelProgram("1x1")
+    app.student_code = StudentCode(code_file)
+    app.student_code.inject_namespace(app.karel)
+    app.inject_decorator_namespace()
+    app.action_requests = queue.Queue()
+    app.program_cancelled = False
+
+    program = threading.Thread(target=app.run_student_code, daemon=True)
+    program.start()
+    program.join(0.1)
+    assert program.is_alive()
+
+    app.program_cancelled = True
+    program.join(5)
+    assert not program.is_alive()
+    assert app.program_error is None
+    assert app.action_requests.get_nowait() is None
@@ -1,7 +1,15 @@
 from pathlib import Path
 
-from stanfordkarel.karel_application import StudentCode
-from stanfordkarel.karel_program import KarelProgram
+import pytest
+
+from stanfordkarel.karel_program import (
+    KarelException,
+    KarelInfiniteLoopException,
+    KarelProgram,
+)
+from stanfordkarel.karel_world import Direction, KarelWorld, Wall
+from stanfordkarel.student_code import StudentCode
+from stanfordkarel.world_storage import DenseBeepers, DenseCornerColors
 
 STONE_MASON_ASCII_OUTPUT = (
     "┌───────────────────────────────────────────────────────────────────────────────┐",
@@ -133,3 +141,253 @@ class TestKarelWorld:
         ref_program = KarelProgram("1x1")
 
         assert ref_program.world == test_program.world
+
+    @staticmethod
+    def test_fingerprint() -> None:
+        world = KarelWorld("stone_mason_karel")
+        other = KarelWorld("stone_mason_karel")
+        initial_fingerprint = world.fingerprint
+
+        world.add_beeper(2, 2)
+        world.add_beeper(2, 2)
+        world.remove_beeper(5, 1)
+        world.paint_corner(3, 3, "Red")
+        world.paint_corner(3, 3, "Blue")
+        world.add_wall(Wall(8, 8, Direction.NORTH))
+        world.remove_wall(Wall(1, 6, Direction.SOUTH))
+        fingerprint = world.fingerprint
+        world.rebuild_fingerprint()
+        assert world.fingerprint == fingerprint != initial_fingerprint
+        assert world != other
+
+        # Undoing every change restores the original fingerprint and equality
+        world.remove_beeper(2, 2)
+        world.remove_beeper(2, 2)
+        world.add_beeper(5, 1)
+        world.paint_corner(3, 3, "")
+        world.remove_wall(Wall(8, 9, Direction.SOUTH))
+        world.add_wall(Wall(1, 5, Direction.NORTH))
+        world.reset_corner(10, 10)
+        assert world.fingerprint == initial_fingerprint
+        assert world == other
+        assert len({world, other, KarelWorld("1x1")}) == 2
+
+    @staticmethod
+    def test_fork_and_reset(tmp_path: Path) -> None:
+        base = KarelWorld("stone_mason_karel")
+        base.paint_corner(1, 1, "Red")
+        original = base.fork()
+        fork = base.fork()
+
+        fork.add_beeper(2, 2)
+        fork.remove_beeper(5, 1)
+        fork.paint_corner(1, 1, "Blue")
+        fork.add_wall(Wall(8, 8, Direction.NORTH))
+        assert fork != base
+        assert base == original
+        assert Wall(8, 8, Direction.NORTH) not in base.walls
+        assert not base.wall_blocks(8, 8, Direction.NORTH)
+
+        # Reset restores the initial world, including colors from the world file
+        fork.reset_world()
+        base.reset_world()
+        assert fork.get_beepers() == base.get_beepers()
+        assert fork.corner_color(1, 1) == ""
+        assert fork.get_walls() == base.get_walls() | {Wall(8, 9, Direction.SOUTH)}
+        fork.remove_wall(Wall(8, 8, Direction.NORTH))
+        assert fork == base
+        assert fork.fingerprint == base.fingerprint
+
+        world_file = tmp_path / "colored.w"
+        world_file.write_text("Dimension: (2, 2)\nColor: (1, 1); Green\n")
+        colored = KarelWorld(str(world_file))
+        colored.paint_corner(1, 1, "Red")
+        colored.add_beeper(2, 2)
+        colored.reset_world()
+        assert colored.get_colors() == {(1, 1): "Green"}
+        assert colored.get_beepers() == {}
+        assert colored == KarelWorld(str(world_file))
+
+    @staticmethod
+    @pytest.mark.parametrize("world_name", ["1x8", "stone_mason_karel", "color_karel"])
+    def test_binary_world(world_name: str, tmp_path: Path) -> None:
+        world = KarelWorld(world_name)
+        binary_file, text_file = tmp_path / "world.kw", tmp_path / "world.w"
+        world.save_to_file(binary_file)
+        binary_world = KarelWorld(str(binary_file))
+
+        assert isinstance(binary_world.wall_mask, memoryview)
+        assert binary_world.wall_set is None
+        assert binary_world == world
+        assert binary_world.wall_mask == world.wall_mask
+        assert binary_world.karel_start_location == world.karel_start_location
+        assert binary_world.karel_start_direction == world.karel_start_direction
+        assert binary_world.karel_start_beeper_count == world.karel_start_beeper_count
+
+        # Converting back to a world file loses nothing
+        binary_world.save_to_file(text_file)
+        assert KarelWorld(str(text_file)) == world
+
+        # Running Karel changes the world, but never the file it was mapped from
+        fork = binary_world.fork()
+        binary_world.add_beeper(1, 1)
+        binary_world.paint_corner(1, 1, "Red")
+        binary_world.add_wall(Wall(1, 1, Direction.NORTH))
+        assert binary_world != world
+        assert fork == world
+        binary_world.reset_world()
+        binary_world.remove_wall(Wall(1, 1, Direction.NORTH))
+        assert binary_world == world
+        assert KarelWorld(str(binary_file)) == world
+
+        # Saving over the file the world is mapped from replaces the file
+        binary_world.add_beeper(1, 1)
+        binary_world.save_to_file(binary_file)
+        assert binary_world.get_beepers() == KarelWorld(str(binary_file)).get_beepers()
+        assert list(tmp_path.glob("*.tmp")) == []
+
+    @staticmethod
+    def test_release_binary_world(tmp_path: Path) -> None:
+        binary_file = tmp_path / "world.kw"
+        KarelWorld("stone_mason_karel").save_to_file(binary_file)
+        binary_world = KarelWorld(str(binary_file))
+        mapped_files = binary_world.mapped_files
+        assert len(mapped_files) == 2
+
+        # The maps are closed before the file is replaced, as Windows requires
+        binary_world.add_beeper(1, 1)
+        binary_world.save_to_file(binary_file)
+        assert all(mapped_file.closed for mapped_file in mapped_files)
+        assert binary_world.mapped_files == ()
+        assert binary_world == KarelWorld(str(binary_file))
+        binary_world.reset_world()
+        assert binary_world == KarelWorld("stone_mason_karel")
+
+    @staticmethod
+    def test_invalid_binary_world(tmp_path: Path) -> None:
+        world_file = tmp_path / "world.kw"
+        world_file.write_bytes(b"Dimension: (2, 2)\n")
+        with pytest.raises(ValueError, match="not a binary Karel world"):
+            KarelWorld(str(world_file))
+
+        world = KarelWorld("1x8")
+        world.add_beeper(2, 1)
+        with pytest.raises(ValueError, match="outside of the world"):
+            world.save_to_file(world_file)
+
+    @staticmethod
+    def test_wall_mask_matches_walls() -> None:
+        world = KarelWorld("stone_mason_karel")
+        world.add_wall(Wall(1, 1, Direction.NORTH))
+        world.add_wall(Wall(2, 2, Direction.EAST))
+        world.remove_wall(Wall(3, 7, Direction.EAST))
+
+        for avenue in range(1, world.num_avenues + 1):
+            for street in range(1, world.num_streets + 1):
+                for direction in Direction:
+                    alt_wall = world.get_alt_wall(Wall(avenue, street, direction))
+                    assert world.wall_blocks(avenue, street, direction) == (
+                        world.wall_exists(avenue, street, direction)
+                        or world.wall_exists(*alt_wall)
+                    )
+
+    @staticmethod
+    def test_dense_storage(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+        sparse_world = KarelWorld("stone_mason_karel")
+        monkeypatch.setattr(KarelWorld, "dense_storage_threshold", 0)
+        dense_world = KarelWorld("stone_mason_karel")
+
+        assert isinstance(dense_world.beepers, DenseBeepers)
+        assert isinstance(dense_world.corner_colors, DenseCornerColors)
+        assert dense_world == sparse_world
+
+        for world in (sparse_world, dense_world):
+            world.add_beeper(5, 1)
+            world.add_beeper(5, 1)
+            world.remove_beeper(1, 4)
+            world.paint_corner(2, 2, "Dark Gray")
+            world.reset_corner(13, 1)
+        assert dense_world.get_beepers() == sparse_world.get_beepers()
+        assert dense_world.get_colors() == {(2, 2): "Dark Gray"}
+        assert dense_world.corner_color(3, 3) == ""
+
+        sparse_file, dense_file = tmp_path / "sparse.w", tmp_path / "dense.w"
+        sparse_world.reset_world()
+        dense_world.reset_world()
+        sparse_world.save_to_file(sparse_file)
+        dense_world.save_to_file(dense_file)
+        assert dense_file.read_text() == sparse_file.read_text()
+
+    @staticmethod
+    @pytest.mark.parametrize("world_name", ["1x8", "8x1", "stone_mason_karel"])
+    def test_clearance_table(world_name: str) -> None:
+        karel = KarelProgram(world_name)
+        world = karel.world
+
+        def check_clearance() -> None:
+            for avenue in range(1, world.num_avenues + 1):
+                for street in range(1, world.num_streets + 1):
+                    karel.avenue, karel.street = avenue, street
+                    for direction in Direction:
+                        alt_wall = world.get_alt_wall(Wall(avenue, street, direction))
+                        expected = world.in_bounds(
+                            alt_wall.avenue, alt_wall.street
+                        ) and not world.wall_blocks(avenue, street, direction)
+                        assert karel.direction_is_clear(direction) == expected
+
+        check_clearance()
+        world.add_wall(Wall(1, 1, Direction.NORTH))
+        check_clearance()
+        world.remove_wall(Wall(1, 2, Direction.SOUTH))
+        check_clearance()
+
+    @staticmethod
+    def test_clearance_out_of_bounds(tmp_path: Path) -> None:
+        world_file = tmp_path / "outside.w"
+        world_file.write_text("Dimension: (3, 3)\nKarel: (5, 5); east\n")
+        karel = KarelProgram(str(world_file))
+        for avenue, street in ((5, 5), (0, 2), (4, 2), (2, 0), (2, 4)):
+            karel.avenue, karel.street = avenue, street
+            assert not karel.front_is_clear()
+            assert not karel.left_is_clear()
+            assert not karel.right_is_clear()
+
+    @staticmethod
+    @pytest.mark.parametrize("dense", [False, True])
+    def test_actions_out_of_bounds(
+        dense: bool, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        if dense:
+            monkeypatch.setattr(KarelWorld, "dense_storage_threshold", 0)
+        world_file = tmp_path / "outside.w"
+        world_file.write_text("Dimension: (3, 3)\nKarel: (5, 5); east\nBeeperBag: 1\n")
+        karel = KarelProgram(str(world_file))
+        with pytest.raises(KarelException, match="put a beeper, but it was outside"):
+            karel.put_beeper()
+        with pytest.raises(KarelException, match="paint the corner, but it was"):
+            karel.paint_corner("Red")
+        with pytest.raises(KarelException, match="pick up a beeper"):
+            karel.pick_beeper()
+        assert karel.world.beepers == {}
+        assert karel.world.corner_colors == {}
+
+    @staticmethod
+    def test_step_budget() -> None:
+        karel = KarelProgram("collect_newspaper_karel", max_steps=10)
+        for _ in range(5):
+            karel.front_is_clear()
+            karel.turn_left()
+        with pytest.raises(KarelInfiniteLoopException, match="budget of 10") as e:
+            karel.turn_left()
+        assert e.value.steps == 11
+
+        # Changing the world resets repeat detection, but not the step count
+        karel = KarelProgram("collect_newspaper_karel", repeat_limit=2)
+        karel.paint_corner("Red")
+        karel.beepers_present()
+        karel.paint_corner("Blue")
+        karel.beepers_present()
+        karel.beepers_present()
+        with pytest.raises(KarelInfiniteLoopException, match="same state 3 times"):
+            karel.paint_corner("Blue")
+        assert karel.steps == 6
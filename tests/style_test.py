@@ -2,8 +2,9 @@ import warnings
 
 import pytest
 
+from stanfordkarel.grader import PROBLEMS
 from stanfordkarel.style_checker import StyleChecker
-from tests.conftest import PROBLEMS, STUDENT_CODE_DIR, TIMEOUT
+from tests.conftest import STUDENT_CODE_DIR, TIMEOUT
 
 
 @pytest.mark.timeout(TIMEOUT)
@@ -0,0 +1,103 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from stanfordkarel.headless import run_headless
+from stanfordkarel.karel_program import KarelProgram
+from stanfordkarel.karel_trace import (
+    MAGIC,
+    MOVE,
+    TURN_LEFT,
+    ActionTrace,
+    TracePlayer,
+)
+
+
+def test_run_length_folding() -> None:
+    trace = ActionTrace()
+    for code in (MOVE, MOVE, MOVE, TURN_LEFT, MOVE):
+        trace.record(code)
+    trace.record_paint("Red")
+    trace.record_paint("Red")
+    trace.record_paint("Blue")
+    trace.record_paint(None)
+
+    assert list(trace.codes) == [MOVE, TURN_LEFT, MOVE, 4, 4 | 1 << 3, 4 | 2 << 3]
+    assert list(trace.counts) == [3, 1, 1, 2, 1, 1]
+    assert len(trace) == 9
+    assert list(trace)[-4:] == [
+        ("paint_corner", "Red"),
+        ("paint_corner", "Red"),
+        ("paint_corner", "Blue"),
+        ("paint_corner", None),
+    ]
+
+
+def test_save_and_load() -> None:
+    trace = ActionTrace()
+    for _ in range(100_000):
+        trace.record(MOVE)
+    trace.record_paint("Dark Gray")
+    trace.record(TURN_LEFT)
+
+    f = io.BytesIO()
+    trace.dump(f)
+    f.seek(0)
+    loaded = ActionTrace.load(f)
+
+    assert list(loaded.runs()) == list(trace.runs())
+    assert loaded.colors == trace.colors
+
+
+def test_load_invalid_trace() -> None:
+    with pytest.raises(ValueError, match="Not a Karel action trace"):
+        ActionTrace.load(io.BytesIO(b"Dimension: (1, 1)"))
+    with pytest.raises(ValueError, match="unknown action code 7"):
+        ActionTrace.load(io.BytesIO(MAGIC + bytes((MOVE, 1, 7, 1))))
+
+
+def test_record_program(tmp_path: Path) -> None:
+    py_path = tmp_path / "collect_newspaper_karel.py"
+    py_path.write_text(Path("tests/programs/collect_newspaper.txt").read_text())
+
+    result = run_headless(py_path, record_trace=True)
+    trace = result.karel.trace
+    assert trace is not None
+    assert len(trace) == result.total_actions
+
+    trace_file = tmp_path / "collect_newspaper.ktrace"
+    trace.save_to_file(trace_file)
+    karel = KarelProgram("collect_newspaper_karel")
+    for action, color in ActionTrace.load_from_file(trace_file):
+        karel_fn = getattr(karel, action)
+        karel_fn(color) if action == "paint_corner" else karel_fn()
+
+    assert karel == result.karel
+
+
+def test_seek_replay(tmp_path: Path) -> None:
+    py_path = tmp_path / "collect_newspaper_karel.py"
+    py_path.write_text(Path("tests/programs/collect_newspaper.txt").read_text())
+    result = run_headless(py_path, record_trace=True)
+    assert result.karel.trace is not None
+
+    player = TracePlayer(
+        KarelProgram("collect_newspaper_karel"), result.karel.trace, keyframe_interval=4
+    )
+    states = []
+    while player.step() is not None:
+        karel = player.karel
+        states.append((karel.avenue, karel.street, karel.direction, karel.num_beepers))
+    assert player.karel == result.karel
+
+    for position in (5, 17, 2, 0, len(states), 9):
+        player.seek(position)
+        karel = player.karel
+        if position == 0:
+            assert (karel.avenue, karel.street, karel.num_beepers) == (3, 4, 0)
+        else:
+            state = (karel.avenue, karel.street, karel.direction, karel.num_beepers)
+            assert state == states[position - 1]
+    player.seek(len(states))
+    assert player.karel == result.karel
@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from stanfordkarel import karel_world, world_cache
+from stanfordkarel.karel_world import KarelWorld
+
+WORLD = "Dimension: (3, 3)\nWall: (2, 2); west\nBeeper: (1, 2); 3\nColor: (3, 3); Red\n"
+
+
+def fail_to_parse(path: Path, *_: object) -> None:
+    raise AssertionError(f"{path} was parsed instead of loaded from cache")
+
+
+def test_cached_world_matches_parsed_world(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    world_file = tmp_path / "cached.w"
+    world_file.write_text(WORLD)
+    parsed = KarelWorld(str(world_file))
+    assert world_cache.load(world_file) is not None
+
+    monkeypatch.setattr(karel_world, "parse_world_file", fail_to_parse)
+    cached = KarelWorld(str(world_file))
+    assert cached == parsed
+    assert cached.walls == parsed.walls
+    assert cached.karel_start_direction == parsed.karel_start_direction
+
+
+def test_cache_invalidation(tmp_path: Path) -> None:
+    world_file = tmp_path / "changed.w"
+    world_file.write_text(WORLD)
+    KarelWorld(str(world_file))
+
+    # Touching the file keeps the entry, because the contents hash the same
+    stat = world_file.stat()
+    os.utime(world_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert world_cache.load(world_file) is not None
+
+    world_file.write_text(WORLD.replace("Beeper: (1, 2); 3", "Beeper: (1, 2); 4"))
+    assert world_cache.load(world_file) is None
+    assert KarelWorld(str(world_file)).beepers == {(1, 2): 4}
+
+
+def test_disabled_or_corrupt_cache(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    world_file = tmp_path / "corrupt.w"
+    world_file.write_text(WORLD)
+    KarelWorld(str(world_file))
+    cache_path = world_cache.cache_path(world_file)
+    assert cache_path is not None
+    cache_path.write_bytes(b"not a cached world")
+    assert world_cache.load(world_file) is None
+
+    monkeypatch.setenv(world_cache.CACHE_DIR_VARIABLE, "")
+    assert world_cache.cache_path(world_file) is None
+    assert KarelWorld(str(world_file)).beepers == {(1, 2): 3}
@@ -0,0 +1,79 @@
+import gzip
+from pathlib import Path
+
+import pytest
+
+from stanfordkarel.karel_world import COLOR_MAP, DIRECTION_VALUES, INFINITY, KarelWorld
+from stanfordkarel.world_parser import (
+    ParseError,
+    WorldFileError,
+    parse_world_file,
+    parse_world_string,
+)
+
+WORLD = """\
+Dimension: (5, 4)
+Wall: (2, 2); west
+wall: (3,3);SOUTH
+Beeper: (1, 2); 3
+Beeper: (1, 2); 2
+Color: (4, 4); dark gray
+Color: (4, 3); gray80
+Karel: (2, 1); north
+BeeperBag: infinity
+Speed: 0.25
+"""
+
+
+def test_parse_world() -> None:
+    parsed = parse_world_string(WORLD, DIRECTION_VALUES, COLOR_MAP)
+
+    assert (parsed.num_avenues, parsed.num_streets) == (5, 4)
+    assert parsed.walls == [(2, 2, "west"), (3, 3, "south")]
+    assert parsed.beepers == {(1, 2): 5}
+    assert parsed.corner_colors == {(4, 4): "Dark Gray", (4, 3): "Light Gray"}
+    assert (parsed.karel_location, parsed.karel_direction) == ((2, 1), "north")
+    assert parsed.beeper_bag is None
+    assert parsed.speed == 25
+
+
+def test_parse_errors() -> None:
+    world = (
+        "Dimension: (5, 4)\nWall: (1, 1)\nBeeper: (1, 2); many\nColor: (1, 1); Teal\n"
+    )
+
+    with pytest.raises(WorldFileError) as e:
+        parse_world_string(world, DIRECTION_VALUES, COLOR_MAP)
+
+    assert e.value.errors == [
+        ParseError(2, 13, "wall entry is missing a direction"),
+        ParseError(3, 17, "'many' is not a valid beeper parameter"),
+        ParseError(3, 21, "beeper entry is missing a number"),
+        ParseError(4, 16, "'Teal' is not a valid color parameter"),
+        ParseError(4, 20, "color entry is missing a color"),
+    ]
+    assert str(e.value).splitlines()[1] == (
+        "  line 2, column 13: wall entry is missing a direction"
+    )
+
+
+def test_parse_empty_dimension() -> None:
+    with pytest.raises(WorldFileError) as e:
+        parse_world_string("Dimension: (0, 3)\n", DIRECTION_VALUES, COLOR_MAP)
+
+    assert e.value.errors == [
+        ParseError(1, 12, "dimension (0, 3) must be at least (1, 1)")
+    ]
+
+
+def test_gzip_world(tmp_path: Path) -> None:
+    world_file = tmp_path / "world.w.gz"
+    with gzip.open(world_file, "wt", encoding="utf-8") as f:
+        f.write(WORLD)
+
+    parsed = parse_world_file(world_file, DIRECTION_VALUES, COLOR_MAP)
+    assert parsed == parse_world_string(WORLD, DIRECTION_VALUES, COLOR_MAP)
+
+    world = KarelWorld(str(world_file))
+    assert world.karel_start_beeper_count == INFINITY
+    assert world.init_speed == 25
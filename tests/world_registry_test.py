@@ -0,0 +1,71 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from stanfordkarel.karel_world import (
+    DEFAULT_WORLDS_PATH,
+    WORLD_FILE_SUFFIXES,
+    WORLD_REGISTRY,
+    KarelWorld,
+)
+from stanfordkarel.world_registry import WorldRegistry
+
+WORLD = "Dimension: (2, 2)\n"
+
+
+def test_find_world(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    registry = WorldRegistry(WORLD_FILE_SUFFIXES, [Path("worlds")], DEFAULT_WORLDS_PATH)
+    assert registry.find("maze") is None
+    assert registry.find("stone_mason_karel") == (
+        DEFAULT_WORLDS_PATH / "stone_mason_karel.w"
+    )
+
+    # Worlds in worlds/ take precedence, and .w files over other formats
+    worlds = tmp_path / "worlds"
+    worlds.mkdir()
+    (worlds / "stone_mason_karel.json").write_text(WORLD)
+    (worlds / "maze.kw").write_text(WORLD)
+    (worlds / "maze.w").write_text(WORLD)
+    (worlds / "notes.txt").write_text(WORLD)
+    assert registry.find("stone_mason_karel") == Path("worlds/stone_mason_karel.json")
+    assert registry.find("maze") == Path("worlds/maze.w")
+    assert registry.find("notes") is None
+    assert {"maze", "stone_mason_karel"} <= set(registry.available_worlds())
+    assert "maze" not in registry.default_worlds()
+
+
+def test_index_refresh(tmp_path: Path) -> None:
+    registry = WorldRegistry(WORLD_FILE_SUFFIXES, [tmp_path], DEFAULT_WORLDS_PATH)
+    assert registry.find("maze") is None
+    index = registry.index(tmp_path)
+    assert registry.index(tmp_path) is index
+
+    # Adding or removing a file changes the directory's modification time. It is
+    # also set explicitly, in case the filesystem's timestamps are coarse.
+    (tmp_path / "maze.w.gz").write_text(WORLD)
+    os.utime(tmp_path, ns=(1, 1))
+    assert registry.find("maze") == tmp_path / "maze.w.gz"
+    (tmp_path / "maze.w.gz").unlink()
+    os.utime(tmp_path, ns=(2, 2))
+    assert registry.find("maze") is None
+
+
+def test_register_world_directory(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Failing to find a world hides the traceback for students
+    monkeypatch.setattr(sys, "tracebacklimit", 1000, raising=False)
+    (tmp_path / "registered_world.w").write_text(WORLD)
+    with pytest.raises(FileNotFoundError):
+        KarelWorld("registered_world")
+
+    WORLD_REGISTRY.register(tmp_path)
+    try:
+        world = KarelWorld("registered_world")
+        assert world.world_file == tmp_path / "registered_world.w"
+        assert world.num_avenues == world.num_streets == 2
+    finally:
+        WORLD_REGISTRY.directories.remove(tmp_path)
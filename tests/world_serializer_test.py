@@ -0,0 +1,107 @@
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from stanfordkarel.karel_world import INFINITY, KarelWorld
+from stanfordkarel.world_parser import WorldFileError
+
+
+@pytest.mark.parametrize("suffix", [".w", ".w.gz", ".json", ".json.gz", ".kw"])
+@pytest.mark.parametrize("world_name", ["stone_mason_karel", "color_karel"])
+def test_round_trip(world_name: str, suffix: str, tmp_path: Path) -> None:
+    world = KarelWorld(world_name)
+    world.karel_start_beeper_count = INFINITY
+    world_file = tmp_path / f"world{suffix}"
+    world.save_to_file(world_file)
+    loaded = KarelWorld(str(world_file))
+
+    assert loaded == world
+    assert loaded.karel_start_location == world.karel_start_location
+    assert loaded.karel_start_direction == world.karel_start_direction
+    assert loaded.karel_start_beeper_count == INFINITY
+
+
+def test_saved_formats(tmp_path: Path) -> None:
+    world = KarelWorld("stone_mason_karel")
+    text_file, compressed_file = tmp_path / "world.w", tmp_path / "world.w.gz"
+    world.save_to_file(text_file)
+    world.save_to_file(compressed_file)
+    text = text_file.read_text()
+    assert text.startswith("Dimension: (13, 13)\nWall: (1, 6); south\n")
+    assert gzip.decompress(compressed_file.read_bytes()).decode() == text
+
+    # Compressed files do not depend on when they were written
+    first = compressed_file.read_bytes()
+    world.save_to_file(compressed_file)
+    assert compressed_file.read_bytes() == first
+
+    json_file = tmp_path / "world.json"
+    world.save_to_file(json_file)
+    data = json.loads(json_file.read_text())
+    assert data["dimensions"] == [13, 13]
+    assert data["karel"] == {
+        "location": [1, 1],
+        "direction": "east",
+        "beeper_bag": None,
+    }
+    assert len(data["walls"]) == len(world.walls)
+    assert [1, 6, "south"] in data["walls"]
+    assert sum(count for *_, count in data["beepers"]) == sum(
+        world.get_beepers().values()
+    )
+    assert data["colors"] == []
+
+
+def test_reset_corners_are_not_saved(tmp_path: Path) -> None:
+    world = KarelWorld("stone_mason_karel")
+    location = next(iter(world.get_beepers()))
+    world.reset_corner(*location)
+    world_file = tmp_path / "world.w"
+    world.save_to_file(world_file)
+
+    assert "; 0\n" not in world_file.read_text()
+    assert KarelWorld(str(world_file)) == world
+
+
+def test_invalid_json_world(tmp_path: Path) -> None:
+    world_file = tmp_path / "world.json"
+    world_file.write_text('{"format": "stanfordkarel-world",\n "version": 1,,}')
+    with pytest.raises(WorldFileError, match="line 2"):
+        KarelWorld(str(world_file))
+
+    world_file.write_text(
+        json.dumps(
+            {
+                "format": "stanfordkarel-world",
+                "version": 1,
+                "dimensions": [3, 3],
+                "walls": [[1, 1, "up"], [2, 2]],
+                "beepers": [[1, 1, -1]],
+                "colors": [[1, 1, "Gray80"], [2, 2, "Mauve"]],
+                "karel": {"location": [1, 1], "direction": "east", "beeper_bag": None},
+            }
+        )
+    )
+    with pytest.raises(ValueError, match="walls") as error:
+        KarelWorld(str(world_file))
+    assert str(error.value).splitlines()[1:] == [
+        "  walls[1] must be [avenue, street, value]",
+        "  walls[0] has invalid direction 'up'",
+        "  beepers[0] has invalid count -1",
+        "  colors[1] has invalid color 'Mauve'",
+    ]
+
+
+def test_json_world_with_non_string_directions(tmp_path: Path) -> None:
+    world_file = tmp_path / "world.json"
+    world = {"format": "stanfordkarel-world", "version": 1, "dimensions": [3, 3]}
+
+    world_file.write_text(json.dumps({**world, "walls": [[1, 1, ["x"]]]}))
+    with pytest.raises(ValueError, match=r"walls\[0\] has invalid direction \['x'\]"):
+        KarelWorld(str(world_file))
+
+    world_file.write_text(json.dumps({**world, "karel": {"direction": ["e"]}}))
+    with pytest.raises(ValueError, match=r"karel.direction is invalid: \['e'\]"):
+        KarelWorld(str(world_file))